@@ -35,6 +35,7 @@ from market.tools import (
     get_sentiment,
 )
 from market.cache import get_cached_price, set_cached_price
+from market.correlation import find_comovers
 
 
 # ─── Data contracts between agents ───────────────────────────────────
@@ -308,6 +309,7 @@ def analyst_analyze(event: VolatilityEvent) -> AnalysisReport:
         rsi_14=rsi_14,
         trend=trend,
         atr_ratio=atr_ratio,
+        news=news,
     )
 
     news_context = "\n".join(
@@ -315,6 +317,13 @@ def analyst_analyze(event: VolatilityEvent) -> AnalysisReport:
         for a in news[:5]
     ) or "No recent news found."
 
+    # Cross-instrument context from the cached correlation matrix (no LLM cost)
+    comovers = find_comovers(event.instrument, top_n=3)
+    comover_context = ", ".join(
+        f"{c['instrument']} ({c['correlation']:+.2f})"
+        for c in comovers.get("moving_with", []) + comovers.get("moving_against", [])
+    ) or "none significant"
+
     prompt = f"""Volatility Event detected:
 - Instrument: {event.instrument}
 - Current Price: {event.current_price}
@@ -329,6 +338,8 @@ def analyst_analyze(event: VolatilityEvent) -> AnalysisReport:
 
 Sentiment Data: {json.dumps(sentiment, default=str)}
 
+Correlated instruments (hourly returns): {comover_context}
+
 Recent News:
 {news_context}
 
@@ -37,7 +37,9 @@ When using tools:
 - Use fetch_price_data to get current prices
 - Use search_news to find relevant news articles
 - Use explain_market_move for comprehensive move explanations
+- Use explain_market_moves when several instruments moved (one call for all)
 - Use get_sentiment for sentiment analysis
+- Use find_comovers to see which instruments are moving with or against one
 - Always cite your sources and data points
 """
 
@@ -59,10 +59,10 @@ class ToolRegistryTest(TestCase):
 
     def test_tool_count(self):
         """Verify we have the expected number of tools."""
-        self.assertEqual(len(get_market_tools()), 6)
+        self.assertEqual(len(get_market_tools()), 8)
         self.assertEqual(len(get_behavior_tools()), 3)
         self.assertEqual(len(get_content_tools()), 2)
         self.assertEqual(len(get_copytrading_tools()), 5)
         self.assertEqual(len(get_trading_tools()), 4)
-        # 6 market + 3 behavior + 3 content (incl. format_for_platform) + 5 copytrading + 4 trading = 21
-        self.assertEqual(len(TOOL_FUNCTIONS), 21)
+        # 8 market + 3 behavior + 3 content (incl. format_for_platform) + 5 copytrading + 4 trading = 23
+        self.assertEqual(len(TOOL_FUNCTIONS), 23)
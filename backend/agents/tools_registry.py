@@ -11,8 +11,10 @@ from market.tools import (
     analyze_technicals,
     get_sentiment,
     explain_market_move,
+    explain_market_moves,
     fetch_economic_calendar,
 )
+from market.correlation import find_comovers
 from behavior.tools import (
     get_recent_trades,
     analyze_trade_patterns,
@@ -102,6 +104,32 @@ def get_market_tools() -> List[Dict[str, Any]]:
                 }
             }
         },
+        {
+            "type": "function",
+            "function": {
+                "name": "explain_market_moves",
+                "description": "Explain several market moves at once (shared news evidence, one analysis). Prefer this over repeated explain_market_move calls",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "movers": {
+                            "type": "array",
+                            "description": "Moves to explain",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "instrument": {"type": "string"},
+                                    "move_description": {"type": "string"},
+                                    "change_pct": {"type": "number"}
+                                },
+                                "required": ["instrument"]
+                            }
+                        }
+                    },
+                    "required": ["movers"]
+                }
+            }
+        },
         {
             "type": "function",
             "function": {
@@ -152,6 +180,33 @@ def get_market_tools() -> List[Dict[str, Any]]:
                     "required": []
                 }
             }
+        },
+        {
+            "type": "function",
+            "function": {
+                "name": "find_comovers",
+                "description": "List instruments whose recent hourly returns move with (or against) an instrument, from a cached correlation matrix",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "instrument": {
+                            "type": "string",
+                            "description": "Trading instrument"
+                        },
+                        "top_n": {
+                            "type": "integer",
+                            "description": "Maximum instruments per direction",
+                            "default": 5
+                        },
+                        "min_correlation": {
+                            "type": "number",
+                            "description": "Minimum absolute correlation to include",
+                            "default": 0.5
+                        }
+                    },
+                    "required": ["instrument"]
+                }
+            }
         }
     ]
 
@@ -507,9 +562,11 @@ TOOL_FUNCTIONS = {
     "fetch_price_data": fetch_price_data,
     "search_news": search_news,
     "explain_market_move": explain_market_move,
+    "explain_market_moves": explain_market_moves,
     "get_sentiment": get_sentiment,
     "analyze_technicals": analyze_technicals,
     "fetch_economic_calendar": fetch_economic_calendar,
+    "find_comovers": find_comovers,
     # Behavior tools
     "get_recent_trades": get_recent_trades,
     "analyze_trade_patterns": analyze_trade_patterns,
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserProfile, Trade, BehavioralMetric
+from .models import UserProfile, Trade, BehavioralMetric, TradeSyncWatermark
 
 
 @admin.register(UserProfile)
@@ -15,3 +15,8 @@ class TradeAdmin(admin.ModelAdmin):
 @admin.register(BehavioralMetric)
 class BehavioralMetricAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "trading_date", "total_trades", "emotional_state")
+
+
+@admin.register(TradeSyncWatermark)
+class TradeSyncWatermarkAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "account_id", "last_sell_time", "last_synced_at")
@@ -32,15 +32,12 @@ def _check_overtrading(user_id: str) -> List[Dict[str, Any]]:
     from django.db.models import Count
 
     today = timezone.now().date()
-    today_count = Trade.objects.filter(user_id=user_id, opened_at__date=today).count()
+    today_count = Trade.objects.filter(user_id=user_id).opened_on(today).count()
 
     thirty_days_ago = today - timedelta(days=30)
     historical = (
-        Trade.objects.filter(
-            user_id=user_id,
-            opened_at__date__gte=thirty_days_ago,
-            opened_at__date__lt=today,
-        )
+        Trade.objects.filter(user_id=user_id)
+        .opened_between(thirty_days_ago, today)
         .values("opened_at__date")
         .annotate(count=Count("id"))
     )
@@ -166,7 +163,7 @@ def _check_weekly_drawdown(user_id: str) -> List[Dict[str, Any]]:
 
     week_start = timezone.now().date() - timedelta(days=timezone.now().weekday())
     weekly_pnl = (
-        Trade.objects.filter(user_id=user_id, opened_at__date__gte=week_start)
+        Trade.objects.filter(user_id=user_id).opened_since(week_start)
         .aggregate(total=Sum("pnl"))["total"]
     ) or 0
 
@@ -8,5 +8,12 @@ class BehaviorConfig(AppConfig):
     verbose_name = "Behavioral Coaching"
     
     def ready(self):
-        """Import signals when app is ready."""
-        import behavior.signals  # noqa
\ No newline at end of file
+        """Import signals when app is ready; optionally start the trade sync workers."""
+        import os
+        import behavior.signals  # noqa
+        if os.environ.get("RUN_TRADE_SYNC_WORKER", "").lower() == "true":
+            from behavior.sync_scheduler import start_trade_sync_worker
+            start_trade_sync_worker()
+        if os.environ.get("RUN_TRADE_INGEST", "").lower() == "true":
+            from behavior.live_ingest import start_trade_ingest
+            start_trade_ingest()
\ No newline at end of file
@@ -3,6 +3,7 @@
 
 import json
 import asyncio
+import itertools
 import logging
 import websockets
 from typing import List, Dict, Any, Optional
@@ -12,16 +13,35 @@ from django.utils import timezone
 from django.conf import settings
 import os
 
+from tradeiq.rate_limit import RateLimitExceeded, acquire_async
+
 from .models import Trade, UserProfile
 
 logger = logging.getLogger(__name__)
 
+RESPONSE_TIMEOUT_SECONDS = 15
+PROFIT_TABLE_PAGE_SIZE = 500  # Deriv max per profit_table request
+PROFIT_TABLE_CONCURRENCY = 4  # profit_table pages in flight at once
+PROFIT_TABLE_PAGE_OVERLAP = 50  # rows each page repeats from the one before
+
 
 class DerivAPIError(Exception):
     """Custom exception for Deriv API errors."""
     pass
 
 
+def _trade_key(trade: Dict[str, Any]):
+    return trade.get('contract_id') or trade.get('transaction_id')
+
+
+def _rows_after(boundary, page: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+    """Rows of *page* after the trade keyed *boundary*, or None if it is not there."""
+    for i, trade in enumerate(page):
+        if _trade_key(trade) == boundary:
+            return page[i + 1:]
+    return None
+
+
 class DerivClient:
     """
     WebSocket client for Deriv API.
@@ -51,6 +71,16 @@ class DerivClient:
         self.ws_url_demo = f"wss://ws.derivws.com/websockets/v3?app_id={self.app_id}&l=en&brand=deriv"
         
         self.websocket = None
+        self._session_token: Optional[str] = None
+        self._authorized_token: Optional[str] = None  # token authorized on the current socket
+        self.account: Dict[str, Any] = {}  # last authorize response (loginid, currency, ...)
+
+        # Responses are matched to requests by req_id, so several requests
+        # can share the socket; a reader task dispatches everything received.
+        self._req_ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._reader: Optional[asyncio.Task] = None
+        self._stream: Optional[asyncio.Queue] = None  # subscription messages
 
     def _resolve_api_token(self, api_token: Optional[str]) -> str:
         """Resolve explicit token or fallback to DERIV_TOKEN from environment."""
@@ -68,6 +98,9 @@ class DerivClient:
             max_retries: Maximum connection attempts before giving up
         """
         url = self.ws_url_demo if demo else self.ws_url
+        if self._reader is not None:  # dispatcher of a previous socket
+            self._reader.cancel()
+            self._reader = None
         last_exc = None
         for attempt in range(max_retries):
             try:
@@ -75,6 +108,7 @@ class DerivClient:
                     websockets.connect(url),
                     timeout=10,
                 )
+                self._authorized_token = None
                 return self.websocket
             except (asyncio.TimeoutError, OSError, websockets.exceptions.WebSocketException) as exc:
                 last_exc = exc
@@ -84,16 +118,68 @@ class DerivClient:
     
     async def disconnect(self):
         """Close WebSocket connection."""
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._reader = None
+        self._fail_pending(DerivAPIError("WebSocket disconnected"))
         if self.websocket:
             try:
                 await asyncio.wait_for(self.websocket.close(), timeout=5)
             except (asyncio.TimeoutError, Exception):
                 pass
             self.websocket = None
-    
+            self._authorized_token = None
+
+    def _ensure_reader(self):
+        """Start the dispatcher for the current socket if it is not running."""
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.get_running_loop().create_task(self._read_loop(self.websocket))
+
+    async def _read_loop(self, websocket):
+        """
+        Route every message on *websocket* to its waiting request.
+
+        Responses carry the req_id of their request. Anything without a
+        waiting request (subscription updates after the first response)
+        goes to the subscription queue, if one is open.
+        """
+        try:
+            async for message in websocket:
+                try:
+                    data = json.loads(message)
+                except ValueError:
+                    logger.warning("Ignoring non-JSON Deriv message")
+                    continue
+                req_id = data.get('req_id', (data.get('echo_req') or {}).get('req_id'))
+                future = self._pending.pop(req_id, None)
+                if future is not None:
+                    if not future.done():
+                        future.set_result(data)
+                elif self._stream is not None:
+                    self._stream.put_nowait(data)
+        except websockets.exceptions.ConnectionClosed:
+            logger.info("Deriv WebSocket connection closed")
+        finally:
+            self._fail_pending(DerivAPIError("Deriv WebSocket connection closed"))
+            if self._stream is not None:
+                self._stream.put_nowait(None)
+
+    def _fail_pending(self, exc: Exception):
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(exc)
+
     async def send_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Send request and wait for response.
+        Send request and wait for its response.
+
+        Each request is tagged with a fresh ``req_id``, so any number of
+        requests may be in flight on the socket at once.
         
         Args:
             request: Request payload dict
@@ -107,12 +193,22 @@ class DerivClient:
         if not self.websocket or self.websocket.closed:
             raise DerivAPIError("WebSocket not connected. Call connect() first.")
 
-        await self.websocket.send(json.dumps(request))
         try:
-            response_text = await asyncio.wait_for(self.websocket.recv(), timeout=15)
+            await acquire_async("deriv", self._session_token)
+        except RateLimitExceeded as exc:
+            raise DerivAPIError(str(exc)) from exc
+
+        self._ensure_reader()
+        req_id = next(self._req_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[req_id] = future
+        try:
+            await self.websocket.send(json.dumps({**request, "req_id": req_id}))
+            response = await asyncio.wait_for(future, timeout=RESPONSE_TIMEOUT_SECONDS)
         except asyncio.TimeoutError:
-            raise DerivAPIError("Deriv API response timed out after 15 seconds")
-        response = json.loads(response_text)
+            raise DerivAPIError(f"Deriv API response timed out after {RESPONSE_TIMEOUT_SECONDS} seconds")
+        finally:
+            self._pending.pop(req_id, None)
         
         # Check for errors
         if 'error' in response:
@@ -132,8 +228,10 @@ class DerivClient:
         Returns:
             Authorization response with user info
         """
+        token = self._resolve_api_token(api_token)
+        self._session_token = token  # later requests count against this token's budget
         request = {
-            "authorize": self._resolve_api_token(api_token)
+            "authorize": token
         }
         
         response = await self.send_request(request)
@@ -141,6 +239,8 @@ class DerivClient:
         if 'authorize' not in response:
             raise DerivAPIError("Authorization failed")
         
+        self._authorized_token = token
+        self.account = response['authorize']
         return response['authorize']
     
     async def fetch_profit_table(
@@ -168,14 +268,15 @@ class DerivClient:
         if not self.websocket:
             await self.connect()
         
-        # Authorize first
-        await self.authorize(api_token)
+        # Authorize once per socket and token
+        if self._authorized_token != self._resolve_api_token(api_token):
+            await self.authorize(api_token)
         
         # Build request
         request = {
             "profit_table": 1,
             "description": 1,
-            "limit": min(limit, 500),  # Deriv max is 500
+            "limit": min(limit, PROFIT_TABLE_PAGE_SIZE),  # Deriv max is 500
             "offset": offset,
             "sort": "DESC"  # Most recent first
         }
@@ -277,44 +378,85 @@ class DerivClient:
     async def fetch_all_trades(
         self,
         api_token: Optional[str] = None,
-        days_back: int = 30
+        days_back: int = 30,
+        date_from: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Fetch all trades from the last N days (handles pagination).
+
+        The first page is fetched alone (it also authorizes the socket). If
+        it is full, the following pages are requested PROFIT_TABLE_CONCURRENCY
+        at a time over the same socket until a short page comes back.
+
+        Pages can be served in any order while trades keep closing, and each
+        new row at the top shifts every offset down by one. Each page
+        therefore starts PROFIT_TABLE_PAGE_OVERLAP rows before the previous
+        one ends, and must contain that page's last contract; if it does not,
+        the table moved further than the overlap and the page is fetched
+        again, sequentially, until it does.
         
         Args:
             api_token: User's Deriv API token (optional if DERIV_TOKEN is set)
             days_back: How many days of history to fetch
+            date_from: Epoch to fetch from instead of days_back (incremental sync)
         
         Returns:
-            Complete list of trades
+            Complete list of trades, newest first
         """
         from datetime import timedelta
         
-        date_from = int((datetime.now() - timedelta(days=days_back)).timestamp())
-        
-        all_trades = []
-        offset = 0
-        limit = 500  # Max per request
-        
-        while True:
-            trades = await self.fetch_profit_table(
+        if date_from is None:
+            date_from = int((datetime.now() - timedelta(days=days_back)).timestamp())
+
+        limit = PROFIT_TABLE_PAGE_SIZE
+        step = limit - PROFIT_TABLE_PAGE_OVERLAP
+
+        async def _page(offset):
+            return await self.fetch_profit_table(
                 api_token=api_token,
                 limit=limit,
                 offset=offset,
                 date_from=date_from
             )
-            
-            if not trades:
-                break
-            
-            all_trades.extend(trades)
-            
-            # If we got less than limit, we're done
-            if len(trades) < limit:
-                break
-            
-            offset += limit
+
+        async def _resume(boundary, offset):
+            # Rows only ever arrive at the top, so the boundary is at or below *offset*
+            while True:
+                page = await _page(offset)
+                rows = _rows_after(boundary, page)
+                if rows is not None:
+                    return offset, page, rows
+                if len(page) < limit:
+                    raise DerivAPIError(f"Contract {boundary} vanished from the profit table mid-fetch")
+                offset += step
+
+        page = await _page(0)
+        fetched = list(page)
+        offset = step
+        while len(page) >= limit:
+            window = [offset + i * step for i in range(PROFIT_TABLE_CONCURRENCY)]
+            for page_offset, page in zip(window, await asyncio.gather(*(_page(o) for o in window))):
+                boundary = _trade_key(fetched[-1])
+                rows = _rows_after(boundary, page)
+                if rows is None:
+                    logger.info("profit_table shifted past the page overlap at offset %d; re-fetching", page_offset)
+                    page_offset, page, rows = await _resume(boundary, page_offset)
+                fetched.extend(rows)
+                offset = page_offset + step
+                # A short page is the end; later pages in the window are empty
+                if len(page) < limit:
+                    break
+
+        # Keep each contract once, whatever the pages returned
+        all_trades = []
+        seen = set()
+        for trade in fetched:
+            contract_id = trade.get('contract_id')
+            if contract_id is not None:
+                if contract_id in seen:
+                    continue
+                seen.add(contract_id)
+            all_trades.append(trade)
         
         return all_trades
     
@@ -372,75 +514,25 @@ class DerivClient:
                 'errors': [str(e)]
             }
         
-        trades_created = 0
-        trades_updated = 0
-        errors = []
-        
-        # Save to database
-        for trade_data in trades:
-            try:
-                # Use contract_id as unique identifier to avoid duplicates
-                contract_id = trade_data.get('contract_id')
-                
-                if not contract_id:
-                    errors.append(f"Missing contract_id for transaction {trade_data.get('transaction_id')}")
-                    continue
-                
-                # No contract_id column exists in Trade, so dedupe by a natural key
-                # derived from Deriv trade payload fields.
-                existing_qs = Trade.objects.filter(
-                    user=user,
-                    instrument=trade_data.get('instrument'),
-                    direction=trade_data.get('direction'),
-                )
-
-                opened_at = trade_data.get('opened_at')
-                if opened_at is not None:
-                    existing_qs = existing_qs.filter(opened_at=opened_at)
-
-                closed_at = trade_data.get('closed_at')
-                if closed_at is not None:
-                    existing_qs = existing_qs.filter(closed_at=closed_at)
-
-                entry_price = trade_data.get('entry_price')
-                if entry_price is not None:
-                    existing_qs = existing_qs.filter(entry_price=entry_price)
+        # Save to database: chunked upserts keyed on (user, contract_id)
+        from .trade_sync import upsert_deriv_trades
 
-                existing = existing_qs.first()
-                
-                if existing:
-                    # Update existing
-                    existing.pnl = trade_data['pnl']
-                    existing.closed_at = trade_data['closed_at']
-                    existing.duration_seconds = trade_data['duration_seconds']
-                    existing.save()
-                    trades_updated += 1
-                else:
-                    # Create new
-                    Trade.objects.create(
-                        user=user,
-                        instrument=trade_data['instrument'],
-                        direction=trade_data['direction'],
-                        pnl=trade_data['pnl'],
-                        entry_price=trade_data['entry_price'],
-                        exit_price=trade_data['exit_price'],
-                        opened_at=trade_data['opened_at'],
-                        closed_at=trade_data['closed_at'],
-                        duration_seconds=trade_data['duration_seconds'],
-                        is_mock=False
-                    )
-                    trades_created += 1
-                    
-            except Exception as e:
-                errors.append(f"Error saving trade {contract_id}: {str(e)}")
-                continue
+        try:
+            result = upsert_deriv_trades(user, trades)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'trades_fetched': len(trades),
+                'trades_created': 0,
+                'trades_updated': 0,
+                'errors': [f"Error saving trades: {str(e)}"]
+            }
         
         return {
             'success': True,
             'trades_fetched': len(trades),
-            'trades_created': trades_created,
-            'trades_updated': trades_updated,
-            'errors': errors
+            **result
         }
     
     @staticmethod
@@ -448,10 +540,11 @@ class DerivClient:
         """Run an async coroutine safely from sync Django context.
         Uses a dedicated thread with its own event loop to avoid
         conflicts with Django Channels' running loop."""
-        import concurrent.futures, threading
+        import concurrent.futures, contextvars, threading
 
         result = [None]
         exception = [None]
+        context = contextvars.copy_context()
 
         def _thread_target():
             loop = asyncio.new_event_loop()
@@ -463,7 +556,7 @@ class DerivClient:
             finally:
                 loop.close()
 
-        t = threading.Thread(target=_thread_target)
+        t = threading.Thread(target=context.run, args=(_thread_target,))
         t.start()
         t.join(timeout=30)
         if t.is_alive():
@@ -720,41 +813,53 @@ class DerivClient:
         self,
         callback: callable,
         api_token: Optional[str] = None,
+        actions: Optional[set] = None,
     ):
         """
         Subscribe to real-time transaction updates.
+
+        Returns when the connection closes. Other requests can be sent on
+        the same client while subscribed.
         
         Args:
             api_token: User's Deriv API token (optional if DERIV_TOKEN is set)
             callback: Function to call when new transaction arrives
+            actions: Only pass transactions with these actions (e.g. {"sell"})
         """
         if not self.websocket:
             await self.connect()
         
-        # Authorize
-        await self.authorize(api_token)
+        # Authorize once per socket and token
+        if self._authorized_token != self._resolve_api_token(api_token):
+            await self.authorize(api_token)
         
-        # Subscribe to transactions
+        # Subscribe to transactions; updates arrive through the dispatcher
         request = {
             "transaction": 1,
             "subscribe": 1
         }
-        
+
+        self._stream = asyncio.Queue()
         response = await self.send_request(request)
         
         # Listen for updates
         try:
             while True:
-                message = await self.websocket.recv()
-                data = json.loads(message)
+                data = await self._stream.get()
+                if data is None:
+                    logger.info("Deriv WebSocket subscription connection closed")
+                    break
                 
                 if 'transaction' in data:
                     transaction = data['transaction']
+                    if actions is not None and transaction.get('action') not in actions:
+                        continue
+                    if transaction.get('action') == 'sell' and 'sell_time' not in transaction:
+                        transaction = {**transaction, 'sell_time': transaction.get('transaction_time')}
                     parsed_trade = self._parse_transaction(transaction)
                     await callback(parsed_trade)
-                    
-        except websockets.exceptions.ConnectionClosed:
-            logger.info("Deriv WebSocket subscription connection closed")
+        finally:
+            self._stream = None
 
 
 # Singleton instance
@@ -5,6 +5,8 @@ from datetime import timedelta
 from typing import List, Dict, Any
 from decimal import Decimal
 
+from .pattern_engine import scan_patterns
+
 
 def detect_revenge_trading(trades: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
@@ -107,7 +109,12 @@ def detect_overtrading(trades: List[Dict[str, Any]], avg_daily_trades: int = 8)
             'average': int
         }
     """
-    if not trades:
+    return overtrading_from_count(len(trades) if trades else 0, avg_daily_trades)
+
+
+def overtrading_from_count(today_count: int, avg_daily_trades: int = 8) -> Dict[str, Any]:
+    """detect_overtrading for callers that only keep a running trade count."""
+    if not today_count:
         return {
             'detected': False,
             'severity': 'none',
@@ -116,7 +123,6 @@ def detect_overtrading(trades: List[Dict[str, Any]], avg_daily_trades: int = 8)
             'average': avg_daily_trades
         }
     
-    today_count = len(trades)
     threshold = avg_daily_trades * 2
     
     if today_count <= threshold:
@@ -385,18 +391,22 @@ def analyze_all_patterns(
             'data_source': str
         }
     """
-    revenge = detect_revenge_trading(trades)
-    overtrading = detect_overtrading(trades, user_avg_daily_trades)
-    loss_chasing = detect_loss_chasing(trades)
-    time_patterns = detect_time_based_patterns(trades)
+    # Revenge, loss chasing and hour-of-day stats share one sorted columnar
+    # pass (pattern_engine); overtrading only needs the count.
+    scanned = scan_patterns(trades)
 
     patterns = {
-        'revenge_trading': revenge,
-        'overtrading': overtrading,
-        'loss_chasing': loss_chasing,
-        'time_patterns': time_patterns
+        'revenge_trading': scanned['revenge_trading'],
+        'overtrading': detect_overtrading(trades, user_avg_daily_trades),
+        'loss_chasing': scanned['loss_chasing'],
+        'time_patterns': scanned['time_patterns']
     }
 
+    return combine_patterns(patterns, data_source)
+
+
+def combine_patterns(patterns: Dict[str, Dict[str, Any]], data_source: str = "demo") -> Dict[str, Any]:
+    """Add has_any_pattern / highest_severity / data_source to the four pattern dicts."""
     # Check if any pattern detected
     has_any = any(p['detected'] for p in patterns.values())
 
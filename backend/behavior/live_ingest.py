@@ -0,0 +1,372 @@
+"""
+Live trade ingest from Deriv ``transaction`` streams.
+
+Trades used to appear only after a sync, so nudges lagged real trading by
+minutes or hours. The ingest service holds a ``transaction`` subscription
+(``DerivClient.subscribe_to_transactions``) for each linked account, most
+recently active first, up to ``TRADE_INGEST_MAX_ACCOUNTS``:
+
+- a ``sell`` on the stream marks the account dirty. After
+  ``BATCH_WINDOW_SECONDS`` (so a burst of sells costs one request) the
+  closed contracts are fetched from ``profit_table`` on the same socket,
+  resuming from the account's last fetched sell_time. The stream itself
+  carries no buy price or shortcode; profit_table rows are complete and
+  are parsed by ``_parse_transaction`` like any sync;
+- a writer thread drains fetched batches every ``FLUSH_INTERVAL_SECONDS``
+  and upserts them with the sync path (trade_sync.store_fetched_trades),
+  which advances the account's watermark and folds the new trades into
+  the cached behavioral state. Each user with new trades then gets one
+  nudge check and one narration for their newest trade;
+- a dropped socket is reconnected with exponential backoff and the
+  subscription renewed; the first fetch after (re)subscribing catches up
+  on anything sold in between. The account list is reloaded every
+  ``ACCOUNT_REFRESH_SECONDS``.
+
+Startup: ``RUN_TRADE_INGEST=true`` or ``python manage.py run_trade_ingest``
+Settings: ``TRADE_INGEST_MAX_ACCOUNTS`` (default 200)
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db.models import Max
+from django.utils import timezone
+
+from tradeiq.rate_limit import PRIORITY_BACKGROUND, request_priority
+
+from .deriv_client import DerivClient
+from .models import TradeSyncWatermark, UserProfile
+from .recompute import flush_recomputes
+from .trade_sync import _sync_position, store_fetched_trades
+
+logger = logging.getLogger("tradeiq.trade_ingest")
+
+BATCH_WINDOW_SECONDS = 1.0
+FLUSH_INTERVAL_SECONDS = 0.5
+ACCOUNT_REFRESH_SECONDS = 60
+RECONNECT_MIN_SECONDS = 1.0
+RECONNECT_MAX_SECONDS = 60.0
+DEFAULT_MAX_ACCOUNTS = 200
+
+
+@dataclass
+class IngestAccount:
+    """A subscribed account and where its next profit_table fetch starts."""
+    user_id: str
+    account_id: str  # DerivAccount.deriv_login_id
+    token: str
+    resume_from: int  # epoch seconds (sell_time)
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return (self.user_id, self.account_id, self.token)
+
+
+@dataclass
+class IngestBatch:
+    account: IngestAccount
+    date_from: int
+    trades: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def load_ingest_accounts(now: Optional[float] = None, limit: Optional[int] = None) -> List[IngestAccount]:
+    """Active linked accounts, most recently active first (at most *limit*)."""
+    from deriv_auth.models import DerivAccount
+    from .sync_scheduler import _epoch
+
+    now = time.time() if now is None else now
+    accounts = sorted(
+        DerivAccount.objects.filter(is_active=True).annotate(last_trade_at=Max("user__trades__opened_at")),
+        key=lambda a: max(_epoch(a.last_trade_at), _epoch(a.updated_at)),
+        reverse=True,
+    )
+    marks = {
+        (str(m.user_id), m.account_id): m
+        for m in TradeSyncWatermark.objects.filter(user_id__in={a.user_id for a in accounts})
+    }
+
+    loaded = []
+    for account in accounts:
+        if limit and len(loaded) >= limit:
+            break
+        try:
+            token = account.token
+        except Exception as exc:
+            logger.warning("Skipping Deriv account %s: token unavailable (%s)", account.deriv_login_id, exc)
+            continue
+        mark = marks.get((str(account.user_id), account.deriv_login_id))
+        # Never-synced accounts start live; their history is the scheduled sync's job
+        resume_from = mark.last_sell_time if mark is not None and mark.last_sell_time else int(now)
+        loaded.append(IngestAccount(str(account.user_id), account.deriv_login_id, token, resume_from))
+    return loaded
+
+
+def store_batch(batch: IngestBatch) -> Dict[str, Any]:
+    """Upsert one account's fetched trades (rows at or below its watermark are skipped)."""
+    account = batch.account
+    user = UserProfile.objects.get(id=account.user_id)
+    mark = TradeSyncWatermark.objects.filter(user=user, account_id=account.account_id).first()
+    window_from = mark.synced_from if mark is not None else batch.date_from
+    return store_fetched_trades(user, account.account_id, window_from, batch.date_from, batch.trades)
+
+
+def notify_new_trade(user_id: str, trade: Dict[str, Any]) -> None:
+    """Send a nudge if the day's patterns call for one, then narrate *trade*."""
+    from .narrator import narrate_trade_event
+    from .state import get_behavior_state
+    from .tools import generate_behavioral_nudge_with_ai
+    from .websocket_utils import send_behavioral_nudge
+
+    try:
+        trading_date = (trade.get("opened_at") or timezone.now()).date()
+        analysis = get_behavior_state(user_id, trading_date).analysis()
+        if analysis["needs_nudge"]:
+            send_behavioral_nudge(user_id, generate_behavioral_nudge_with_ai(user_id, analysis))
+    except Exception as exc:
+        logger.warning("Error in behavioral analysis: %s", exc)
+
+    try:
+        narrate_trade_event(
+            user_id=user_id,
+            trade_data={
+                "instrument": trade.get("instrument"),
+                "direction": trade.get("direction"),
+                "entry_price": str(trade["entry_price"]) if trade.get("entry_price") else None,
+                "pnl": str(trade["pnl"]) if trade.get("pnl") else None,
+            },
+            event_type="new_trade",
+        )
+    except Exception as exc:
+        logger.debug("Narrator event failed (non-blocking): %s", exc)
+
+
+class TradeIngestService:
+    """
+    Transaction subscriptions on an event-loop thread, writes on a writer thread.
+
+    ``start()`` runs both; ``stream_account`` and ``flush`` can also be
+    driven directly (tests, one-off scripts).
+    """
+
+    def __init__(
+        self,
+        max_accounts: Optional[int] = None,
+        batch_window: float = BATCH_WINDOW_SECONDS,
+        reconnect_delay: float = RECONNECT_MIN_SECONDS,
+        notify: bool = True,
+        app_id: Optional[str] = None,
+        ws_url: Optional[str] = None,
+    ):
+        if max_accounts is None:
+            max_accounts = int(os.environ.get("TRADE_INGEST_MAX_ACCOUNTS", DEFAULT_MAX_ACCOUNTS))
+        self.max_accounts = max_accounts
+        self.batch_window = batch_window
+        self.reconnect_delay = reconnect_delay
+        self.notify = notify
+        self.app_id = app_id
+        self.ws_url = ws_url
+        self.stats = {"subscriptions": 0, "batches": 0, "trades_created": 0, "failed_batches": 0}
+
+        self._batches: "queue.Queue[IngestBatch]" = queue.Queue()
+        self._streams: Dict[Tuple[str, str, str], asyncio.Task] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_ready = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    @property
+    def watched(self) -> int:
+        return len(self._streams)
+
+    def start(self):
+        if self.running:
+            logger.warning("Trade ingest already running")
+            return
+        self._stop.clear()
+        self._loop_ready.clear()
+        self._threads = [
+            threading.Thread(target=self._run_loop, daemon=True, name="trade-ingest-streams"),
+            threading.Thread(target=self._write_loop, daemon=True, name="trade-ingest-writer"),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info("Trade ingest started (up to %d accounts)", self.max_accounts)
+
+    def stop(self):
+        self._stop.set()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        for thread in self._threads:
+            thread.join(timeout=15)
+        flush_recomputes()
+        logger.info("Trade ingest stopped")
+
+    # ── Streams (event-loop thread) ─────────────────────────────────
+
+    def _run_loop(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._loop_ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            tasks = list(self._streams.values())
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._streams.clear()
+            loop.close()
+            self._loop = None
+
+    def watch(self, accounts: List[IngestAccount]) -> None:
+        """Subscribe *accounts* and drop streams for accounts no longer listed (thread-safe)."""
+        if not self._loop_ready.wait(timeout=10) or self._loop is None:
+            raise RuntimeError("Trade ingest event loop is not running")
+        asyncio.run_coroutine_threadsafe(self._reconcile(accounts), self._loop).result(timeout=10)
+
+    async def _reconcile(self, accounts: List[IngestAccount]) -> None:
+        wanted = {account.key: account for account in accounts}
+        for key, task in list(self._streams.items()):
+            if key not in wanted or task.done():
+                task.cancel()
+                del self._streams[key]
+        for key, account in wanted.items():
+            if key not in self._streams:
+                self._streams[key] = asyncio.ensure_future(self.stream_account(account))
+
+    async def stream_account(self, account: IngestAccount) -> None:
+        """Hold *account*'s transaction subscription until cancelled, fetching on sells."""
+        with request_priority(PRIORITY_BACKGROUND):
+            backoff = self.reconnect_delay
+            while True:
+                client = DerivClient(self.app_id)
+                if self.ws_url:
+                    client.ws_url = self.ws_url
+                sold = asyncio.Event()
+                sold.set()  # catch up on anything sold while unsubscribed
+
+                async def _on_sell(trade):
+                    sold.set()
+
+                subscription = None
+                try:
+                    await client.connect()
+                    await client.authorize(account.token)
+                    subscription = asyncio.ensure_future(
+                        client.subscribe_to_transactions(_on_sell, account.token, actions={"sell"})
+                    )
+                    self.stats["subscriptions"] += 1
+                    backoff = self.reconnect_delay
+                    while not subscription.done():
+                        waiter = asyncio.ensure_future(sold.wait())
+                        await asyncio.wait({waiter, subscription}, return_when=asyncio.FIRST_COMPLETED)
+                        waiter.cancel()
+                        if not sold.is_set():
+                            break
+                        await asyncio.sleep(self.batch_window)  # let a burst of sells collect
+                        sold.clear()
+                        await self._fetch_new(client, account)
+                    if subscription.done():
+                        subscription.result()
+                    logger.info("Trade stream for %s closed; resubscribing", account.account_id)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    logger.warning("Trade stream for %s dropped: %s", account.account_id, exc)
+                finally:
+                    if subscription is not None:
+                        subscription.cancel()
+                    await client.disconnect()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, RECONNECT_MAX_SECONDS)
+
+    async def _fetch_new(self, client: DerivClient, account: IngestAccount) -> None:
+        date_from = account.resume_from
+        trades = await client.fetch_all_trades(api_token=account.token, date_from=date_from)
+        if not trades:
+            return
+        account.resume_from = max(date_from, max(_sync_position(td)[0] for td in trades))
+        self._batches.put(IngestBatch(account, date_from, trades))
+
+    # ── Writes (writer thread) ──────────────────────────────────────
+
+    def _write_loop(self):
+        from django.db import close_old_connections
+
+        next_refresh = 0.0
+        while not self._stop.is_set():
+            try:
+                if time.monotonic() >= next_refresh:
+                    next_refresh = time.monotonic() + ACCOUNT_REFRESH_SECONDS
+                    self.watch(load_ingest_accounts(limit=self.max_accounts))
+                self.flush(timeout=FLUSH_INTERVAL_SECONDS)
+            except Exception as exc:
+                logger.error("Trade ingest write cycle failed: %s", exc, exc_info=True)
+                self._stop.wait(FLUSH_INTERVAL_SECONDS)
+            finally:
+                close_old_connections()
+
+    def flush(self, timeout: float = 0) -> int:
+        """
+        Store every batch fetched so far (waiting up to *timeout* for the
+        first). Returns the number of trades created.
+        """
+        try:
+            batches = [self._batches.get(timeout=timeout) if timeout > 0 else self._batches.get_nowait()]
+        except queue.Empty:
+            return 0
+        while True:
+            try:
+                batches.append(self._batches.get_nowait())
+            except queue.Empty:
+                break
+
+        created = 0
+        newest: Dict[str, Dict[str, Any]] = {}
+        for batch in batches:
+            try:
+                result = store_batch(batch)
+            except Exception as exc:
+                self.stats["failed_batches"] += 1
+                logger.error("Storing live trades for %s failed: %s", batch.account.account_id, exc, exc_info=True)
+                continue
+            self.stats["batches"] += 1
+            if result["trades_created"]:
+                created += result["trades_created"]
+                user_id = batch.account.user_id
+                latest = max(batch.trades, key=_sync_position)
+                if user_id not in newest or _sync_position(latest) > _sync_position(newest[user_id]):
+                    newest[user_id] = latest
+        self.stats["trades_created"] += created
+
+        if self.notify:
+            for user_id, trade in newest.items():
+                notify_new_trade(user_id, trade)
+        return created
+
+
+_service_instance: Optional[TradeIngestService] = None
+
+
+def get_trade_ingest_service() -> TradeIngestService:
+    global _service_instance
+    if _service_instance is None:
+        _service_instance = TradeIngestService()
+    return _service_instance
+
+
+def start_trade_ingest() -> TradeIngestService:
+    service = get_trade_ingest_service()
+    service.start()
+    return service
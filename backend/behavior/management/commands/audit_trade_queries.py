@@ -0,0 +1,165 @@
+# behavior/management/commands/audit_trade_queries.py
+# EXPLAIN the hot queries on the trades table and fail on sequential scans
+
+import random
+import re
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from behavior.models import Trade, UserProfile
+
+SQLITE_FULL_SCAN = re.compile(r'^SCAN "?trades"?(?: AS \w+)?$')
+
+
+class Rollback(Exception):
+    """Raised to discard the seeded rows."""
+
+
+def hot_paths(user_id, day):
+    """
+    (label, callable) for each hot path that reads ``trades``.
+
+    Real entry points are called where they have no side effects beyond
+    the cache; request handlers are represented by their querysets.
+    """
+    from agents.tools_registry import TOOL_FUNCTIONS
+    from behavior.alerts import check_all_alerts
+    from behavior.recompute import refresh_daily_counts
+    from behavior.state import rebuild_state
+    from behavior.tools import get_recent_trades, get_trading_statistics, invalidate_trading_statistics
+    from demo.health import _check_demo_data
+
+    def statistics(stats):
+        invalidate_trading_statistics(user_id)
+        return stats(user_id, days=30)
+
+    def twin():
+        # behavior.trading_twin.generate_trading_twin
+        base_qs = Trade.objects.filter(user_id=user_id, opened_at__gte=timezone.now() - timedelta(days=30))
+        base_qs.filter(is_mock=False).count()
+        list(base_qs.filter(is_mock=False).order_by("opened_at").values("id", "pnl", "opened_at"))
+
+    return [
+        ("behavior.tools.get_recent_trades", lambda: get_recent_trades(user_id, hours=24)),
+        ("behavior.tools.get_trading_statistics", lambda: statistics(get_trading_statistics)),
+        ("behavior.state.rebuild_state", lambda: rebuild_state(user_id, day)),
+        ("behavior.recompute.refresh_daily_counts", lambda: refresh_daily_counts(user_id, day)),
+        ("behavior.alerts.check_all_alerts", lambda: check_all_alerts(user_id)),
+        ("behavior.views.TradeViewSet list", lambda: (
+            Trade.objects.filter(user_id=user_id).count(),
+            list(Trade.objects.filter(user_id=user_id).order_by("-opened_at", "-created_at")[:20]),
+        )),
+        ("behavior.views data source counts", lambda: (
+            Trade.objects.filter(user_id=user_id, is_mock=False).count(),
+            Trade.objects.filter(user_id=user_id, is_mock=True).count(),
+        )),
+        ("behavior.trading_twin.generate_trading_twin", twin),
+        ("agents tool analyze_trade_patterns", lambda: TOOL_FUNCTIONS["analyze_trade_patterns"](user_id, hours=24)),
+        ("agents tool get_trading_statistics", lambda: statistics(TOOL_FUNCTIONS["get_trading_statistics"])),
+        ("demo.views latest trade", lambda: Trade.objects.filter(user_id=user_id).order_by("-opened_at", "-created_at").first()),
+        ("demo.health trade count", _check_demo_data),
+    ]
+
+
+def explain(sql):
+    """Plan lines for *sql* and the lines that scan the whole trades table."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('EXPLAIN ' + sql)
+            lines = [row[0] for row in cursor.fetchall()]
+            return lines, [line for line in lines if 'Seq Scan on trades' in line]
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            lines = [row[-1] for row in cursor.fetchall()]
+            return lines, [line for line in lines if SQLITE_FULL_SCAN.match(line.strip())]
+    raise CommandError(f"EXPLAIN parsing is not implemented for {connection.vendor}")
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot trades queries of behavior, agents and demo on a seeded table; fail on sequential scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trades', type=int, default=1_000_000, help='Synthetic trades to seed (0 audits the data as is)')
+        parser.add_argument('--users', type=int, default=1000, help='Users the seeded trades are spread over')
+        parser.add_argument('--user', help='Audit this user id instead of a seeded one')
+        parser.add_argument('--keep', action='store_true', help='Commit the seeded rows instead of rolling back')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan line')
+
+    def handle(self, *args, **options):
+        if options['trades'] < 0 or options['users'] < 1:
+            raise CommandError('--trades must be >= 0 and --users positive')
+        try:
+            with transaction.atomic():
+                failures = self._audit(options)
+                if not options['keep']:
+                    raise Rollback()
+        except Rollback:
+            pass
+        if failures:
+            raise CommandError(f"{len(failures)} hot queries scan the trades table: {', '.join(sorted(failures))}")
+        self.stdout.write(self.style.SUCCESS('No sequential scans on trades'))
+
+    def _audit(self, options):
+        user_id = options['user']
+        if options['trades']:
+            user_id = user_id or self._seed(options['trades'], options['users'])
+        if not user_id:
+            user = UserProfile.objects.order_by('-created_at').first()
+            if user is None:
+                raise CommandError('No users to audit; seed some with --trades')
+            user_id = str(user.id)
+
+        failures = set()
+        day = timezone.now().date()
+        for label, run in hot_paths(user_id, day):
+            with CaptureQueriesContext(connection) as captured:
+                run()
+            statements = [
+                q['sql'] for q in captured.captured_queries
+                if q['sql'].lstrip().upper().startswith('SELECT') and '"trades"' in q['sql']
+            ]
+            self.stdout.write(f"{label}: {len(statements)} trades queries")
+            for sql in statements:
+                lines, scans = explain(sql)
+                if scans:
+                    failures.add(label)
+                    self.stdout.write(self.style.ERROR(f"  SEQ SCAN  {sql[:160]}"))
+                if scans or options['verbose_plans']:
+                    for line in lines:
+                        self.stdout.write(f"    {line}")
+        return failures
+
+    def _seed(self, count, users):
+        """Bulk-insert *count* trades over *users* users (no signals); returns one user's id."""
+        rng = random.Random(0)
+        began = time.perf_counter()
+        profiles = UserProfile.objects.bulk_create([
+            UserProfile(id=uuid.uuid4(), email=f"audit-{i}@tradeiq.invalid", name=f"Audit {i}")
+            for i in range(users)
+        ])
+        now = timezone.now()
+        batch = []
+        for i in range(count):
+            batch.append(Trade(
+                user=profiles[i % users],
+                instrument=rng.choice(['R_100', 'R_50', 'EUR/USD', 'BTC/USD']),
+                direction=rng.choice(['LONG', 'SHORT']),
+                pnl=Decimal(rng.randint(-5000, 5000)) / 100,
+                opened_at=now - timedelta(seconds=rng.randint(0, 90 * 86400)),
+                is_mock=rng.random() < 0.5,
+            ))
+            if len(batch) == 10_000:
+                Trade.objects.bulk_create(batch)
+                batch = []
+        Trade.objects.bulk_create(batch)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.stdout.write(f"Seeded {count:,} trades over {users:,} users in {time.perf_counter() - began:.1f}s")
+        return str(profiles[0].id)
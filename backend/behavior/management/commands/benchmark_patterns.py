@@ -0,0 +1,80 @@
+# behavior/management/commands/benchmark_patterns.py
+# Compare the per-detector pattern functions with the single-pass engine
+
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from behavior.detection import (
+    detect_loss_chasing,
+    detect_revenge_trading,
+    detect_time_based_patterns,
+)
+from behavior.pattern_engine import scan_patterns
+
+
+def synthetic_history(count, seed=0, calm=False):
+    """
+    Trades spaced like an active retail account: bursts and quiet spells.
+
+    A calm history spaces trades more than 5 minutes apart, so no loss ever
+    triggers revenge trading and every loss has to be checked.
+    """
+    rng = random.Random(seed)
+    opened_at = datetime(2025, 1, 6, tzinfo=timezone.utc)
+    trades = []
+    for _ in range(count):
+        if calm:
+            opened_at += timedelta(seconds=301 + 600 * rng.random())
+        else:
+            opened_at += timedelta(seconds=rng.choice([20, 45, 90, 400, 1800, 7200]) * rng.random())
+        trades.append({
+            'opened_at': opened_at,
+            'pnl': round(rng.gauss(-2, 40), 2),
+            'instrument': 'EUR/USD',
+        })
+    return trades
+
+
+class Command(BaseCommand):
+    help = 'Benchmark behavioral pattern detection on synthetic trade histories'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trades', type=int, default=100_000, help='Trades per history')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per implementation')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['trades'] < 1 or options['repeat'] < 1:
+            raise CommandError('--trades and --repeat must be positive')
+        for calm in (False, True):
+            trades = synthetic_history(options['trades'], options['seed'], calm=calm)
+            self.stdout.write(f"{'Calm' if calm else 'Bursty'} history, {len(trades):,} trades:")
+            self._compare(trades, options['repeat'])
+
+    def _compare(self, trades, repeat):
+        def legacy():
+            return {
+                'revenge_trading': detect_revenge_trading(trades),
+                'loss_chasing': detect_loss_chasing(trades),
+                'time_patterns': detect_time_based_patterns(trades),
+            }
+
+        timings = {}
+        results = {}
+        for name, run in (('per-detector', legacy), ('single-pass', lambda: scan_patterns(trades))):
+            best = float('inf')
+            for _ in range(repeat):
+                began = time.perf_counter()
+                results[name] = run()
+                best = min(best, time.perf_counter() - began)
+            timings[name] = best
+            self.stdout.write(f"  {name:<13} {best * 1000:9.1f} ms  ({len(trades) / best:,.0f} trades/s)")
+
+        if results['per-detector'] != results['single-pass']:
+            raise CommandError('Single-pass engine disagrees with the per-detector functions')
+        self.stdout.write(self.style.SUCCESS(
+            f"  Results identical; single-pass is {timings['per-detector'] / timings['single-pass']:.1f}x faster"
+        ))
@@ -0,0 +1,152 @@
+# behavior/management/commands/benchmark_trade_sync.py
+# Compare one-socket-per-account trade sync with the pooled fleet fetch,
+# both against a local fake Deriv WebSocket server
+
+import asyncio
+import json
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from behavior.deriv_client import DerivClient
+from behavior.sync_scheduler import SyncJob, fetch_jobs
+from tradeiq.rate_limit import reset_rate_limits
+
+
+class FakeDerivServer:
+    """
+    Minimal Deriv API: ``authorize`` and ``profit_table`` for synthetic accounts.
+
+    Every response (and the opening handshake) is delayed by *latency*
+    seconds, standing in for the round-trip to Deriv; requests on one
+    socket are answered concurrently, as Deriv does.
+    """
+
+    def __init__(self, trades_per_account, latency):
+        self.trades_per_account = trades_per_account
+        self.latency = latency
+        self.start = int(time.time())
+        self.connections = 0
+        self.requests = 0
+        self._server = None
+
+    def rows(self, token):
+        seed = int(token.rsplit('-', 1)[-1])
+        return [{
+            'contract_id': seed * 1_000_000 + i,
+            'transaction_id': seed * 1_000_000 + i,
+            'shortcode': f"{'CALL' if i % 2 else 'PUT'}_R_100_10_1_2_S0P_0",
+            'buy_price': 10,
+            'sell_price': 9 + (i % 3),
+            'purchase_time': self.start - 120 * i - 60,
+            'sell_time': self.start - 120 * i,
+        } for i in range(self.trades_per_account)]
+
+    async def _answer(self, websocket, state, request):
+        await asyncio.sleep(self.latency)
+        reply = {'echo_req': request, 'req_id': request.get('req_id')}
+        if 'authorize' in request:
+            state['token'] = request['authorize']
+            reply['authorize'] = {'loginid': f"CR{state['token'].rsplit('-', 1)[-1]}", 'currency': 'USD'}
+        elif 'profit_table' in request:
+            rows = [r for r in self.rows(state['token']) if r['sell_time'] >= request.get('date_from', 0)]
+            offset, limit = request.get('offset', 0), request.get('limit', 50)
+            reply['profit_table'] = {'count': len(rows[offset:offset + limit]), 'transactions': rows[offset:offset + limit]}
+        else:
+            reply['error'] = {'code': 'UnrecognisedRequest', 'message': 'Unrecognised request'}
+        await websocket.send(json.dumps(reply))
+
+    async def _handler(self, websocket, path=None):
+        self.connections += 1
+        state = {'token': None}
+        tasks = set()
+        async for message in websocket:
+            self.requests += 1
+            task = asyncio.ensure_future(self._answer(websocket, state, json.loads(message)))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    async def _handshake(self, path, headers):
+        await asyncio.sleep(self.latency)
+        return None
+
+    async def __aenter__(self):
+        import websockets
+
+        self._server = await websockets.serve(self._handler, '127.0.0.1', 0, process_request=self._handshake)
+        port = self._server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the scheduled fleet trade sync against a fake Deriv server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accounts', type=int, default=200)
+        parser.add_argument('--trades', type=int, default=1200, help='Trades per account')
+        parser.add_argument('--latency-ms', type=float, default=40.0, help='Simulated Deriv round-trip')
+        parser.add_argument('--connections', type=int, default=8, help='Sockets for the pooled fetch')
+
+    def handle(self, *args, **options):
+        if options['accounts'] < 1 or options['trades'] < 0 or options['connections'] < 1:
+            raise CommandError('--accounts and --connections must be positive')
+        logging.getLogger('websockets').setLevel(logging.WARNING)
+        asyncio.run(self._run(options))
+
+    async def _run(self, options):
+        jobs = [
+            SyncJob(user_id=str(i), account_id=f"CR{i}", token=f"bench-token-{i}", window_from=0, date_from=0)
+            for i in range(options['accounts'])
+        ]
+        async with FakeDerivServer(options['trades'], options['latency_ms'] / 1000) as server:
+            self.stdout.write(
+                f"{len(jobs)} accounts x {options['trades']} trades, "
+                f"{options['latency_ms']:.0f} ms simulated round-trip:"
+            )
+
+            reset_rate_limits()
+            began = time.perf_counter()
+            sequential = {}
+            for job in jobs:
+                client = DerivClient('1')
+                client.ws_url = server.url
+                try:
+                    await client.connect()
+                    await client.authorize(job.token)
+                    sequential[job.account_id] = len(await client.fetch_all_trades(job.token, date_from=job.date_from))
+                finally:
+                    await client.disconnect()
+            baseline = time.perf_counter() - began
+            self.stdout.write(f"  socket per account  {baseline:8.2f} s  ({server.connections} connections)")
+
+            reset_rate_limits()
+            server.connections = 0
+            pooled = {}
+            failures = []
+
+            def collect(result):
+                if result.error:
+                    failures.append(result.error)
+                pooled[result.account_id] = len(result.trades)
+
+            began = time.perf_counter()
+            stats = await fetch_jobs(jobs, collect, connections=options['connections'], app_id='1', ws_url=server.url)
+            elapsed = time.perf_counter() - began
+            self.stdout.write(
+                f"  pooled fleet fetch  {elapsed:8.2f} s  ({stats['connections']} connections, "
+                f"{stats['authorizations']} authorizations)"
+            )
+
+        if failures:
+            raise CommandError(f"{len(failures)} accounts failed, e.g. {failures[0]}")
+        if pooled != sequential:
+            raise CommandError('Pooled fetch returned different trades than the per-account fetch')
+        self.stdout.write(self.style.SUCCESS(
+            f"  Same {sum(pooled.values()):,} trades; pooled fetch is {baseline / elapsed:.1f}x faster"
+        ))
@@ -0,0 +1,32 @@
+"""Stream linked Deriv accounts' trades live: python manage.py run_trade_ingest"""
+from django.core.management.base import BaseCommand
+from behavior.live_ingest import BATCH_WINDOW_SECONDS, TradeIngestService
+
+
+class Command(BaseCommand):
+    help = "Ingest trades from Deriv transaction subscriptions and feed nudges and the narrator"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-accounts", type=int, default=None, help="Accounts to subscribe (default TRADE_INGEST_MAX_ACCOUNTS or 200)")
+        parser.add_argument("--batch-window", type=float, default=BATCH_WINDOW_SECONDS, help="Seconds to coalesce sells before fetching")
+        parser.add_argument("--no-notify", action="store_true", help="Store trades without nudges or narration")
+
+    def handle(self, *args, **options):
+        self.stdout.write("Starting trade ingest...")
+        service = TradeIngestService(
+            max_accounts=options["max_accounts"],
+            batch_window=options["batch_window"],
+            notify=not options["no_notify"],
+        )
+        service.start()
+        self.stdout.write(self.style.SUCCESS("Trade ingest running. Press Ctrl+C to stop."))
+        try:
+            import time
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            service.stop()
+            self.stdout.write(
+                f"Trade ingest stopped ({service.stats['trades_created']} trades in "
+                f"{service.stats['batches']} batches)."
+            )
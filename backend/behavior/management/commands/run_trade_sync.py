@@ -0,0 +1,37 @@
+"""Keep linked Deriv accounts' trades synced: python manage.py run_trade_sync"""
+from django.core.management.base import BaseCommand
+from behavior.recompute import flush_recomputes
+from behavior.sync_scheduler import CHECK_INTERVAL_SECONDS, TradeSyncWorker, run_sync_cycle
+
+
+class Command(BaseCommand):
+    help = "Sync trades for every linked Deriv account on a schedule (recently active users first)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run a single cycle and exit")
+        parser.add_argument("--connections", type=int, default=None, help="Deriv sockets to use (default TRADE_SYNC_CONNECTIONS or 8)")
+        parser.add_argument("--limit", type=int, default=None, help="Sync at most this many accounts per cycle")
+        parser.add_argument("--interval", type=float, default=CHECK_INTERVAL_SECONDS, help="Seconds between cycles")
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            summary = run_sync_cycle(connections=options["connections"], limit=options["limit"])
+            flush_recomputes()
+            self.stdout.write(self.style.SUCCESS(
+                f"Synced {summary['synced']}/{summary['accounts']} accounts "
+                f"({summary['trades_created']} new, {summary['trades_updated']} updated trades, "
+                f"{summary['failed']} failed) over {summary['connections']} connections."
+            ))
+            return
+
+        self.stdout.write("Starting trade sync worker...")
+        worker = TradeSyncWorker(interval=options["interval"], connections=options["connections"])
+        worker.start()
+        self.stdout.write(self.style.SUCCESS("Trade sync worker running. Press Ctrl+C to stop."))
+        try:
+            import time
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            worker.stop()
+            self.stdout.write("Trade sync worker stopped.")
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("behavior", "0003_alter_userprofile_email"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trade",
+            name="contract_id",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name="trade",
+            constraint=models.UniqueConstraint(fields=("user", "contract_id"), name="trades_user_contract_uniq"),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:29
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("behavior", "0004_trade_contract_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TradeSyncWatermark",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("account_id", models.CharField(max_length=64)),
+                ("last_sell_time", models.BigIntegerField(blank=True, null=True)),
+                ("last_transaction_id", models.BigIntegerField(blank=True, null=True)),
+                ("synced_from", models.BigIntegerField()),
+                ("last_synced_at", models.DateTimeField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("user", models.ForeignKey(db_column="user_id", on_delete=django.db.models.deletion.CASCADE, related_name="trade_sync_watermarks", to="behavior.userprofile")),
+            ],
+            options={
+                "db_table": "trade_sync_watermarks",
+                "constraints": [models.UniqueConstraint(fields=("user", "account_id"), name="trade_sync_watermark_account_uniq")],
+            },
+        ),
+    ]
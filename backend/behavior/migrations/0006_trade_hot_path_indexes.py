@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("behavior", "0005_trade_sync_watermark"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="trade",
+            index=models.Index(fields=["user", "opened_at", "created_at"], name="trades_user_opened_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="trade",
+            index=models.Index(fields=["user", "is_mock", "opened_at"], name="trades_user_mock_opened_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="trade",
+            index=models.Index(fields=["opened_at", "created_at"], name="trades_opened_created_idx"),
+        ),
+    ]
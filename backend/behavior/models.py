@@ -1,5 +1,7 @@
 # Design Document Section 7 - users, trades, behavioral_metrics
+from datetime import date, datetime, time, timedelta
 from django.db import models
+from django.utils import timezone
 import uuid
 
 
@@ -19,6 +21,31 @@ class UserProfile(models.Model):
         return self.email
 
 
+def day_start(day: date) -> datetime:
+    """Midnight of *day* in the current time zone (the boundary ``__date`` lookups use)."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class TradeQuerySet(models.QuerySet):
+    """
+    Calendar-day filters as ``opened_at`` ranges.
+
+    ``opened_at__date=...`` wraps the column in a date cast that no index
+    can serve; a half-open range on the raw column uses the (user,
+    opened_at) indexes below.
+    """
+
+    def opened_between(self, first_day: date, end_day: date):
+        """Trades opened on first_day up to, not including, end_day."""
+        return self.filter(opened_at__gte=day_start(first_day), opened_at__lt=day_start(end_day))
+
+    def opened_on(self, day: date):
+        return self.opened_between(day, day + timedelta(days=1))
+
+    def opened_since(self, day: date):
+        return self.filter(opened_at__gte=day_start(day))
+
+
 class Trade(models.Model):
     """User trade (instrument, pnl, duration, is_mock)."""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -34,11 +61,25 @@ class Trade(models.Model):
     opened_at = models.DateTimeField(null=True, blank=True)
     closed_at = models.DateTimeField(null=True, blank=True)
     is_mock = models.BooleanField(default=False)
+    contract_id = models.BigIntegerField(null=True, blank=True)  # Deriv contract; null for mock/manual trades
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = TradeQuerySet.as_manager()
+
     class Meta:
         db_table = "trades"
         ordering = ["-opened_at", "-created_at"]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "contract_id"], name="trades_user_contract_uniq"),
+        ]
+        # Hot paths (manage.py audit_trade_queries checks them):
+        # a user's trades by time window / newest first, the same split by
+        # is_mock (data source counts, Trading Twin), and the unfiltered feed.
+        indexes = [
+            models.Index(fields=["user", "opened_at", "created_at"], name="trades_user_opened_idx"),
+            models.Index(fields=["user", "is_mock", "opened_at"], name="trades_user_mock_opened_idx"),
+            models.Index(fields=["opened_at", "created_at"], name="trades_opened_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.instrument} {self.pnl}"
@@ -67,3 +108,26 @@ class BehavioralMetric(models.Model):
 
     def __str__(self):
         return f"{self.user_id} {self.trading_date}"
+
+
+class TradeSyncWatermark(models.Model):
+    """How far a user's Deriv account has been synced (profit_table sell_time / transaction_id)."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        UserProfile, on_delete=models.CASCADE, related_name="trade_sync_watermarks", db_column="user_id"
+    )
+    account_id = models.CharField(max_length=64)  # Deriv loginid, e.g. "CR123456"
+    last_sell_time = models.BigIntegerField(null=True, blank=True)  # epoch seconds
+    last_transaction_id = models.BigIntegerField(null=True, blank=True)
+    synced_from = models.BigIntegerField()  # earliest date_from fetched (epoch seconds)
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "trade_sync_watermarks"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "account_id"], name="trade_sync_watermark_account_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.account_id} @ {self.last_sell_time}"
@@ -0,0 +1,295 @@
+# behavior/pattern_engine.py
+# Single-pass behavioral pattern engine.
+#
+# The detectors in detection.py each sort the trade list and walk it again
+# (revenge trading additionally re-scans forward from every loss). This
+# engine sorts once, lays the trades out as columns and evaluates revenge
+# trading, loss chasing and hour-of-day performance over those columns with
+# O(1) work per trade (vectorised where the logic allows). Results are
+# identical, field for field, to the per-detector functions.
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Dict, List
+
+import numpy as np
+
+REVENGE_WINDOW = timedelta(minutes=10)
+REVENGE_MIN_TRADES = 3
+
+
+@dataclass
+class TradeColumns:
+    """
+    Trades as parallel columns.
+
+    ``opened_at`` and ``pnl`` are in time order (a stable sort, like the
+    per-detector ``sorted`` calls); ``hour`` and ``input_pnl`` keep input order
+    for the hour-of-day stats. Times stay ``datetime`` objects: turning
+    timezone-aware datetimes into integers costs more per trade than every
+    comparison the engine makes.
+    """
+    trades: List[Dict[str, Any]]
+    order: List[int]  # input indices in opened_at order
+    opened_at: List[Any]
+    pnl: np.ndarray
+    size: np.ndarray  # abs(pnl): the position-size proxy
+    input_pnl: np.ndarray
+    hour: np.ndarray
+
+    @classmethod
+    def from_trades(cls, trades: List[Dict[str, Any]]) -> "TradeColumns":
+        n = len(trades)
+        opened_at = [t['opened_at'] for t in trades]
+        input_pnl = np.array([float(t.get('pnl', 0)) for t in trades], dtype=np.float64)
+        hour = np.fromiter((o.hour for o in opened_at), dtype=np.int64, count=n)
+        order = sorted(range(n), key=opened_at.__getitem__)
+        pnl = input_pnl[order] if n else input_pnl
+        return cls(
+            trades=trades,
+            order=order,
+            opened_at=[opened_at[i] for i in order],
+            pnl=pnl,
+            size=np.abs(pnl),
+            input_pnl=input_pnl,
+            hour=hour,
+        )
+
+    def __len__(self) -> int:
+        return len(self.trades)
+
+    def sorted_trade(self, position: int) -> Dict[str, Any]:
+        return self.trades[self.order[position]]
+
+
+def empty_revenge() -> Dict[str, Any]:
+    return {
+        'detected': False,
+        'severity': 'none',
+        'details': '',
+        'trade_count': 0,
+        'time_window': ''
+    }
+
+
+def empty_time_pattern(win_rate_by_hour=None) -> Dict[str, Any]:
+    return {
+        'detected': False,
+        'worst_hours': [],
+        'details': '',
+        'win_rate_by_hour': win_rate_by_hour or {}
+    }
+
+
+def empty_loss_chasing(consecutive_losses=0, size_increase=0) -> Dict[str, Any]:
+    return {
+        'detected': False,
+        'severity': 'none',
+        'details': '',
+        'consecutive_losses': consecutive_losses,
+        'size_increase': size_increase
+    }
+
+
+# ── Result builders (shared with behavior.state) ────────────────────
+
+
+def revenge_result(trade_count, time_span, trigger_loss, trigger_at, total_pnl) -> Dict[str, Any]:
+    """Revenge-trading dict for a detected window of *trade_count* trades."""
+    if trade_count >= 5:
+        severity = 'high'
+    elif trade_count >= 4:
+        severity = 'medium'
+    else:
+        severity = 'low'
+
+    trigger_time = trigger_at.strftime("%b %d, %H:%M UTC")
+    return {
+        'detected': True,
+        'severity': severity,
+        'details': (
+            f"{trade_count} trades in {time_span:.1f} min after a "
+            f"${abs(trigger_loss):.2f} loss ({trigger_time})"
+        ),
+        'trade_count': trade_count,
+        'time_window': f"{time_span:.1f} minutes",
+        'total_pnl': total_pnl,
+        'trigger_loss': trigger_loss
+    }
+
+
+def loss_chasing_detected(consecutive, size_increase) -> bool:
+    """2+ consecutive losses with a 20%+ position size increase."""
+    return consecutive >= 2 and size_increase >= 20
+
+
+def loss_chasing_result(consecutive, size_increase, first_size, last_size, first_at, last_at) -> Dict[str, Any]:
+    """Loss-chasing dict; sizes and dates describe the longest losing run."""
+    if not loss_chasing_detected(consecutive, size_increase):
+        return empty_loss_chasing(consecutive, size_increase)
+
+    if consecutive >= 4 or size_increase >= 50:
+        severity = 'high'
+    elif consecutive >= 3 or size_increase >= 35:
+        severity = 'medium'
+    else:
+        severity = 'low'
+
+    d1 = first_at.strftime("%b %d")
+    d2 = last_at.strftime("%b %d")
+    date_range = f", {d1}-{d2}" if d1 != d2 else f", {d1}"
+    size_range = f" (${first_size:.2f} -> ${last_size:.2f})"
+
+    return {
+        'detected': True,
+        'severity': severity,
+        'details': (
+            f"{consecutive} consecutive losses with {size_increase:.1f}% "
+            f"position size increase{size_range}{date_range}"
+        ),
+        'consecutive_losses': consecutive,
+        'size_increase': size_increase
+    }
+
+
+def time_pattern_result(win_rate_by_hour: Dict[int, float]) -> Dict[str, Any]:
+    """Time-pattern dict from per-hour win rates (hours under 35% are flagged)."""
+    worst_hours = [hour for hour, rate in win_rate_by_hour.items() if rate < 35]
+    if not worst_hours:
+        return empty_time_pattern(win_rate_by_hour)
+
+    worst_hours_sorted = sorted(worst_hours, key=lambda h: win_rate_by_hour[h])
+    worst_rate = win_rate_by_hour[worst_hours_sorted[0]]
+    hours_str = ", ".join(f"{h:02d}:00-{(h + 1) % 24:02d}:00" for h in worst_hours_sorted[:3])
+
+    return {
+        'detected': True,
+        'worst_hours': worst_hours_sorted,
+        'details': f"Poor performance during {hours_str} (win rate: {worst_rate:.1f}%)",
+        'win_rate_by_hour': win_rate_by_hour,
+        'severity': 'medium' if worst_rate < 25 else 'low'
+    }
+
+
+# ── Columnar evaluation ─────────────────────────────────────────────
+
+
+def revenge_trading(cols: TradeColumns) -> Dict[str, Any]:
+    """First loss followed by 3+ trades (itself included) within 10 minutes.
+
+    Candidate losses come from the pnl column; the window end is only
+    searched for once, for the loss that triggers.
+    """
+    n = len(cols)
+    if n < REVENGE_MIN_TRADES:
+        return empty_revenge()
+
+    # In time order a window holds 3+ trades exactly when the trade two
+    # places later falls inside it, so each loss costs one comparison.
+    opened_at = cols.opened_at
+    reach = REVENGE_MIN_TRADES - 1
+    for i in np.flatnonzero(cols.pnl[:n - reach] < 0).tolist():
+        threshold = opened_at[i] + REVENGE_WINDOW
+        if opened_at[i + reach] <= threshold:
+            end = bisect_right(opened_at, threshold, lo=i + reach)
+            break
+    else:
+        return empty_revenge()
+
+    rapid_trades = [cols.sorted_trade(k) for k in range(i, end)]
+    return revenge_result(
+        trade_count=len(rapid_trades),
+        time_span=(rapid_trades[-1]['opened_at'] - rapid_trades[0]['opened_at']).total_seconds() / 60,
+        trigger_loss=float(rapid_trades[0]['pnl']),
+        trigger_at=rapid_trades[0]['opened_at'],
+        total_pnl=sum(float(t.get('pnl', 0)) for t in rapid_trades),
+    )
+
+
+def loss_chasing(cols: TradeColumns) -> Dict[str, Any]:
+    """Longest run of consecutive losses and the largest size escalation.
+
+    Runs are found from the loss mask's edges; size escalation is measured
+    against each run's first loss wherever a loss is larger than the one
+    before it, exactly as ``detect_loss_chasing`` does.
+    """
+    n = len(cols)
+    if n < 2:
+        return empty_loss_chasing()
+
+    size = cols.size
+    loss = cols.pnl < 0
+    prev_loss = np.r_[False, loss[:-1]]
+    next_loss = np.r_[loss[1:], False]
+    run_starts = np.flatnonzero(loss & ~prev_loss)
+    run_ends = np.flatnonzero(loss & ~next_loss)
+
+    max_consecutive = 0
+    max_size_increase = 0
+    if run_starts.size:
+        lengths = run_ends - run_starts + 1
+        best = int(np.argmax(lengths))  # earliest of the longest runs
+        max_consecutive = int(lengths[best])
+
+        run_first = size[run_starts][np.cumsum(loss & ~prev_loss) - 1]
+        growing = loss & prev_loss & (size > np.r_[0.0, size[:-1]])
+        grown, first = size[growing], run_first[growing]
+        if grown.size:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                increases = np.where(first > 0, ((grown - first) / first) * 100, 0.0)
+            peak = float(increases.max())
+            if peak > 0:
+                max_size_increase = peak
+
+    if not loss_chasing_detected(max_consecutive, max_size_increase):
+        return empty_loss_chasing(max_consecutive, max_size_increase)
+
+    first_pos, last_pos = int(run_starts[best]), int(run_ends[best])
+    return loss_chasing_result(
+        consecutive=max_consecutive,
+        size_increase=max_size_increase,
+        first_size=float(size[first_pos]),
+        last_size=float(size[last_pos]),
+        first_at=cols.opened_at[first_pos],
+        last_at=cols.opened_at[last_pos],
+    )
+
+
+def time_patterns(cols: TradeColumns, min_trades_per_hour: int = 3) -> Dict[str, Any]:
+    """Win rate per hour of day; hours under 35% are flagged.
+
+    Hours are reported in order of their first appearance in the input, as
+    ``detect_time_based_patterns`` does, so ties sort the same way.
+    """
+    if len(cols) < min_trades_per_hour:
+        return empty_time_pattern()
+
+    counts = np.bincount(cols.hour, minlength=24)
+    wins = np.bincount(cols.hour[cols.input_pnl > 0], minlength=24)
+    hours, first_seen = np.unique(cols.hour, return_index=True)
+
+    win_rate_by_hour = {}
+    for hour in hours[np.argsort(first_seen)]:
+        hour, total = int(hour), int(counts[hour])
+        if total >= min_trades_per_hour:
+            win_rate_by_hour[hour] = (int(wins[hour]) / total) * 100
+
+    return time_pattern_result(win_rate_by_hour)
+
+
+def scan_patterns(trades: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Evaluate the history-based detectors over one columnar view of *trades*.
+
+    Returns:
+        {'revenge_trading': {...}, 'loss_chasing': {...}, 'time_patterns': {...}}
+        with the same dicts as detect_revenge_trading, detect_loss_chasing and
+        detect_time_based_patterns.
+    """
+    cols = TradeColumns.from_trades(trades or [])
+    return {
+        'revenge_trading': revenge_trading(cols),
+        'loss_chasing': loss_chasing(cols),
+        'time_patterns': time_patterns(cols),
+    }
@@ -0,0 +1,255 @@
+# behavior/recompute.py
+# Debounced pattern/risk recompute for BehavioralMetric rows.
+#
+# The post_save signal keeps the day's counts current synchronously (one
+# aggregate query). Pattern flags, emotional state and risk score are
+# recomputed here instead: each new trade schedules its (user, date) and
+# pushes that key's recompute back by the debounce delay, so a burst of 50
+# inserted trades costs one recompute, run once the burst goes quiet. A
+# key waits at most the max wait from its first request, so steady trading
+# still gets a fresh recompute at least that often.
+#
+# The queue lives in memory, so anything still waiting when the process
+# exits is flushed: one-shot commands and worker stop() call
+# flush_recomputes(), and an atexit hook covers everything else.
+#
+# Settings: BEHAVIOR_RECOMPUTE_DELAY_SECONDS (default 2; 0 recomputes inline),
+# BEHAVIOR_RECOMPUTE_MAX_WAIT_SECONDS (default 10).
+
+import atexit
+import logging
+import os
+import threading
+import time
+from datetime import date
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Avg, Count, Q
+
+from .models import BehavioralMetric, Trade
+from .state import extend_state, get_behavior_state, invalidate_state
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DELAY_SECONDS = 2.0
+DEFAULT_MAX_WAIT_SECONDS = 10.0
+
+Key = Tuple[str, date]
+
+
+def calculate_risk_score(patterns):
+    """Calculate risk score (0-100) based on detected patterns."""
+    score = 0
+
+    severity_weights = {'high': 30, 'medium': 20, 'low': 10}
+
+    for pattern_name, pattern_data in patterns.items():
+        if isinstance(pattern_data, dict) and pattern_data.get('detected'):
+            severity = pattern_data.get('severity', 'none')
+            score += severity_weights.get(severity, 0)
+
+    return min(score, 100)
+
+
+def emotional_state_for(patterns) -> str:
+    """Map the highest detected severity to the metric's emotional state."""
+    highest_severity = patterns.get('highest_severity', 'none')
+    if highest_severity == 'high':
+        return 'distressed'
+    if highest_severity == 'medium':
+        return 'anxious'
+    if patterns.get('has_any_pattern', False):
+        return 'cautious'
+    return 'calm'
+
+
+def refresh_daily_counts(user_id: str, trading_date: date) -> Dict[str, object]:
+    """Write the day's trade counts and average hold time from one aggregate query."""
+    metric_data = Trade.objects.filter(
+        user_id=user_id
+    ).opened_on(trading_date).aggregate(
+        total_trades=Count('id'),
+        win_count=Count('id', filter=Q(pnl__gt=0)),
+        loss_count=Count('id', filter=Q(pnl__lt=0)),
+        avg_hold_time=Avg('duration_seconds'),
+    )
+    # update_or_create keeps the pattern fields already on the row
+    BehavioralMetric.objects.update_or_create(
+        user_id=user_id,
+        trading_date=trading_date,
+        defaults=metric_data
+    )
+    return metric_data
+
+
+def refresh_days(user_id: str, trading_dates: Iterable[date], new_trades: Iterable[Trade] = ()) -> None:
+    """
+    One post-write refresh for days changed in bulk (no post_save per row).
+
+    Counts are written now. After commit, cached trading statistics are
+    dropped, each day's cached state is updated and one pattern recompute
+    is queued; before commit, a request could rebuild and cache the state
+    from the old rows. A day whose only change is *new_trades* newer than
+    its cached state (a live or incremental sync) has them folded into the
+    state; any other day's cached state is dropped and rebuilt from the
+    table.
+    """
+    from .tools import invalidate_trading_statistics
+
+    user_id = str(user_id)
+    transaction.on_commit(lambda: invalidate_trading_statistics(user_id))
+    appended: Dict[date, list] = {}
+    for trade in new_trades:
+        if trade.opened_at is not None:
+            appended.setdefault(trade.opened_at.date(), []).append(trade)
+    for trading_date in sorted(set(trading_dates)):
+        refresh_daily_counts(user_id, trading_date)
+        transaction.on_commit(lambda d=trading_date: _refresh_state(user_id, d, appended.get(d, ())))
+        transaction.on_commit(lambda d=trading_date: schedule_recompute(user_id, d))
+
+
+def _refresh_state(user_id: str, trading_date: date, new_trades: Iterable[Trade]) -> None:
+    if not extend_state(user_id, trading_date, new_trades):
+        invalidate_state(user_id, trading_date)
+
+
+def recompute_pattern_metrics(user_id: str, trading_date: date) -> bool:
+    """
+    Refresh pattern_flags, emotional_state and risk_score for one day.
+
+    Reads the incremental BehaviorState (not the trades table) and leaves
+    the counts written by the signal alone. Returns False if there is no
+    metric row to update.
+    """
+    try:
+        patterns = get_behavior_state(user_id, trading_date).analysis().get('patterns', {})
+        fields = {
+            'pattern_flags': {
+                k: v['detected']
+                for k, v in patterns.items()
+                if isinstance(v, dict) and 'detected' in v
+            },
+            'emotional_state': emotional_state_for(patterns),
+            'risk_score': calculate_risk_score(patterns),
+        }
+    except Exception as e:
+        logger.warning("Error in pattern analysis: %s", e)
+        fields = {'pattern_flags': {}, 'emotional_state': 'unknown', 'risk_score': None}
+
+    return BehavioralMetric.objects.filter(user_id=user_id, trading_date=trading_date).update(**fields) > 0
+
+
+class RecomputeQueue:
+    """Debouncing queue: one recompute per (user, date) once its trades go quiet."""
+
+    def __init__(
+        self,
+        runner: Callable[[str, date], object] = recompute_pattern_metrics,
+        delay: Optional[float] = None,
+        max_wait: Optional[float] = None,
+    ):
+        if delay is None:
+            delay = float(os.environ.get("BEHAVIOR_RECOMPUTE_DELAY_SECONDS", DEFAULT_DELAY_SECONDS))
+        if max_wait is None:
+            max_wait = float(os.environ.get("BEHAVIOR_RECOMPUTE_MAX_WAIT_SECONDS", DEFAULT_MAX_WAIT_SECONDS))
+        self.runner = runner
+        self.delay = delay
+        self.max_wait = max(max_wait, delay)
+        # key -> (first request, due time)
+        self._pending: Dict[Key, Tuple[float, float]] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self.scheduled = 0
+        self.executed = 0
+
+    def schedule(self, user_id: str, trading_date: date, now: Optional[float] = None) -> None:
+        """
+        Queue a recompute *delay* seconds from now.
+
+        A key already waiting is pushed back to the same point (a debounce),
+        but never past *max_wait* after its first request.
+        """
+        key = (str(user_id), trading_date)
+        if self.delay <= 0:
+            self.scheduled += 1
+            self._run(key)
+            return
+        now = time.monotonic() if now is None else now
+        with self._cond:
+            self.scheduled += 1
+            first = self._pending[key][0] if key in self._pending else now
+            self._pending[key] = (first, min(now + self.delay, first + self.max_wait))
+            self._cond.notify()
+            self._ensure_thread()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def run_due(self, now: Optional[float] = None) -> int:
+        """Run every recompute whose window has elapsed; returns how many ran."""
+        now = time.monotonic() if now is None else now
+        with self._cond:
+            due = [key for key, (_, at) in self._pending.items() if at <= now]
+            for key in due:
+                del self._pending[key]
+        for key in due:
+            self._run(key)
+        return len(due)
+
+    def flush(self) -> int:
+        """Run everything pending now (shutdown, tests, management commands)."""
+        return self.run_due(now=float("inf"))
+
+    def _run(self, key: Key) -> None:
+        try:
+            self.runner(*key)
+            self.executed += 1
+        except Exception as exc:
+            logger.error("Behavior recompute for %s on %s failed: %s", key[0], key[1], exc, exc_info=True)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="behavior-recompute")
+            self._thread.start()
+
+    def _loop(self) -> None:
+        from django.db import close_old_connections
+
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                wait = min(at for _, at in self._pending.values()) - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+            try:
+                self.run_due()
+            finally:
+                close_old_connections()
+
+
+_queue: Optional[RecomputeQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_recompute_queue() -> RecomputeQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = RecomputeQueue()
+            atexit.register(flush_recomputes)
+        return _queue
+
+
+def schedule_recompute(user_id: str, trading_date: date) -> None:
+    get_recompute_queue().schedule(user_id, trading_date)
+
+
+def flush_recomputes() -> int:
+    """Run every queued recompute now; call before a process that wrote trades exits."""
+    if _queue is None:
+        return 0
+    return _queue.flush()
@@ -2,12 +2,18 @@
 # Django signals for automatic behavioral analysis
 
 import logging
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
-from datetime import timedelta
-from .models import Trade, BehavioralMetric
-from .tools import analyze_trade_patterns, save_behavioral_metric
+from .models import Trade
+from .recompute import (  # noqa: F401 (calculate_risk_score re-exported)
+    calculate_risk_score,
+    refresh_daily_counts,
+    schedule_recompute,
+)
+from .state import record_trade
+from .tools import invalidate_trading_statistics
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +23,16 @@ def update_daily_metrics(sender, instance, created, **kwargs):
     """
     Automatically update BehavioralMetric when a trade is saved.
     This ensures metrics are always up-to-date.
+
+    Counts and average hold time are written synchronously from one
+    aggregate query; pattern flags, emotional state and risk score are
+    recomputed by the debounced queue in recompute.py once the trade is
+    committed.
     """
+    user_id = str(instance.user_id)
+    # Cached statistics go stale on any write, once it is committed
+    transaction.on_commit(lambda: invalidate_trading_statistics(user_id))
+
     if not created:
         # Only process new trades, not updates
         return
@@ -25,79 +40,20 @@ def update_daily_metrics(sender, instance, created, **kwargs):
     user = instance.user
     trading_date = instance.opened_at.date() if instance.opened_at else timezone.now().date()
     
-    # Get all trades for this user on this date
-    day_trades = Trade.objects.filter(
-        user=user,
-        opened_at__date=trading_date
-    )
-    
-    total_trades = day_trades.count()
-    winning_trades = day_trades.filter(pnl__gt=0)
-    losing_trades = day_trades.filter(pnl__lt=0)
-    
-    win_count = winning_trades.count()
-    loss_count = losing_trades.count()
-    
-    # Calculate average hold time
-    trades_with_duration = day_trades.exclude(duration_seconds__isnull=True)
-    if trades_with_duration.exists():
-        avg_hold_time = sum(t.duration_seconds for t in trades_with_duration) / trades_with_duration.count()
-    else:
-        avg_hold_time = None
-    
-    # Run pattern analysis on today's trades
+    # Counts and average hold time for this user's day, in one query
+    refresh_daily_counts(user.id, trading_date)
+
+    # Fold the trade into the user's incremental state for the day (O(1))
     try:
-        analysis = analyze_trade_patterns(str(user.id), hours=24)
-        
-        pattern_flags = {
-            k: v['detected'] 
-            for k, v in analysis.get('patterns', {}).items() 
-            if isinstance(v, dict) and 'detected' in v
-        }
-        
-        # Determine emotional state
-        highest_severity = analysis.get('patterns', {}).get('highest_severity', 'none')
-        if highest_severity == 'high':
-            emotional_state = 'distressed'
-        elif highest_severity == 'medium':
-            emotional_state = 'anxious'
-        elif analysis.get('patterns', {}).get('has_any_pattern', False):
-            emotional_state = 'cautious'
-        else:
-            emotional_state = 'calm'
-        
-        # Calculate risk score
-        risk_score = calculate_risk_score(analysis.get('patterns', {}))
-        
+        record_trade(instance)
     except Exception as e:
-        logger.warning("Error in pattern analysis: %s", e)
-        pattern_flags = {}
-        emotional_state = 'unknown'
-        risk_score = None
-    
-    # Update or create metric for this day
-    metric_data = {
-        'total_trades': total_trades,
-        'win_count': win_count,
-        'loss_count': loss_count,
-        'avg_hold_time': avg_hold_time,
-        'risk_score': risk_score,
-        'emotional_state': emotional_state,
-        'pattern_flags': pattern_flags
-    }
-    
-    save_behavioral_metric(str(user.id), trading_date, metric_data)
+        logger.warning("Error updating behavioral state: %s", e)
 
+    transaction.on_commit(lambda: schedule_recompute(user_id, trading_date))
 
-def calculate_risk_score(patterns):
-    """Calculate risk score (0-100) based on detected patterns."""
-    score = 0
-    
-    severity_weights = {'high': 30, 'medium': 20, 'low': 10}
-    
-    for pattern_name, pattern_data in patterns.items():
-        if isinstance(pattern_data, dict) and pattern_data.get('detected'):
-            severity = pattern_data.get('severity', 'none')
-            score += severity_weights.get(severity, 0)
-    
-    return min(score, 100)
\ No newline at end of file
+
+@receiver(post_delete, sender=Trade)
+def invalidate_statistics_on_delete(sender, instance, **kwargs):
+    """A deleted trade must drop out of the cached trading statistics."""
+    user_id = str(instance.user_id)
+    transaction.on_commit(lambda: invalidate_trading_statistics(user_id))
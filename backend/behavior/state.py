@@ -0,0 +1,385 @@
+# behavior/state.py
+# Incremental per-user behavioral state, kept in the Django cache.
+#
+# Each new trade updates a small BehaviorState in O(1) (amortised) instead
+# of re-querying and re-analysing the day's trades. The state covers one
+# user's UTC trading day — the same scope as the BehavioralMetric row it
+# feeds — and carries everything the detectors need:
+#
+# - revenge trading: the losses and trades of the last 10 minutes, then the
+#   first triggering window once found;
+# - loss chasing: the current and longest losing runs and the largest size
+#   escalation (the detect_loss_chasing state machine, persisted);
+# - time patterns: 24 hourly trade/win counters;
+# - overtrading: the day's trade count.
+#
+# Counts, time patterns and overtrading are per day. Revenge trading and
+# loss chasing look at adjacent trades, so a rebuilt state is first led in
+# with the end of the previous day: the trades of its last 10 minutes and
+# its trailing losing run. Runs that cross midnight are still detected,
+# as they were with the old rolling 24-hour analysis.
+#
+# Trades must arrive in opened_at order. A trade older than the last one
+# applied (a back-filled sync, say) or a cache miss rebuilds the state from
+# that day's trades. Every read also checks the cached state against the
+# table, with one aggregate over the day's rows (count and PnL sum). A
+# mismatch means another process wrote trades this cache has not seen, or
+# a concurrent update was lost, and the state is rebuilt. Updates hold a
+# short cache lock. Both only help across processes when the cache is
+# shared, so production should set REDIS_URL (see settings.CACHES).
+
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db.models import Count, Sum
+
+from .detection import combine_patterns, overtrading_from_count
+from .models import Trade, day_start
+from .pattern_engine import (
+    REVENGE_MIN_TRADES,
+    REVENGE_WINDOW,
+    empty_loss_chasing,
+    empty_revenge,
+    empty_time_pattern,
+    loss_chasing_result,
+    revenge_result,
+    time_pattern_result,
+)
+from .tools import get_average_daily_trades, summarize_patterns
+
+STATE_VERSION = 2
+STATE_TTL_SECONDS = 2 * 86400
+STATE_LOCK_SECONDS = 5
+STATE_LOCK_WAIT_SECONDS = 2.0
+MIN_TRADES_PER_HOUR = 3
+
+
+@dataclass
+class BehaviorState:
+    """Streaming detector state for one user's trading day."""
+    user_id: str
+    trading_date: date
+    avg_daily_trades: int = 8
+    trade_count: int = 0
+    win_count: int = 0
+    loss_count: int = 0
+    has_real: bool = False
+    last_opened_at: Optional[datetime] = None
+    # Sum of the day's PnL; with trade_count, checked against the table
+    pnl_total: float = 0.0
+    # Trades seen by the revenge / loss-chasing detectors, lead-in included
+    seq: int = 0
+
+    # Revenge trading: (opened_at, pnl, seq) of trades / losses that can still
+    # fall in an open 10-minute window, until the first window triggers.
+    recent: Deque[Tuple[datetime, float, int]] = field(default_factory=deque)
+    pending_losses: Deque[Tuple[datetime, float, int]] = field(default_factory=deque)
+    revenge: Optional[Dict[str, Any]] = None
+
+    # Loss chasing
+    run_length: int = 0
+    run_first_size: Optional[float] = None
+    run_last_size: Optional[float] = None
+    run_first_at: Optional[datetime] = None
+    run_last_at: Optional[datetime] = None
+    best_length: int = 0
+    best_first_size: Optional[float] = None
+    best_last_size: Optional[float] = None
+    best_first_at: Optional[datetime] = None
+    best_last_at: Optional[datetime] = None
+    max_size_increase: float = 0
+
+    # Time patterns
+    hour_trades: List[int] = field(default_factory=lambda: [0] * 24)
+    hour_wins: List[int] = field(default_factory=lambda: [0] * 24)
+
+    def apply(self, opened_at: datetime, pnl: float, is_mock: bool = True) -> None:
+        """Fold one trade (the newest so far) into the state."""
+        self.trade_count += 1
+        self.pnl_total += pnl
+        if pnl > 0:
+            self.win_count += 1
+        elif pnl < 0:
+            self.loss_count += 1
+        self.has_real = self.has_real or not is_mock
+        self.last_opened_at = opened_at
+
+        self.lead_in(opened_at, pnl)
+
+        self.hour_trades[opened_at.hour] += 1
+        if pnl > 0:
+            self.hour_wins[opened_at.hour] += 1
+
+    def lead_in(self, opened_at: datetime, pnl: float) -> None:
+        """Feed a trade to the revenge and loss-chasing detectors only."""
+        self.seq += 1
+        self._apply_revenge(opened_at, pnl, self.seq)
+        self._apply_loss_chasing(opened_at, pnl)
+
+    def _apply_revenge(self, opened_at: datetime, pnl: float, seq: int) -> None:
+        episode = self.revenge
+        if episode is not None:
+            if opened_at <= episode['trigger_at'] + REVENGE_WINDOW:
+                episode['trade_count'] += 1
+                episode['total_pnl'] += pnl
+                episode['last_at'] = opened_at
+            return
+
+        horizon = opened_at - REVENGE_WINDOW
+        self.recent.append((opened_at, pnl, seq))
+        if pnl < 0:
+            self.pending_losses.append((opened_at, pnl, seq))
+        while self.recent and self.recent[0][0] < horizon:
+            self.recent.popleft()
+        while self.pending_losses and self.pending_losses[0][0] < horizon:
+            self.pending_losses.popleft()
+        if not self.pending_losses:
+            return
+
+        # The oldest open loss has the largest window; it triggers first.
+        trigger_at, trigger_loss, trigger_seq = self.pending_losses[0]
+        if seq - trigger_seq + 1 < REVENGE_MIN_TRADES:
+            return
+        self.revenge = {
+            'trigger_at': trigger_at,
+            'trigger_loss': trigger_loss,
+            'trade_count': seq - trigger_seq + 1,
+            'total_pnl': sum(p for _, p, s in self.recent if s >= trigger_seq),
+            'last_at': opened_at,
+        }
+        self.recent.clear()
+        self.pending_losses.clear()
+
+    def _apply_loss_chasing(self, opened_at: datetime, pnl: float) -> None:
+        size = abs(pnl)
+        if pnl < 0:
+            self.run_length += 1
+            if self.run_first_size is None:
+                self.run_first_size = size
+                self.run_first_at = opened_at
+            if self.run_last_size is not None and size > self.run_last_size:
+                first = self.run_first_size
+                size_increase = ((size - first) / first) * 100 if first > 0 else 0
+                self.max_size_increase = max(self.max_size_increase, size_increase)
+            self.run_last_size = size
+            self.run_last_at = opened_at
+        else:
+            self._close_run()
+
+    def _close_run(self) -> None:
+        if self.run_length > self.best_length:
+            self.best_length = self.run_length
+            self.best_first_size, self.best_last_size = self.run_first_size, self.run_last_size
+            self.best_first_at, self.best_last_at = self.run_first_at, self.run_last_at
+        self.run_length = 0
+        self.run_first_size = self.run_last_size = None
+        self.run_first_at = self.run_last_at = None
+
+    # ── Results ─────────────────────────────────────────────────────
+
+    def patterns(self) -> Dict[str, Any]:
+        """Same shape as detection.analyze_all_patterns for the day's trades."""
+        return combine_patterns({
+            'revenge_trading': self._revenge_pattern(),
+            'overtrading': overtrading_from_count(self.trade_count, self.avg_daily_trades),
+            'loss_chasing': self._loss_chasing_pattern(),
+            'time_patterns': self._time_pattern(),
+        }, data_source="real" if self.has_real else "demo")
+
+    def analysis(self) -> Dict[str, Any]:
+        """Same shape as tools.analyze_trade_patterns."""
+        if not self.trade_count:
+            return {
+                'patterns': {},
+                'summary': 'No recent trades to analyze',
+                'needs_nudge': False,
+                'nudge_message': '',
+                'trade_count': 0
+            }
+        return summarize_patterns(self.patterns(), trade_count=self.trade_count, hours=24)
+
+    def _revenge_pattern(self) -> Dict[str, Any]:
+        episode = self.revenge
+        if episode is None:
+            return empty_revenge()
+        return revenge_result(
+            trade_count=episode['trade_count'],
+            time_span=(episode['last_at'] - episode['trigger_at']).total_seconds() / 60,
+            trigger_loss=episode['trigger_loss'],
+            trigger_at=episode['trigger_at'],
+            total_pnl=episode['total_pnl'],
+        )
+
+    def _loss_chasing_pattern(self) -> Dict[str, Any]:
+        if self.seq < 2:
+            return empty_loss_chasing()
+        if self.run_length > self.best_length:  # the day ends on a losing run
+            best = (self.run_length, self.run_first_size, self.run_last_size, self.run_first_at, self.run_last_at)
+        else:
+            best = (self.best_length, self.best_first_size, self.best_last_size, self.best_first_at, self.best_last_at)
+        length, first_size, last_size, first_at, last_at = best
+        if not length:
+            return empty_loss_chasing(0, self.max_size_increase)
+        return loss_chasing_result(length, self.max_size_increase, first_size, last_size, first_at, last_at)
+
+    def _time_pattern(self) -> Dict[str, Any]:
+        if self.trade_count < MIN_TRADES_PER_HOUR:
+            return empty_time_pattern()
+        # Latest hour first, matching the newest-first order of get_recent_trades
+        win_rate_by_hour = {
+            hour: (self.hour_wins[hour] / self.hour_trades[hour]) * 100
+            for hour in range(23, -1, -1)
+            if self.hour_trades[hour] >= MIN_TRADES_PER_HOUR
+        }
+        return time_pattern_result(win_rate_by_hour)
+
+
+def state_key(user_id: str, trading_date: date) -> str:
+    return f"behavior_state:v{STATE_VERSION}:{user_id}:{trading_date.isoformat()}"
+
+
+def load_state(user_id: str, trading_date: date) -> Optional[BehaviorState]:
+    return cache.get(state_key(user_id, trading_date))
+
+
+def save_state(state: BehaviorState) -> None:
+    cache.set(state_key(state.user_id, state.trading_date), state, STATE_TTL_SECONDS)
+
+
+def invalidate_state(user_id: str, trading_date: date) -> None:
+    cache.delete(state_key(user_id, trading_date))
+
+
+@contextmanager
+def state_lock(user_id: str, trading_date: date):
+    """
+    Serialise load-update-save of one day's state across workers.
+
+    Gives up after STATE_LOCK_WAIT_SECONDS and proceeds unlocked; the
+    table check in get_behavior_state repairs a lost update.
+    """
+    key = state_key(user_id, trading_date) + ":lock"
+    deadline = time.monotonic() + STATE_LOCK_WAIT_SECONDS
+    acquired = cache.add(key, 1, STATE_LOCK_SECONDS)
+    while not acquired and time.monotonic() < deadline:
+        time.sleep(0.01)
+        acquired = cache.add(key, 1, STATE_LOCK_SECONDS)
+    try:
+        yield
+    finally:
+        if acquired:
+            cache.delete(key)
+
+
+def matches_table(state: BehaviorState) -> bool:
+    """Whether the state has seen exactly the day's trades now in the table."""
+    stored = Trade.objects.filter(
+        user_id=state.user_id
+    ).opened_on(state.trading_date).aggregate(n=Count('id'), pnl=Sum('pnl'))
+    return stored['n'] == state.trade_count and math.isclose(
+        float(stored['pnl'] or 0), state.pnl_total, abs_tol=1e-6
+    )
+
+
+def lead_in_trades(user_id: str, trading_date: date) -> List[Tuple[datetime, float]]:
+    """
+    End of the previous day that today's revenge / loss-chasing windows reach.
+
+    The trades of its last REVENGE_WINDOW plus its trailing losing run,
+    oldest first.
+    """
+    start = day_start(trading_date)
+    horizon = start - REVENGE_WINDOW
+    rows = Trade.objects.filter(
+        user_id=user_id, opened_at__gte=start - timedelta(days=1), opened_at__lt=start,
+    ).order_by('-opened_at', '-created_at').values_list('opened_at', 'pnl')
+    trades = []
+    losing_run = True
+    for opened_at, pnl in rows.iterator(chunk_size=100):
+        pnl = float(pnl)
+        losing_run = losing_run and pnl < 0
+        if opened_at < horizon and not losing_run:
+            break
+        trades.append((opened_at, pnl))
+    return trades[::-1]
+
+
+def rebuild_state(user_id: str, trading_date: date) -> BehaviorState:
+    """Replay the day's trades (oldest first) into a fresh state and cache it."""
+    state = BehaviorState(
+        user_id=user_id,
+        trading_date=trading_date,
+        avg_daily_trades=int(get_average_daily_trades(user_id)),
+    )
+    for opened_at, pnl in lead_in_trades(user_id, trading_date):
+        state.lead_in(opened_at, pnl)
+    rows = Trade.objects.filter(
+        user_id=user_id
+    ).opened_on(trading_date).order_by('opened_at', 'created_at').values_list('opened_at', 'pnl', 'is_mock')
+    for opened_at, pnl, is_mock in rows:
+        state.apply(opened_at, float(pnl), is_mock)
+    save_state(state)
+    return state
+
+
+def get_behavior_state(user_id: str, trading_date: date) -> BehaviorState:
+    """Cached state for the day, rebuilt on a miss or when it disagrees with the table."""
+    state = load_state(user_id, trading_date)
+    if state is None or not matches_table(state):
+        state = rebuild_state(user_id, trading_date)
+    return state
+
+
+def extend_state(user_id: str, trading_date: date, trades: Iterable[Trade]) -> bool:
+    """
+    Fold trades appended in bulk into the day's cached state.
+
+    Returns False if the cached state must be dropped: the trades cannot
+    be appended (there are none, or one is older than the state's newest)
+    and the state does not already include them, or the extended state
+    disagrees with the table. Without a cached state there is
+    nothing to extend or drop: True.
+    """
+    trades = sorted((t for t in trades if t.opened_at is not None), key=lambda t: t.opened_at)
+    with state_lock(user_id, trading_date):
+        state = load_state(user_id, trading_date)
+        if state is None:
+            return True
+        if not trades or (state.last_opened_at is not None and trades[0].opened_at < state.last_opened_at):
+            # Kept only if a reader already rebuilt it with these trades
+            return matches_table(state)
+        for trade in trades:
+            state.apply(trade.opened_at, float(trade.pnl), trade.is_mock)
+        if not matches_table(state):
+            return False
+        save_state(state)
+        return True
+
+
+def record_trade(trade: Trade) -> Optional[BehaviorState]:
+    """
+    Fold a newly saved trade into its day's state.
+
+    Returns None for trades without an opened_at (they are not analysed).
+    """
+    if trade.opened_at is None:
+        return None
+    user_id = str(trade.user_id)
+    trading_date = trade.opened_at.date()
+    with state_lock(user_id, trading_date):
+        state = load_state(user_id, trading_date)
+        if state is None or (state.last_opened_at is not None and trade.opened_at < state.last_opened_at):
+            # Cold cache or an out-of-order trade: replay the day (includes this trade).
+            return rebuild_state(user_id, trading_date)
+        state.apply(trade.opened_at, float(trade.pnl), trade.is_mock)
+        if not matches_table(state):
+            # Missed another worker's trade: replay the day.
+            return rebuild_state(user_id, trading_date)
+        save_state(state)
+        return state
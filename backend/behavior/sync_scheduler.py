@@ -0,0 +1,313 @@
+"""
+Scheduled trade sync for every linked Deriv account.
+
+Trades used to be synced only when a user pressed "sync", each time over a
+fresh socket. A sync cycle now keeps every active ``DerivAccount`` current:
+
+- planning: an account is due when its watermark (trade_sync.py) is older
+  than ``ACTIVE_SYNC_INTERVAL_SECONDS`` for recently active users (a trade
+  or a Deriv login in the last ``ACTIVE_WINDOW_SECONDS``) or
+  ``IDLE_SYNC_INTERVAL_SECONDS`` for everyone else. Due accounts are
+  fetched most recently active first;
+- fetching: one event loop runs at most ``connections`` sockets. Each takes
+  the next token's accounts off a shared queue, re-authorizes only when the
+  token changes and pipelines each account's profit_table pages. Requests go through the per-token Deriv
+  budget at background priority (tradeiq.rate_limit), so users' own
+  requests are served first;
+- storing: fetched accounts are upserted and their watermarks advanced on
+  the calling thread as they arrive, while other accounts are still being
+  fetched.
+
+Startup: ``RUN_TRADE_SYNC_WORKER=true`` or ``python manage.py run_trade_sync``
+Settings: ``TRADE_SYNC_CONNECTIONS`` (default 8)
+"""
+
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from django.db.models import Max
+
+from tradeiq.rate_limit import PRIORITY_BACKGROUND, request_priority
+
+from .deriv_client import DerivAPIError, DerivClient
+from .models import TradeSyncWatermark, UserProfile
+from .recompute import flush_recomputes
+from .trade_sync import _resume_from, store_fetched_trades
+
+logger = logging.getLogger("tradeiq.trade_sync")
+
+ACTIVE_WINDOW_SECONDS = 24 * 3600
+ACTIVE_SYNC_INTERVAL_SECONDS = 5 * 60
+IDLE_SYNC_INTERVAL_SECONDS = 60 * 60
+CHECK_INTERVAL_SECONDS = 60
+SYNC_DAYS_BACK = 30
+DEFAULT_CONNECTIONS = 8
+
+
+@dataclass
+class SyncJob:
+    """One account to fetch: where to resume and how urgent it is."""
+    user_id: str
+    account_id: str  # DerivAccount.deriv_login_id
+    token: str
+    window_from: int
+    date_from: int
+    active: bool = False
+    last_active: float = 0.0
+
+
+@dataclass
+class FetchResult:
+    job: SyncJob
+    account_id: str  # loginid reported by authorize
+    trades: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def _epoch(value) -> float:
+    return value.timestamp() if value is not None else 0.0
+
+
+def plan_sync(
+    now: Optional[float] = None,
+    limit: Optional[int] = None,
+    days_back: int = SYNC_DAYS_BACK,
+) -> List[SyncJob]:
+    """Due accounts, most recently active first (at most *limit*)."""
+    from deriv_auth.models import DerivAccount
+
+    now = time.time() if now is None else now
+    window_from = int(now) - days_back * 86400
+    accounts = list(
+        DerivAccount.objects.filter(is_active=True)
+        .annotate(last_trade_at=Max("user__trades__opened_at"))
+    )
+    marks = {
+        (str(m.user_id), m.account_id): m
+        for m in TradeSyncWatermark.objects.filter(user_id__in={a.user_id for a in accounts})
+    }
+
+    jobs = []
+    for account in accounts:
+        user_id = str(account.user_id)
+        mark = marks.get((user_id, account.deriv_login_id))
+        last_active = max(_epoch(account.last_trade_at), _epoch(account.updated_at))
+        active = now - last_active <= ACTIVE_WINDOW_SECONDS
+        interval = ACTIVE_SYNC_INTERVAL_SECONDS if active else IDLE_SYNC_INTERVAL_SECONDS
+        if mark is not None and now - _epoch(mark.last_synced_at) < interval:
+            continue
+        try:
+            token = account.token
+        except Exception as exc:
+            logger.warning("Skipping Deriv account %s: token unavailable (%s)", account.deriv_login_id, exc)
+            continue
+        jobs.append(SyncJob(
+            user_id=user_id,
+            account_id=account.deriv_login_id,
+            token=token,
+            window_from=window_from,
+            date_from=_resume_from(mark, window_from) if mark is not None else window_from,
+            active=active,
+            last_active=last_active,
+        ))
+
+    jobs.sort(key=lambda job: (not job.active, -job.last_active))
+    return jobs[:limit] if limit else jobs
+
+
+async def fetch_jobs(
+    jobs: List[SyncJob],
+    on_result: Callable[[FetchResult], None],
+    connections: int = DEFAULT_CONNECTIONS,
+    app_id: Optional[str] = None,
+    ws_url: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    Fetch *jobs* over at most *connections* reused sockets.
+
+    *on_result* is called with each account's FetchResult as soon as it is
+    fetched. A failed account closes its socket (the next account gets a
+    fresh one). Returns {'connections': opened, 'authorizations': sent}.
+    """
+    by_token: Dict[str, List[SyncJob]] = {}
+    for job in jobs:  # dicts keep the priority order of each token's first job
+        by_token.setdefault(job.token, []).append(job)
+    work: asyncio.Queue = asyncio.Queue()
+    for group in by_token.values():
+        work.put_nowait(group)
+    stats = {"connections": 0, "authorizations": 0}
+
+    async def _worker():
+        client = None
+        try:
+            while not work.empty():
+                for job in work.get_nowait():
+                    try:
+                        if client is None:
+                            client = DerivClient(app_id)
+                            if ws_url:
+                                client.ws_url = ws_url
+                            await client.connect()
+                            stats["connections"] += 1
+                        if client._authorized_token != job.token:
+                            await client.authorize(job.token)
+                            stats["authorizations"] += 1
+                        trades = await client.fetch_all_trades(api_token=job.token, date_from=job.date_from)
+                        on_result(FetchResult(job, client.account.get("loginid") or job.account_id, trades))
+                    except Exception as exc:
+                        # Socket drops and malformed replies fail this account only
+                        error = str(exc) if isinstance(exc, DerivAPIError) else f"{type(exc).__name__}: {exc}"
+                        on_result(FetchResult(job, job.account_id, error=error))
+                        if client is not None:
+                            await _close(client)
+                            client = None
+        finally:
+            if client is not None:
+                await _close(client)
+
+    outcomes = await asyncio.gather(
+        *(_worker() for _ in range(max(1, min(connections, len(by_token))))),
+        return_exceptions=True,
+    )
+    for outcome in outcomes:
+        if isinstance(outcome, Exception):
+            logger.error("Trade sync fetch worker failed: %s", outcome, exc_info=outcome)
+    return stats
+
+
+async def _close(client: DerivClient) -> None:
+    try:
+        await client.disconnect()
+    except Exception as exc:
+        logger.debug("Closing Deriv socket failed: %s", exc)
+
+
+def store_result(result: FetchResult) -> Dict[str, Any]:
+    """Upsert one fetched account and advance its watermark."""
+    job = result.job
+    user = UserProfile.objects.get(id=job.user_id)
+    return store_fetched_trades(user, result.account_id, job.window_from, job.date_from, result.trades)
+
+
+def run_sync_cycle(
+    now: Optional[float] = None,
+    connections: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Sync every due account once. Returns counters for the cycle.
+
+    Fetching runs on its own event loop thread; results are stored here as
+    they arrive, so database writes stay on the caller's thread.
+    """
+    if connections is None:
+        connections = int(os.environ.get("TRADE_SYNC_CONNECTIONS", DEFAULT_CONNECTIONS))
+    summary = {
+        "accounts": 0, "synced": 0, "failed": 0,
+        "trades_created": 0, "trades_updated": 0,
+        "connections": 0, "authorizations": 0,
+    }
+    jobs = plan_sync(now=now, limit=limit)
+    summary["accounts"] = len(jobs)
+    if not jobs:
+        return summary
+
+    results: "queue.Queue[FetchResult]" = queue.Queue()
+
+    def _fetch():
+        with request_priority(PRIORITY_BACKGROUND):
+            return asyncio.run(fetch_jobs(jobs, results.put, connections))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="trade-sync-fetch") as pool:
+        fetching = pool.submit(contextvars.copy_context().run, _fetch)
+        while not (fetching.done() and results.empty()):
+            try:
+                result = results.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if result.error:
+                summary["failed"] += 1
+                logger.warning("Scheduled sync of %s failed: %s", result.job.account_id, result.error)
+                continue
+            try:
+                stored = store_result(result)
+            except Exception as exc:
+                summary["failed"] += 1
+                logger.error("Storing trades for %s failed: %s", result.account_id, exc, exc_info=True)
+                continue
+            summary["synced"] += 1
+            summary["trades_created"] += stored["trades_created"]
+            summary["trades_updated"] += stored["trades_updated"]
+        summary.update(fetching.result())
+
+    logger.info(
+        "Trade sync cycle: %(synced)d/%(accounts)d accounts, %(trades_created)d new trades, "
+        "%(connections)d connections, %(authorizations)d authorizations", summary
+    )
+    return summary
+
+
+class TradeSyncWorker:
+    """Daemon thread that runs ``run_sync_cycle`` every ``CHECK_INTERVAL_SECONDS``."""
+
+    def __init__(self, interval: float = CHECK_INTERVAL_SECONDS, connections: Optional[int] = None):
+        self.interval = interval
+        self.connections = connections
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            logger.warning("Trade sync worker already running")
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="trade-sync-worker")
+        self._thread.start()
+        logger.info("Trade sync worker started (every %ds)", self.interval)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=30)
+        flush_recomputes()
+        logger.info("Trade sync worker stopped")
+
+    def _loop(self):
+        from django.db import close_old_connections
+
+        while not self._stop.is_set():
+            try:
+                run_sync_cycle(connections=self.connections)
+            except Exception as exc:
+                logger.error("Trade sync cycle failed: %s", exc, exc_info=True)
+            finally:
+                close_old_connections()
+            self._stop.wait(self.interval)
+
+
+_worker_instance: Optional[TradeSyncWorker] = None
+
+
+def get_trade_sync_worker() -> TradeSyncWorker:
+    global _worker_instance
+    if _worker_instance is None:
+        _worker_instance = TradeSyncWorker()
+    return _worker_instance
+
+
+def start_trade_sync_worker() -> TradeSyncWorker:
+    worker = get_trade_sync_worker()
+    worker.start()
+    return worker
@@ -1,7 +1,7 @@
 # behavior/tests.py
 # Unit tests for Behavioral Coach Agent
 
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -15,6 +15,9 @@ from .detection import (
     detect_time_based_patterns,
     analyze_all_patterns
 )
+from .pattern_engine import scan_patterns
+from .state import BehaviorState, get_behavior_state, load_state
+from .recompute import RecomputeQueue, calculate_risk_score, recompute_pattern_metrics
 from .tools import (
     analyze_trade_patterns,
     get_trading_statistics,
@@ -257,6 +260,798 @@ class TradePatternAnalysisTest(TestCase):
         self.assertIn(result['highest_severity'], ['low', 'medium', 'high'])
 
 
+class PatternEngineEquivalenceTest(TestCase):
+    """The single-pass engine must reproduce every per-detector result exactly."""
+
+    def _legacy(self, trades):
+        return {
+            'revenge_trading': detect_revenge_trading(trades),
+            'loss_chasing': detect_loss_chasing(trades),
+            'time_patterns': detect_time_based_patterns(trades),
+        }
+
+    def _assert_same(self, trades):
+        expected = self._legacy(trades)
+        actual = scan_patterns(trades)
+        self.assertEqual(actual, expected)
+        # Key order and hour order matter for the JSON the frontend renders
+        self.assertEqual(json.dumps(actual, default=str), json.dumps(expected, default=str))
+
+    def test_randomized_histories(self):
+        import random
+        rng = random.Random(41)
+        base = timezone.now().replace(microsecond=0)
+        for _ in range(300):
+            opened_at = base
+            trades = []
+            for _ in range(rng.randint(0, 40)):
+                # Coarse steps produce same-time ties and exact 10-minute windows
+                opened_at += timedelta(minutes=rng.choice([0, 1, 5, 10, 10, 30, 180]))
+                pnl = rng.choice([-100, -50, -25, 0, 0.0, 25, 80, rng.uniform(-200, 200)])
+                trades.append({'opened_at': opened_at, 'pnl': pnl, 'instrument': 'EUR/USD'})
+            rng.shuffle(trades)
+            self._assert_same(trades)
+
+    def test_decimal_and_missing_pnl(self):
+        now = timezone.now()
+        trades = [
+            {'opened_at': now, 'pnl': Decimal('-10.50')},
+            {'opened_at': now + timedelta(minutes=1), 'pnl': Decimal('-15.75')},
+            {'opened_at': now + timedelta(minutes=2)},
+            {'opened_at': now + timedelta(minutes=3), 'pnl': Decimal('-40')},
+        ]
+        self._assert_same(trades)
+
+    def test_analyze_all_patterns_uses_engine_results(self):
+        now = timezone.now()
+        trades = [{'opened_at': now + timedelta(minutes=i), 'pnl': -10 * (i + 1)} for i in range(5)]
+        result = analyze_all_patterns(trades, user_avg_daily_trades=2)
+        for key, value in self._legacy(trades).items():
+            self.assertEqual(result[key], value)
+        self.assertEqual(result['overtrading'], detect_overtrading(trades, 2))
+
+
+class BehaviorStateTest(TestCase):
+    """Incremental state must agree with a full re-analysis of the day."""
+
+    def test_streaming_matches_full_analysis(self):
+        import random
+        rng = random.Random(42)
+        day_start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        for _ in range(200):
+            opened_at = day_start
+            trades = []
+            for _ in range(rng.randint(0, 30)):
+                # Distinct times: the table gives no order to same-time trades
+                opened_at += timedelta(minutes=rng.choice([1, 3, 5, 10, 45]))
+                if opened_at.date() != day_start.date():
+                    break
+                pnl = rng.choice([-100.0, -60.0, -20.0, 0.0, 30.0, rng.uniform(-150, 150)])
+                trades.append({'opened_at': opened_at, 'pnl': pnl, 'is_mock': True})
+
+            state = BehaviorState(user_id='u', trading_date=day_start.date(), avg_daily_trades=5)
+            for trade in trades:
+                state.apply(trade['opened_at'], trade['pnl'])
+            # get_recent_trades hands the detectors the newest trade first
+            expected = analyze_all_patterns(trades[::-1], user_avg_daily_trades=5)
+            self.assertEqual(json.dumps(state.patterns(), default=str), json.dumps(expected, default=str))
+
+    def test_new_trades_update_cached_state(self):
+        user = UserProfile.objects.create(email='state@tradeiq.com', name='State')
+        now = timezone.now().replace(hour=12, minute=0)
+        for i, pnl in enumerate(['-50', '-80', '20']):
+            Trade.objects.create(user=user, instrument='EUR/USD', pnl=Decimal(pnl),
+                                 opened_at=now + timedelta(minutes=i), is_mock=True)
+
+        state = load_state(str(user.id), now.date())
+        self.assertEqual(state.trade_count, 3)
+        self.assertTrue(state.patterns()['revenge_trading']['detected'])
+
+        # An out-of-order trade forces a rebuild from the table
+        Trade.objects.create(user=user, instrument='EUR/USD', pnl=Decimal('-10'),
+                             opened_at=now - timedelta(hours=1), is_mock=False)
+        state = get_behavior_state(str(user.id), now.date())
+        self.assertEqual(state.trade_count, 4)
+        self.assertEqual(state.patterns()['data_source'], 'real')
+        self.assertEqual(state.revenge['trigger_at'], now)
+
+    def test_state_rechecked_against_table(self):
+        user = UserProfile.objects.create(email='stale@tradeiq.com', name='Stale')
+        now = timezone.now().replace(hour=12, minute=0)
+        Trade.objects.create(user=user, instrument='EUR/USD', pnl=Decimal('-50'), opened_at=now)
+
+        # Written by another process (no signal reaches this cache)
+        Trade.objects.bulk_create([
+            Trade(user=user, instrument='EUR/USD', pnl=Decimal('-60'), opened_at=now + timedelta(minutes=1)),
+        ])
+        self.assertEqual(get_behavior_state(str(user.id), now.date()).trade_count, 2)
+
+        # A concurrent update lost from the cache is replayed on the next trade
+        Trade.objects.bulk_create([
+            Trade(user=user, instrument='EUR/USD', pnl=Decimal('-70'), opened_at=now + timedelta(minutes=2)),
+        ])
+        Trade.objects.create(user=user, instrument='EUR/USD', pnl=Decimal('10'), opened_at=now + timedelta(minutes=3))
+        state = load_state(str(user.id), now.date())
+        self.assertEqual((state.trade_count, state.loss_count), (4, 3))
+        self.assertTrue(state.patterns()['revenge_trading']['detected'])
+
+    def test_runs_across_midnight_are_detected(self):
+        user = UserProfile.objects.create(email='midnight@tradeiq.com', name='Midnight')
+        midnight = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        for minutes, pnl in [(-90, '-5'), (-60, '30'), (-30, '-10'), (-4, '-20')]:
+            Trade.objects.create(user=user, instrument='EUR/USD', pnl=Decimal(pnl),
+                                 opened_at=midnight + timedelta(minutes=minutes))
+        for minutes, pnl in [(1, '-40'), (3, '-60')]:
+            Trade.objects.create(user=user, instrument='EUR/USD', pnl=Decimal(pnl),
+                                 opened_at=midnight + timedelta(minutes=minutes))
+
+        state = get_behavior_state(str(user.id), midnight.date())
+        self.assertEqual(state.trade_count, 2)
+        patterns = state.patterns()
+        self.assertTrue(patterns['revenge_trading']['detected'])
+        self.assertEqual(state.revenge['trigger_at'], midnight - timedelta(minutes=4))
+        # The losing run started before midnight, after the last win
+        self.assertEqual(patterns['loss_chasing']['consecutive_losses'], 4)
+
+
+class DailyMetricSignalTest(TestCase):
+    """post_save keeps counts current and defers the pattern/risk recompute."""
+
+    def setUp(self):
+        self.user = UserProfile.objects.create(email='signal@tradeiq.com', name='Signal')
+        self.now = timezone.now().replace(hour=9, minute=0)
+
+    def test_counts_written_and_recompute_coalesced(self):
+        from unittest.mock import patch
+
+        with patch('behavior.signals.schedule_recompute') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                for i, (pnl, duration) in enumerate([('-40', 60), ('-90', None), ('25', 120)]):
+                    Trade.objects.create(user=self.user, instrument='EUR/USD', pnl=Decimal(pnl),
+                                         duration_seconds=duration, is_mock=True,
+                                         opened_at=self.now + timedelta(minutes=i))
+
+        metric = BehavioralMetric.objects.get(user=self.user, trading_date=self.now.date())
+        self.assertEqual((metric.total_trades, metric.win_count, metric.loss_count), (3, 1, 2))
+        self.assertEqual(metric.avg_hold_time, 90.0)
+        self.assertEqual(metric.pattern_flags, {})  # not recomputed yet
+        schedule.assert_called_with(str(self.user.id), self.now.date())
+
+        self.assertTrue(recompute_pattern_metrics(str(self.user.id), self.now.date()))
+        metric.refresh_from_db()
+        self.assertTrue(metric.pattern_flags['revenge_trading'])
+        self.assertTrue(metric.pattern_flags['loss_chasing'])  # $40 -> $90
+        self.assertEqual(metric.emotional_state, 'distressed')
+        patterns = get_behavior_state(str(self.user.id), self.now.date()).patterns()
+        self.assertEqual(metric.risk_score, calculate_risk_score(patterns))
+
+    def test_queue_runs_one_recompute_per_burst(self):
+        runs = []
+        queue = RecomputeQueue(runner=lambda user_id, day: runs.append((user_id, day)), delay=2.0, max_wait=30.0)
+        day = self.now.date()
+        queue._ensure_thread = lambda: None  # drive the queue by hand
+        # 50 trades spread over 10 seconds: each one pushes the recompute back
+        for i in range(50):
+            queue.schedule('u1', day, now=100.0 + i * 0.2)
+            self.assertEqual(queue.run_due(now=100.0 + i * 0.2), 0)
+        queue.schedule('u2', day, now=110.0)
+
+        self.assertEqual(queue.run_due(now=111.7), 0)
+        self.assertEqual(queue.run_due(now=111.8), 1)  # 2s after the last trade
+        self.assertEqual(queue.flush(), 1)
+        self.assertEqual(runs, [('u1', day), ('u2', day)])
+        self.assertEqual((queue.scheduled, queue.executed), (51, 2))
+
+    def test_queue_debounce_is_capped_by_max_wait(self):
+        runs = []
+        queue = RecomputeQueue(runner=lambda user_id, day: runs.append(user_id), delay=2.0, max_wait=10.0)
+        queue._ensure_thread = lambda: None
+        for second in range(30):  # a trade every second never goes quiet
+            queue.schedule('u1', self.now.date(), now=100.0 + second)
+            queue.run_due(now=100.0 + second)
+        self.assertEqual(len(runs), 2)  # at 110 and 121
+
+
+class RecomputeFlushTest(TransactionTestCase):
+    """One-shot commands run the recomputes they queued before returning."""
+
+    def test_seed_demo_leaves_risk_scores_set(self):
+        from unittest.mock import patch
+        from django.core.management import call_command
+        from demo.management.commands.seed_demo import DEMO_USER_ID
+
+        queue = RecomputeQueue(delay=2.0, max_wait=10.0)
+        queue._ensure_thread = lambda: None  # only the command's flush runs it
+        with patch('behavior.recompute._queue', queue):
+            call_command('seed_demo', quiet=True)
+
+        self.assertEqual(queue.pending(), 0)
+        metrics = list(BehavioralMetric.objects.filter(user_id=DEMO_USER_ID))
+        self.assertTrue(metrics)
+        for metric in metrics:
+            self.assertIsNotNone(metric.risk_score)
+            self.assertNotEqual(metric.emotional_state, '')
+            self.assertTrue(metric.pattern_flags)
+
+
+class TradeUpsertTest(TestCase):
+    """Deriv sync upserts on (user, contract_id) in bulk."""
+
+    def setUp(self):
+        self.user = UserProfile.objects.create(email='sync@tradeiq.com', name='Sync')
+        self.opened = timezone.now().replace(hour=10, minute=0, second=0, microsecond=0)
+
+    def _deriv_trade(self, contract_id, pnl, minutes=0):
+        return {
+            'contract_id': contract_id,
+            'instrument': 'R_100',
+            'direction': 'LONG',
+            'pnl': Decimal(pnl),
+            'entry_price': Decimal('10'),
+            'exit_price': Decimal('10') + Decimal(pnl),
+            'opened_at': self.opened + timedelta(minutes=minutes),
+            'closed_at': self.opened + timedelta(minutes=minutes, seconds=30),
+            'duration_seconds': 30,
+        }
+
+    def test_resync_updates_in_place_without_duplicates(self):
+        from .trade_sync import upsert_deriv_trades
+
+        batch = [self._deriv_trade(1000 + i, '-2' if i % 2 else '3', minutes=i) for i in range(1200)]
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            result = upsert_deriv_trades(self.user, batch, chunk_size=500)
+        self.assertLess(len(queries), 60)  # was two per trade
+        self.assertEqual((result['trades_created'], result['trades_updated']), (1200, 0))
+
+        batch[0]['pnl'] = Decimal('-7')
+        result = upsert_deriv_trades(self.user, batch[:10] + [{'transaction_id': 9}])
+        self.assertEqual((result['trades_created'], result['trades_updated']), (0, 10))
+        self.assertEqual(len(result['errors']), 1)
+        self.assertEqual(Trade.objects.filter(user=self.user).count(), 1200)
+        self.assertEqual(Trade.objects.get(user=self.user, contract_id=1000).pnl, Decimal('-7'))
+
+        # One refresh per day instead of a post_save per row
+        metric = BehavioralMetric.objects.get(user=self.user, trading_date=self.opened.date())
+        self.assertEqual(metric.total_trades, Trade.objects.filter(
+            user=self.user, opened_at__date=self.opened.date()).count())
+
+    def test_cached_state_refreshed_only_after_commit(self):
+        from .trade_sync import upsert_deriv_trades
+
+        upsert_deriv_trades(self.user, [self._deriv_trade(1, '3')])
+        day = self.opened.date()
+        self.assertEqual(get_behavior_state(str(self.user.id), day).trade_count, 1)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            upsert_deriv_trades(self.user, [self._deriv_trade(2, '5', minutes=1)])
+            # Not committed yet: the cached state is left alone
+            self.assertEqual(load_state(str(self.user.id), day).trade_count, 1)
+        for callback in callbacks:
+            callback()
+        # Only new contracts: appended to the cached state, not dropped
+        self.assertEqual(load_state(str(self.user.id), day).trade_count, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            upsert_deriv_trades(self.user, [self._deriv_trade(1, '-4')])
+        self.assertIsNone(load_state(str(self.user.id), day))  # a rewritten row drops the day
+        state = get_behavior_state(str(self.user.id), day)
+        self.assertEqual((state.trade_count, state.loss_count), (2, 1))
+
+    def test_trades_synced_before_contract_ids_are_adopted(self):
+        from .trade_sync import upsert_deriv_trades
+
+        td = self._deriv_trade(42, '5')
+        legacy = Trade.objects.create(
+            user=self.user, instrument=td['instrument'], direction=td['direction'], pnl=td['pnl'],
+            entry_price=td['entry_price'], opened_at=td['opened_at'], is_mock=False,
+        )
+        result = upsert_deriv_trades(self.user, [td])
+        self.assertEqual(result['trades_updated'], 1)
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.contract_id, 42)
+        self.assertEqual(Trade.objects.filter(user=self.user).count(), 1)
+
+
+class IncrementalTradeSyncTest(TestCase):
+    """Repeat syncs resume from the account's watermark."""
+
+    def setUp(self):
+        self.user = UserProfile.objects.create(email='watermark@tradeiq.com', name='Watermark')
+        self.now = int(timezone.now().timestamp())
+        self.server = []  # profit_table rows on the fake Deriv account
+        self.requests = []
+
+    def _sell(self, contract_id, seconds_ago, pnl='1'):
+        from datetime import timezone as dt_timezone
+
+        sold = datetime.fromtimestamp(self.now - seconds_ago, tz=dt_timezone.utc)
+        self.server.append({
+            'contract_id': contract_id, 'transaction_id': contract_id * 10, 'instrument': 'R_100',
+            'direction': 'LONG', 'pnl': Decimal(pnl), 'entry_price': Decimal('10'),
+            'exit_price': Decimal('11'), 'opened_at': sold - timedelta(minutes=1),
+            'closed_at': sold, 'duration_seconds': 60,
+        })
+
+    def _fake_client(self):
+        import asyncio
+        test = self
+
+        class FakeDerivClient:
+            app_id = '1'
+            _run_async = staticmethod(asyncio.run)
+
+            def __init__(self, app_id=None):
+                pass
+
+            async def connect(self):
+                pass
+
+            async def disconnect(self):
+                pass
+
+            async def authorize(self, api_token):
+                return {'loginid': 'CR900001'}
+
+            async def fetch_all_trades(self, api_token=None, days_back=30, date_from=None):
+                test.requests.append(date_from)
+                return [t for t in test.server if int(t['closed_at'].timestamp()) >= date_from]
+
+        return FakeDerivClient
+
+    def _sync(self, days_back=30):
+        from unittest.mock import patch
+        from .trade_sync import sync_trades_for_user
+
+        with patch('behavior.trade_sync.DerivClient', self._fake_client()):
+            return sync_trades_for_user(str(self.user.id), 'token', days_back=days_back)
+
+    def test_second_sync_only_fetches_after_watermark(self):
+        from .models import TradeSyncWatermark
+
+        self._sell(1, 5 * 86400)
+        self._sell(2, 3600)
+        first = self._sync()
+        self.assertFalse(first['incremental'])
+        self.assertEqual(first['trades_created'], 2)
+
+        self._sell(3, 60)
+        second = self._sync()
+        self.assertTrue(second['incremental'])
+        self.assertEqual(second['date_from'], self.now - 3600)
+        self.assertEqual((second['trades_fetched'], second['trades_created'], second['trades_updated']), (2, 1, 0))
+
+        mark = TradeSyncWatermark.objects.get(user=self.user, account_id='CR900001')
+        self.assertEqual((mark.last_sell_time, mark.last_transaction_id), (self.now - 60, 30))
+
+        # Asking for more history than was ever synced backfills the window
+        third = self._sync(days_back=60)
+        self.assertFalse(third['incremental'])
+        self.assertEqual(Trade.objects.filter(user=self.user).count(), 3)
+
+    def test_concurrent_sync_of_new_account_keeps_newest_watermark(self):
+        from .models import TradeSyncWatermark
+        from .trade_sync import store_fetched_trades
+
+        self._sell(1, 3600)
+        self._sell(2, 60)
+        window_from = self.now - 30 * 86400
+        # The scheduler stored the newer sell after this view sync found no watermark
+        store_fetched_trades(self.user, 'CR900001', window_from, window_from, self.server[1:])
+        result = store_fetched_trades(self.user, 'CR900001', window_from, window_from, self.server[:1])
+
+        self.assertEqual(result['trades_created'], 1)
+        mark = TradeSyncWatermark.objects.get(user=self.user, account_id='CR900001')
+        self.assertEqual((mark.last_sell_time, mark.last_transaction_id), (self.now - 60, 20))
+
+
+class DerivPipelineTest(TestCase):
+    """profit_table pages share one socket, matched to requests by req_id."""
+
+    def setUp(self):
+        from tradeiq.rate_limit import reset_rate_limits
+
+        reset_rate_limits()
+
+    def _socket(self, rows, on_answer=None):
+        import asyncio
+
+        class FakeSocket:
+            """Answers profit_table pages out of order, later offsets first."""
+            closed = False
+
+            def __init__(self):
+                self.inbox = asyncio.Queue()
+                self.in_flight = 0
+                self.max_in_flight = 0
+                self.offsets = []
+
+            async def send(self, text):
+                request = json.loads(text)
+                if 'authorize' in request:
+                    await self.inbox.put({'req_id': request['req_id'], 'authorize': {'loginid': 'CR1'}})
+                    return
+                self.offsets.append(request['offset'])
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                asyncio.get_running_loop().create_task(self._answer(request))
+
+            async def _answer(self, request):
+                await asyncio.sleep(0.001 * (10 - request['offset'] // 500 % 10))
+                page = rows[request['offset']:request['offset'] + request['limit']]
+                self.in_flight -= 1
+                if on_answer:
+                    on_answer(request['offset'])
+                await self.inbox.put({
+                    'echo_req': request, 'req_id': request['req_id'],
+                    'profit_table': {'transactions': page},
+                })
+
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                return json.dumps(await self.inbox.get())
+
+            async def close(self):
+                pass
+
+        return FakeSocket()
+
+    def _rows(self, count):
+        start = int(timezone.now().timestamp())
+        return [{
+            'contract_id': 10_000 - i, 'transaction_id': 20_000 - i,
+            'shortcode': 'CALL_R_100_10_1_2_S0P_0', 'buy_price': 10, 'sell_price': 11,
+            'purchase_time': start - 60 * i - 30, 'sell_time': start - 60 * i,
+        } for i in range(count)]
+
+    def _fetch(self, rows, on_answer=None):
+        import asyncio
+        from .deriv_client import DerivClient
+
+        async def run():
+            client = DerivClient(app_id='1', api_token='token')
+            client.websocket = socket = self._socket(rows, on_answer)
+            try:
+                return await client.fetch_all_trades(date_from=0), socket
+            finally:
+                await client.disconnect()
+
+        return asyncio.run(run())
+
+    def test_pages_in_flight_together_and_kept_in_order(self):
+        rows = self._rows(3 * 500 + 120)
+        trades, socket = self._fetch(rows)
+
+        self.assertEqual([t['contract_id'] for t in trades], [r['contract_id'] for r in rows])
+        self.assertGreater(socket.max_in_flight, 1)
+        self.assertEqual(socket.offsets[:2], [0, 450])  # pages overlap by 50 rows
+
+    def test_short_first_page_is_one_request(self):
+        trades, socket = self._fetch(self._rows(40))
+        self.assertEqual(len(trades), 40)
+        self.assertEqual(socket.offsets, [0])
+
+    def test_duplicates_across_pages_are_dropped(self):
+        rows = self._rows(1000)
+        rows.insert(500, rows[499])
+        trades, _ = self._fetch(rows)
+        self.assertEqual(len(trades), 1000)
+
+    def test_rows_closing_between_requests_are_not_skipped(self):
+        rows = self._rows(2000)
+        original = [r['contract_id'] for r in rows]
+        newer = [dict(rows[0], contract_id=50_000 + i, transaction_id=60_000 + i) for i in range(60)]
+
+        answered = []
+
+        def close_trades(offset):
+            # Later offsets are served first: 60 trades close after the last
+            # two pages of the window are answered, shifting the first two
+            answered.append(offset)
+            if len(answered) == 3:
+                rows[0:0] = newer
+
+        trades, socket = self._fetch(rows, on_answer=close_trades)
+
+        fetched = [t['contract_id'] for t in trades]
+        self.assertEqual(len(fetched), len(set(fetched)))
+        self.assertEqual([c for c in fetched if c in set(original)], original)
+        self.assertGreater(len(socket.offsets), 1 + 4)  # re-fetched after the gap
+
+
+class TradeSyncSchedulerTest(TestCase):
+    """Scheduled sync plans due accounts and reuses authorized sockets."""
+
+    def setUp(self):
+        import os
+        from unittest.mock import patch
+
+        env = patch.dict(os.environ, {'DERIV_ENCRYPTION_KEY': '11' * 32})
+        env.start()
+        self.addCleanup(env.stop)
+        self.now = int(timezone.now().timestamp())
+        self.log = []  # ('connect' | 'authorize' | 'fetch', token)
+
+    def _account(self, email, login_id, token, trade_age=None):
+        from deriv_auth.models import DerivAccount
+
+        user = UserProfile.objects.create(email=email, name=email)
+        account = DerivAccount(user=user, deriv_login_id=login_id, account_type='real', currency='USD')
+        account.token = token
+        account.save()
+        # Linked long ago; recency comes from trading
+        DerivAccount.objects.filter(pk=account.pk).update(updated_at=timezone.now() - timedelta(days=10))
+        if trade_age is not None:
+            Trade.objects.create(
+                user=user, instrument='R_100', direction='LONG', pnl=Decimal('1'), is_mock=False,
+                opened_at=timezone.now() - trade_age,
+            )
+        return account
+
+    def _fake_client(self):
+        from datetime import timezone as dt_timezone
+        test = self
+
+        class FakeDerivClient:
+            def __init__(self, app_id=None):
+                self._authorized_token = None
+                self.account = {}
+
+            async def connect(self):
+                test.log.append(('connect', None))
+
+            async def disconnect(self):
+                pass
+
+            async def authorize(self, api_token):
+                test.log.append(('authorize', api_token))
+                self._authorized_token = api_token
+                self.account = {'loginid': 'CR' + api_token.rsplit('-', 1)[-1]}
+                return self.account
+
+            async def fetch_all_trades(self, api_token=None, days_back=30, date_from=None):
+                test.log.append(('fetch', api_token))
+                sold = datetime.fromtimestamp(test.now - 60, tz=dt_timezone.utc)
+                cid = int(api_token.rsplit('-', 1)[-1])
+                return [{
+                    'contract_id': cid, 'transaction_id': cid * 10, 'instrument': 'R_100',
+                    'direction': 'LONG', 'pnl': Decimal('2'), 'entry_price': Decimal('10'),
+                    'exit_price': Decimal('12'), 'opened_at': sold - timedelta(minutes=1),
+                    'closed_at': sold, 'duration_seconds': 60,
+                }]
+
+        return FakeDerivClient
+
+    def test_plan_puts_active_users_first_and_skips_fresh_accounts(self):
+        from .models import TradeSyncWatermark
+        from .sync_scheduler import plan_sync
+
+        idle = self._account('idle@tradeiq.com', 'CR1', 'tok-1', trade_age=timedelta(days=5))
+        self._account('active@tradeiq.com', 'CR2', 'tok-2', trade_age=timedelta(hours=1))
+        fresh = self._account('fresh@tradeiq.com', 'CR3', 'tok-3', trade_age=timedelta(hours=2))
+        TradeSyncWatermark.objects.create(
+            user=fresh.user, account_id='CR3', synced_from=0, last_synced_at=timezone.now()
+        )
+        # An idle account's watermark ages out after an hour, not five minutes
+        TradeSyncWatermark.objects.create(
+            user=idle.user, account_id='CR1', synced_from=0, last_sell_time=self.now - 600,
+            last_synced_at=timezone.now() - timedelta(minutes=30)
+        )
+
+        self.assertEqual([job.account_id for job in plan_sync(now=self.now)], ['CR2'])
+        later = plan_sync(now=self.now + 3600)
+        self.assertEqual([job.account_id for job in later], ['CR2', 'CR3', 'CR1'])
+        self.assertEqual(later[-1].date_from, self.now - 600)  # resumes from the watermark
+
+    def test_cycle_shares_sockets_and_authorizes_once_per_token(self):
+        from unittest.mock import patch
+        from .models import TradeSyncWatermark
+        from .sync_scheduler import run_sync_cycle
+
+        self._account('a@tradeiq.com', 'CR7', 'tok-7', trade_age=timedelta(hours=1))
+        self._account('b@tradeiq.com', 'CR8', 'tok-8')
+        # Same token linked by two users: one authorization serves both
+        self._account('c@tradeiq.com', 'CR7', 'tok-7')
+
+        with patch('behavior.sync_scheduler.DerivClient', self._fake_client()):
+            summary = run_sync_cycle(connections=1)
+
+        self.assertEqual((summary['accounts'], summary['synced'], summary['failed']), (3, 3, 0))
+        self.assertEqual(summary['trades_created'], 3)
+        self.assertEqual((summary['connections'], summary['authorizations']), (1, 2))
+        self.assertEqual([t for kind, t in self.log if kind == 'authorize'], ['tok-7', 'tok-8'])
+        self.assertEqual(TradeSyncWatermark.objects.filter(last_sell_time=self.now - 60).count(), 3)
+
+        with patch('behavior.sync_scheduler.DerivClient', self._fake_client()):
+            self.assertEqual(run_sync_cycle(connections=1)['accounts'], 0)
+
+    def test_socket_error_fails_one_account_and_reconnects(self):
+        import asyncio
+        from unittest.mock import patch
+        from .sync_scheduler import SyncJob, fetch_jobs
+
+        base = self._fake_client()
+
+        class DroppingClient(base):
+            async def fetch_all_trades(self, api_token=None, days_back=30, date_from=None):
+                if api_token == 'tok-1':
+                    raise ConnectionResetError('socket closed')
+                if api_token == 'tok-2':
+                    raise ValueError('bad JSON')
+                return await super().fetch_all_trades(api_token, days_back, date_from)
+
+        jobs = [
+            SyncJob(user_id=str(i), account_id=f"CR{i}", token=f"tok-{i}", window_from=0, date_from=0)
+            for i in (1, 2, 3)
+        ]
+        results = []
+        with patch('behavior.sync_scheduler.DerivClient', DroppingClient):
+            stats = asyncio.run(fetch_jobs(jobs, results.append, connections=1))
+
+        errors = {r.job.account_id: r.error for r in results}
+        self.assertEqual(set(errors), {'CR1', 'CR2', 'CR3'})
+        self.assertIn('ConnectionResetError', errors['CR1'])
+        self.assertIn('ValueError', errors['CR2'])
+        self.assertIsNone(errors['CR3'])
+        # Each failure dropped the socket; the next account got a fresh one
+        self.assertEqual(stats['connections'], 3)
+        self.assertEqual(len([t for kind, t in self.log if kind == 'connect']), 3)
+
+
+class LiveTradeIngestTest(TestCase):
+    """Stream sells become upserted trades, extend the cached state and reconnect on drop."""
+
+    def setUp(self):
+        from datetime import timezone as dt_timezone
+
+        self.user = UserProfile.objects.create(email='live@tradeiq.com', name='Live')
+        self.day = datetime(2025, 3, 3, tzinfo=dt_timezone.utc)
+        self.server = []  # profit_table rows on the fake account
+
+    def _row(self, contract_id, minute, pnl):
+        opened = self.day + timedelta(hours=10, minutes=minute)
+        return {
+            'contract_id': contract_id, 'transaction_id': contract_id * 10, 'instrument': 'R_100',
+            'direction': 'LONG', 'pnl': Decimal(pnl), 'entry_price': Decimal('10'),
+            'exit_price': Decimal('10') + Decimal(pnl), 'opened_at': opened,
+            'closed_at': opened + timedelta(seconds=30), 'duration_seconds': 30,
+        }
+
+    def _account(self, resume_from=0):
+        from .live_ingest import IngestAccount
+
+        return IngestAccount(str(self.user.id), 'CR42', 'tok-42', resume_from)
+
+    def test_flush_upserts_extends_state_and_narrates_newest(self):
+        from unittest.mock import patch
+        from .live_ingest import IngestBatch, TradeIngestService
+        from .models import TradeSyncWatermark
+
+        Trade.objects.create(
+            user=self.user, instrument='R_100', direction='LONG', pnl=Decimal('-5'),
+            opened_at=self.day + timedelta(hours=9), is_mock=False,
+        )
+        self.assertEqual(get_behavior_state(str(self.user.id), self.day.date()).trade_count, 1)
+
+        service = TradeIngestService(max_accounts=1)
+        rows = [self._row(1, 0, '-3'), self._row(2, 2, '4')]
+        service._batches.put(IngestBatch(self._account(), int(self.day.timestamp()), rows))
+        with patch('behavior.narrator.narrate_trade_event') as narrate, \
+                patch('behavior.tools.generate_behavioral_nudge_with_ai') as nudge, \
+                self.captureOnCommitCallbacks(execute=True):
+            created = service.flush()
+
+        self.assertEqual(created, 2)
+        self.assertEqual(Trade.objects.filter(user=self.user).count(), 3)
+        state = load_state(str(self.user.id), self.day.date())
+        self.assertIsNotNone(state)
+        self.assertEqual((state.trade_count, state.loss_count), (3, 2))
+        narrate.assert_called_once()
+        self.assertEqual(narrate.call_args.kwargs['trade_data']['pnl'], '4')
+        nudge.assert_not_called()
+        mark = TradeSyncWatermark.objects.get(user=self.user, account_id='CR42')
+        self.assertEqual(mark.last_transaction_id, 20)
+
+        # The same rows again are below the watermark: nothing new, no narration
+        service._batches.put(IngestBatch(self._account(), int(self.day.timestamp()) + 36000, rows))
+        with patch('behavior.narrator.narrate_trade_event') as narrate:
+            self.assertEqual(service.flush(), 0)
+        narrate.assert_not_called()
+
+    def test_stream_fetches_on_sell_and_resubscribes_after_drop(self):
+        import asyncio
+        from unittest.mock import patch
+        from .live_ingest import TradeIngestService
+
+        test = self
+        calls = {'subscribe': 0, 'fetch': []}
+
+        class FakeDerivClient:
+            def __init__(self, app_id=None):
+                pass
+
+            async def connect(self):
+                pass
+
+            async def authorize(self, api_token):
+                return {'loginid': 'CR42'}
+
+            async def disconnect(self):
+                pass
+
+            async def subscribe_to_transactions(self, callback, api_token=None, actions=None):
+                calls['subscribe'] += 1
+                if calls['subscribe'] == 1:
+                    test.server.append(test._row(7, 5, '-2'))
+                    await callback({'contract_id': 7})
+                    await asyncio.sleep(0.01)
+                    return  # the socket drops
+                calls['resubscribed'].set()
+                await asyncio.Event().wait()
+
+            async def fetch_all_trades(self, api_token=None, days_back=30, date_from=None):
+                calls['fetch'].append(date_from)
+                return [r for r in test.server if int(r['closed_at'].timestamp()) >= date_from]
+
+        async def run():
+            calls['resubscribed'] = asyncio.Event()
+            service = TradeIngestService(batch_window=0, reconnect_delay=0)
+            account = self._account(resume_from=int(self.day.timestamp()))
+            task = asyncio.ensure_future(service.stream_account(account))
+            await asyncio.wait_for(calls['resubscribed'].wait(), timeout=5)
+            await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            return service, account
+
+        with patch('behavior.live_ingest.DerivClient', FakeDerivClient):
+            service, account = asyncio.run(run())
+
+        self.assertEqual(calls['subscribe'], 2)
+        batch = service._batches.get_nowait()
+        self.assertEqual([r['contract_id'] for r in batch.trades], [7])
+        # After the drop the catch-up fetch resumes from the stored sell_time
+        self.assertEqual(account.resume_from, int(self._row(7, 5, '-2')['closed_at'].timestamp()))
+        self.assertEqual(calls['fetch'][-1], account.resume_from)
+
+
+class TradeHotPathIndexTest(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create(email="idx@test.com", name="Idx")
+
+    def test_opened_on_matches_date_lookup(self):
+        day = timezone.now().date() - timedelta(days=2)
+        start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        for offset in (timedelta(seconds=-1), timedelta(0), timedelta(hours=23, minutes=59, seconds=59), timedelta(days=1)):
+            Trade.objects.create(user=self.user, instrument="R_100", pnl=Decimal("1"), opened_at=start + offset)
+
+        by_range = set(Trade.objects.filter(user=self.user).opened_on(day).values_list("id", flat=True))
+        by_date = set(Trade.objects.filter(user=self.user, opened_at__date=day).values_list("id", flat=True))
+        self.assertEqual(by_range, by_date)
+        self.assertEqual(len(by_range), 2)
+        self.assertEqual(Trade.objects.filter(user=self.user).opened_since(day).count(), 3)
+
+    def test_audit_passes_on_seeded_table_and_rolls_back(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command("audit_trade_queries", trades=3000, users=30, stdout=out)
+        self.assertIn("No sequential scans on trades", out.getvalue())
+        self.assertEqual(Trade.objects.count(), 0)
+        self.assertEqual(UserProfile.objects.count(), 1)
+
+    def test_explain_flags_unindexed_filter(self):
+        from .management.commands.audit_trade_queries import explain
+
+        _, scans = explain("SELECT \"id\" FROM \"trades\" WHERE \"instrument\" = 'R_100'")
+        self.assertTrue(scans)
+
+
 class TradingStatisticsTest(TestCase):
     """Test trading statistics calculation."""
     
@@ -297,6 +1092,41 @@ class TradingStatisticsTest(TestCase):
         self.assertEqual(stats['loss_count'], 3)
         self.assertEqual(stats['win_rate'], 62.5)
         self.assertEqual(stats['total_pnl'], 350.0)
+        self.assertEqual((stats['avg_win'], stats['avg_loss']), (100.0, -50.0))
+        self.assertEqual((stats['best_instrument'], stats['worst_instrument']), ('EUR/USD', 'EUR/USD'))
+
+    def test_statistics_are_cached_until_a_trade_is_saved(self):
+        """Two queries when computed, none when cached; saving or deleting a trade invalidates."""
+        now = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            for i, (instrument, pnl) in enumerate([('R_100', '30'), ('R_100', '-10'), ('R_100', '5'),
+                                                   ('R_50', '-20'), ('R_50', '-25'), ('R_50', '15')]):
+                Trade.objects.create(user=self.user, instrument=instrument, pnl=Decimal(pnl),
+                                     opened_at=now - timedelta(hours=i), is_mock=True)
+
+        with self.assertNumQueries(2):
+            stats = get_trading_statistics(str(self.user.id), days=7)
+        self.assertEqual((stats['best_instrument'], stats['worst_instrument']), ('R_100', 'R_50'))
+        self.assertEqual((stats['avg_win'], stats['avg_loss']), (16.67, -18.33))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_trading_statistics(str(self.user.id), days=7), stats)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Trade.objects.create(user=self.user, instrument='R_50', pnl=Decimal('100'),
+                                 opened_at=now, is_mock=True)
+        refreshed = get_trading_statistics(str(self.user.id), days=7)
+        self.assertEqual(refreshed['total_trades'], 7)
+        self.assertEqual(refreshed['best_instrument'], 'R_50')
+
+        # Deleting a trade (TradeViewSet allows DELETE) invalidates too
+        with self.captureOnCommitCallbacks(execute=True):
+            Trade.objects.filter(user=self.user, pnl=Decimal('100')).get().delete()
+        self.assertEqual(get_trading_statistics(str(self.user.id), days=7), stats)
+
+    def test_unknown_user(self):
+        import uuid
+
+        self.assertEqual(get_trading_statistics(str(uuid.uuid4())), {'error': 'User not found'})
 
 
 class BehavioralMetricTest(TestCase):
@@ -3,12 +3,15 @@
 
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q, Sum
 from django.utils import timezone
 from .models import UserProfile, Trade, BehavioralMetric
 from .detection import analyze_all_patterns
 from agents.llm_client import get_llm_client
 import json
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -88,7 +91,20 @@ def analyze_trade_patterns(user_id: str, hours: int = 24) -> Dict[str, Any]:
             trade_copy['closed_at'] = datetime.fromisoformat(t['closed_at'])
         trades.append(trade_copy)
     
-    # Get user's average daily trades for overtrading detection
+    avg_daily = get_average_daily_trades(user_id)
+
+    # Determine data source: check if any trade is real (is_mock=False)
+    has_real = any(not t.get('is_mock', True) for t in trades)
+    data_source = "real" if has_real else "demo"
+
+    # Run all pattern detection algorithms
+    patterns = analyze_all_patterns(trades, user_avg_daily_trades=int(avg_daily), data_source=data_source)
+    
+    return summarize_patterns(patterns, trade_count=len(trades), hours=hours)
+
+
+def get_average_daily_trades(user_id: str) -> float:
+    """User's average trades per day over the last 30 days of metrics (8 if unknown)."""
     try:
         user = UserProfile.objects.get(id=user_id)
         recent_metrics = BehavioralMetric.objects.filter(
@@ -97,20 +113,14 @@ def analyze_trade_patterns(user_id: str, hours: int = 24) -> Dict[str, Any]:
         )
         
         if recent_metrics.exists():
-            avg_daily = sum(m.total_trades for m in recent_metrics) / recent_metrics.count()
-        else:
-            avg_daily = 8  # Default assumption
+            return sum(m.total_trades for m in recent_metrics) / recent_metrics.count()
+        return 8  # Default assumption
     except Exception:
-        avg_daily = 8
-    
-    # Determine data source: check if any trade is real (is_mock=False)
-    has_real = any(not t.get('is_mock', True) for t in trades)
-    data_source = "real" if has_real else "demo"
+        return 8
 
-    # Run all pattern detection algorithms
-    patterns = analyze_all_patterns(trades, user_avg_daily_trades=int(avg_daily), data_source=data_source)
-    
-    # Generate summary
+
+def summarize_patterns(patterns: Dict[str, Any], trade_count: int, hours: int = 24) -> Dict[str, Any]:
+    """Wrap analyze_all_patterns output with a summary and the nudge decision."""
     detected_patterns = []
     if patterns['revenge_trading']['detected']:
         detected_patterns.append(f"Revenge trading ({patterns['revenge_trading']['severity']})")
@@ -133,7 +143,7 @@ def analyze_trade_patterns(user_id: str, hours: int = 24) -> Dict[str, Any]:
         'patterns': patterns,
         'summary': summary,
         'needs_nudge': needs_nudge,
-        'trade_count': len(trades),
+        'trade_count': trade_count,
         'time_window': f"{hours} hours"
     }
 
@@ -284,9 +294,27 @@ def generate_behavioral_nudge_fallback(patterns: Dict[str, Any]) -> Dict[str, An
     }
 
 
+STATS_CACHE_TTL_SECONDS = 60
+STATS_VERSION_TTL_SECONDS = 86400
+
+
+def _stats_version_key(user_id: str) -> str:
+    return f"trading_stats_version:{user_id}"
+
+
+def invalidate_trading_statistics(user_id: str) -> None:
+    """Drop every cached get_trading_statistics result for the user (any ``days``)."""
+    cache.delete(_stats_version_key(user_id))
+
+
 def get_trading_statistics(user_id: str, days: int = 30) -> Dict[str, Any]:
     """
     Get comprehensive trading statistics for a user.
+
+    Counts, P&L sum and average win/loss come from one conditional
+    aggregate query and best/worst instrument from one grouped query.
+    Results are cached for STATS_CACHE_TTL_SECONDS per user and ``days``;
+    saving a trade invalidates them (invalidate_trading_statistics).
     
     Args:
         user_id: User UUID
@@ -295,66 +323,80 @@ def get_trading_statistics(user_id: str, days: int = 30) -> Dict[str, Any]:
     Returns:
         Trading stats dict
     """
-    try:
-        user = UserProfile.objects.get(id=user_id)
-        since = timezone.now() - timedelta(days=days)
-        
-        trades = Trade.objects.filter(user=user, opened_at__gte=since)
-        
-        if not trades.exists():
-            return {
-                'total_trades': 0,
-                'win_rate': 0,
-                'total_pnl': 0,
-                'avg_win': 0,
-                'avg_loss': 0,
-                'best_instrument': None,
-                'worst_instrument': None
-            }
-        
-        total_trades = trades.count()
-        winning_trades = trades.filter(pnl__gt=0)
-        losing_trades = trades.filter(pnl__lt=0)
-        
-        win_count = winning_trades.count()
-        loss_count = losing_trades.count()
-        win_rate = (win_count / total_trades * 100) if total_trades > 0 else 0
-        
-        total_pnl = sum(float(t.pnl) for t in trades)
-        avg_win = sum(float(t.pnl) for t in winning_trades) / win_count if win_count > 0 else 0
-        avg_loss = sum(float(t.pnl) for t in losing_trades) / loss_count if loss_count > 0 else 0
-        
-        # Best/worst instruments
-        from django.db.models import Sum, Count
-        instrument_stats = trades.values('instrument').annotate(
+    # Keys carry a per-user version, so one delete invalidates every window
+    version_key = _stats_version_key(user_id)
+    version = cache.get(version_key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(version_key, version, STATS_VERSION_TTL_SECONDS):
+            version = cache.get(version_key, version)
+    cache_key = f"trading_stats:{user_id}:{version}:{days}"
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    since = timezone.now() - timedelta(days=days)
+    trades = Trade.objects.filter(user_id=user_id, opened_at__gte=since)
+    totals = trades.aggregate(
+        total_trades=Count('id'),
+        win_count=Count('id', filter=Q(pnl__gt=0)),
+        loss_count=Count('id', filter=Q(pnl__lt=0)),
+        total_pnl=Sum('pnl'),
+        avg_win=Avg('pnl', filter=Q(pnl__gt=0)),
+        avg_loss=Avg('pnl', filter=Q(pnl__lt=0)),
+    )
+    total_trades = totals['total_trades']
+
+    if not total_trades:
+        if not UserProfile.objects.filter(id=user_id).exists():
+            return {'error': 'User not found'}
+        stats = {
+            'total_trades': 0,
+            'win_rate': 0,
+            'total_pnl': 0,
+            'avg_win': 0,
+            'avg_loss': 0,
+            'best_instrument': None,
+            'worst_instrument': None
+        }
+        cache.set(cache_key, stats, STATS_CACHE_TTL_SECONDS)
+        return stats
+
+    win_count = totals['win_count']
+    loss_count = totals['loss_count']
+    win_rate = win_count / total_trades * 100
+
+    # Best/worst instruments (3+ trades), one row per instrument
+    instrument_stats = list(
+        trades.values('instrument').annotate(
             pnl_sum=Sum('pnl'),
             count=Count('id')
         ).filter(count__gte=3)
-        
-        if instrument_stats:
-            best = max(instrument_stats, key=lambda x: float(x['pnl_sum']))
-            worst = min(instrument_stats, key=lambda x: float(x['pnl_sum']))
-            best_instrument = best['instrument']
-            worst_instrument = worst['instrument']
-        else:
-            best_instrument = None
-            worst_instrument = None
-        
-        return {
-            'total_trades': total_trades,
-            'win_count': win_count,
-            'loss_count': loss_count,
-            'win_rate': round(win_rate, 2),
-            'total_pnl': round(total_pnl, 2),
-            'avg_win': round(avg_win, 2),
-            'avg_loss': round(avg_loss, 2),
-            'best_instrument': best_instrument,
-            'worst_instrument': worst_instrument,
-            'period_days': days
-        }
-        
-    except UserProfile.DoesNotExist:
-        return {'error': 'User not found'}
+    )
+
+    if instrument_stats:
+        best = max(instrument_stats, key=lambda x: float(x['pnl_sum']))
+        worst = min(instrument_stats, key=lambda x: float(x['pnl_sum']))
+        best_instrument = best['instrument']
+        worst_instrument = worst['instrument']
+    else:
+        best_instrument = None
+        worst_instrument = None
+
+    stats = {
+        'total_trades': total_trades,
+        'win_count': win_count,
+        'loss_count': loss_count,
+        'win_rate': round(win_rate, 2),
+        'total_pnl': round(float(totals['total_pnl'] or 0), 2),
+        'avg_win': round(float(totals['avg_win'] or 0), 2),
+        'avg_loss': round(float(totals['avg_loss'] or 0), 2),
+        'best_instrument': best_instrument,
+        'worst_instrument': worst_instrument,
+        'period_days': days
+    }
+    cache.set(cache_key, stats, STATS_CACHE_TTL_SECONDS)
+    return stats
 
 
 def save_behavioral_metric(user_id: str, trading_date: datetime.date, metric_data: Dict[str, Any]) -> bool:
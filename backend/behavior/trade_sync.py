@@ -1,18 +1,137 @@
 """
 Trade Sync — Pull real trades from Deriv and save to the Trade model.
 
-Idempotent: uses (user, instrument, direction, opened_at, entry_price) as
-a natural key to avoid duplicates.  Real trades are always saved with
-is_mock=False and never overwrite or delete existing real trades.
+Idempotent: rows are keyed on (user, contract_id) and written with
+chunked ``bulk_create(update_conflicts=True)`` upserts inside one
+transaction, so a sync costs a handful of queries instead of two per
+trade. Real trades synced before contract_id existed are adopted by their
+old natural key (instrument, direction, opened_at, entry_price) rather
+than duplicated. Real trades are always saved with is_mock=False and are
+never deleted.
+
+Bulk writes skip ``post_save``; each touched trading day gets one count
+refresh and one debounced pattern recompute afterwards (recompute.py).
+Days that only gained new contracts extend their cached behavioral state
+instead of dropping it.
+
+Incremental: a ``TradeSyncWatermark`` per (user, Deriv loginid) records the
+newest sell_time / transaction_id stored. Once an account's watermark
+covers the requested ``days_back`` window, ``profit_table`` is asked only
+for ``date_from`` = the watermark, so a repeat sync is one short page.
 """
 
-from typing import Dict, Any, Optional
-from .models import Trade, UserProfile
+import time
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from django.db import transaction
+from django.utils import timezone
+from .models import Trade, TradeSyncWatermark, UserProfile
 from .deriv_client import DerivClient, DerivAPIError
+from .recompute import refresh_days
 import logging
 
 logger = logging.getLogger("tradeiq.trade_sync")
 
+UPSERT_CHUNK_SIZE = 500
+UPSERT_UPDATE_FIELDS = ["pnl", "exit_price", "closed_at", "duration_seconds"]
+
+
+def _natural_key(instrument, direction, opened_at, entry_price) -> Tuple:
+    return (instrument, direction, opened_at, entry_price)
+
+
+def _adopt_legacy_rows(user: UserProfile, by_contract: Dict[int, Dict[str, Any]]) -> None:
+    """Give contract_ids to real trades stored before the column existed."""
+    legacy = list(
+        Trade.objects.filter(user=user, is_mock=False, contract_id__isnull=True)
+        .only("id", "instrument", "direction", "opened_at", "entry_price")
+    )
+    if not legacy:
+        return
+    wanted = {
+        _natural_key(td.get("instrument"), td.get("direction"), td.get("opened_at"), td.get("entry_price")): cid
+        for cid, td in by_contract.items()
+    }
+    adopted = []
+    for trade in legacy:
+        cid = wanted.pop(_natural_key(trade.instrument, trade.direction, trade.opened_at, trade.entry_price), None)
+        if cid is not None:
+            trade.contract_id = cid
+            adopted.append(trade)
+    if adopted:
+        Trade.objects.bulk_update(adopted, ["contract_id"], batch_size=UPSERT_CHUNK_SIZE)
+
+
+def upsert_deriv_trades(
+    user: UserProfile,
+    raw_trades: Iterable[Dict[str, Any]],
+    chunk_size: int = UPSERT_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """
+    Upsert parsed Deriv trades for *user* keyed on contract_id.
+
+    Returns {'trades_created': int, 'trades_updated': int, 'errors': list[str]}.
+    Trades without a contract_id are reported in ``errors`` and skipped.
+    """
+    errors: List[str] = []
+    by_contract: Dict[int, Dict[str, Any]] = {}
+    for td in raw_trades:
+        cid = td.get("contract_id")
+        if not cid:
+            errors.append(f"Missing contract_id for transaction {td.get('transaction_id')}")
+            continue
+        by_contract[int(cid)] = td  # a repeated contract keeps its latest row
+
+    if not by_contract:
+        return {"trades_created": 0, "trades_updated": 0, "errors": errors}
+
+    contract_ids = list(by_contract)
+    with transaction.atomic():
+        _adopt_legacy_rows(user, by_contract)
+        existing = set()
+        for i in range(0, len(contract_ids), chunk_size):
+            existing.update(
+                Trade.objects.filter(user=user, contract_id__in=contract_ids[i:i + chunk_size])
+                .values_list("contract_id", flat=True)
+            )
+
+        rows = [
+            Trade(
+                user=user,
+                contract_id=cid,
+                instrument=td.get("instrument") or "UNKNOWN",
+                direction=td.get("direction") or "UNKNOWN",
+                pnl=td["pnl"],
+                entry_price=td.get("entry_price"),
+                exit_price=td.get("exit_price"),
+                opened_at=td.get("opened_at"),
+                closed_at=td.get("closed_at"),
+                duration_seconds=td.get("duration_seconds"),
+                is_mock=False,
+            )
+            for cid, td in by_contract.items()
+        ]
+        Trade.objects.bulk_create(
+            rows,
+            batch_size=chunk_size,
+            update_conflicts=True,
+            unique_fields=["user", "contract_id"],
+            update_fields=UPSERT_UPDATE_FIELDS,
+        )
+        # Days where only new contracts were added keep their cached state
+        touched = {t.opened_at.date() for t in rows if t.opened_at is not None}
+        rewritten = {t.opened_at.date() for t in rows if t.opened_at is not None and t.contract_id in existing}
+        refresh_days(
+            str(user.id),
+            touched,
+            new_trades=[t for t in rows if t.opened_at is not None and t.opened_at.date() not in rewritten],
+        )
+
+    return {
+        "trades_created": len(contract_ids) - len(existing),
+        "trades_updated": len(existing),
+        "errors": errors,
+    }
+
 
 def sync_trades_for_user(
     user_id: str,
@@ -34,6 +153,8 @@ def sync_trades_for_user(
             'trades_created': int,
             'trades_updated': int,
             'errors': list[str],
+            'incremental': bool,  # resumed from the account's watermark
+            'date_from': int,     # profit_table date_from used (epoch)
         }
     """
     try:
@@ -47,10 +168,17 @@ def sync_trades_for_user(
             "errors": [f"User {user_id} not found"],
         }
 
+    # Where each of the user's accounts can resume from
+    window_from = int(time.time()) - days_back * 86400
+    marks = {m.account_id: m for m in TradeSyncWatermark.objects.filter(user=user)}
+    resume_from = {account_id: _resume_from(mark, window_from) for account_id, mark in marks.items()}
+
     # Fetch from Deriv
     try:
         client = DerivClient()
-        raw_trades = client._run_async(_fetch(client, api_token, days_back))
+        account_id, date_from, raw_trades = client._run_async(
+            _fetch(client, api_token, window_from, resume_from)
+        )
     except DerivAPIError as exc:
         return {
             "success": False,
@@ -68,65 +196,123 @@ def sync_trades_for_user(
             "errors": [f"Unexpected error: {exc}"],
         }
 
-    created = 0
-    updated = 0
-    errors = []
+    try:
+        return store_fetched_trades(user, account_id, window_from, date_from, raw_trades)
+    except Exception as exc:
+        logger.error("Trade upsert failed for user %s: %s", user_id, exc, exc_info=True)
+        return {
+            "success": False,
+            "trades_fetched": len(raw_trades),
+            "trades_created": 0,
+            "trades_updated": 0,
+            "errors": [f"Error saving trades: {exc}"],
+        }
 
-    for td in raw_trades:
-        try:
-            # Build natural-key filter
-            qs = Trade.objects.filter(
-                user=user,
-                instrument=td.get("instrument", ""),
-                direction=td.get("direction", ""),
-                is_mock=False,
-            )
-            if td.get("opened_at") is not None:
-                qs = qs.filter(opened_at=td["opened_at"])
-            if td.get("entry_price") is not None:
-                qs = qs.filter(entry_price=td["entry_price"])
-
-            existing = qs.first()
-
-            if existing:
-                existing.pnl = td["pnl"]
-                existing.exit_price = td.get("exit_price")
-                existing.closed_at = td.get("closed_at")
-                existing.duration_seconds = td.get("duration_seconds")
-                existing.save()
-                updated += 1
-            else:
-                Trade.objects.create(
-                    user=user,
-                    instrument=td.get("instrument", "UNKNOWN"),
-                    direction=td.get("direction", "UNKNOWN"),
-                    pnl=td["pnl"],
-                    entry_price=td.get("entry_price"),
-                    exit_price=td.get("exit_price"),
-                    opened_at=td.get("opened_at"),
-                    closed_at=td.get("closed_at"),
-                    duration_seconds=td.get("duration_seconds"),
-                    is_mock=False,
-                )
-                created += 1
-        except Exception as exc:
-            cid = td.get("contract_id", "?")
-            errors.append(f"Error saving trade {cid}: {exc}")
-            continue
+
+def store_fetched_trades(
+    user: UserProfile,
+    account_id: str,
+    window_from: int,
+    date_from: int,
+    raw_trades: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Upsert one account's fetched profit_table rows and advance its watermark.
+
+    The watermark row is created or locked first, in the upsert's
+    transaction, so concurrent syncs of one account (a view sync and the
+    scheduler, say) take turns. Rows at or below the watermark are dropped
+    when the fetch resumed from it. Returns the sync_trades_for_user
+    result; upsert errors propagate.
+    """
+    fetched = len(raw_trades)
+    incremental = date_from > window_from
+    with transaction.atomic():
+        mark = lock_watermark(user, account_id, window_from) if account_id else None
+        if incremental:
+            raw_trades = [td for td in raw_trades if _sync_position(td) > _mark_position(mark)]
+
+        result = upsert_deriv_trades(user, raw_trades)
+
+        if mark is not None:
+            advance_watermark(mark, window_from, raw_trades)
 
     return {
         "success": True,
-        "trades_fetched": len(raw_trades),
-        "trades_created": created,
-        "trades_updated": updated,
-        "errors": errors,
+        "trades_fetched": fetched,
+        **result,
+        "incremental": incremental,
+        "date_from": date_from,
     }
 
 
-async def _fetch(client: DerivClient, api_token: str, days_back: int):
-    """Internal coroutine — fetch all trades in a fresh WS connection."""
+def _sync_position(td: Dict[str, Any]) -> Tuple[int, int]:
+    """(sell_time, transaction_id) of a parsed profit_table row, for ordering."""
+    closed_at = td.get("closed_at")
+    return (int(closed_at.timestamp()) if closed_at else 0, int(td.get("transaction_id") or 0))
+
+
+def _mark_position(mark: Optional[TradeSyncWatermark]) -> Tuple[int, int]:
+    if mark is None or mark.last_sell_time is None:
+        return (0, 0)
+    return (mark.last_sell_time, mark.last_transaction_id or 0)
+
+
+def _resume_from(mark: TradeSyncWatermark, window_from: int) -> int:
+    """
+    date_from for an account: its watermark when the stored history already
+    covers the requested window, else the window start (a backfill).
+
+    The watermark second itself is re-requested; rows at or below the
+    stored transaction_id are dropped before the upsert.
+    """
+    if mark.last_sell_time is None or mark.synced_from > window_from:
+        return window_from
+    return max(window_from, mark.last_sell_time)
+
+
+def lock_watermark(user: UserProfile, account_id: str, window_from: int) -> TradeSyncWatermark:
+    """The account's watermark row, created if missing and locked until the transaction ends."""
+    mark, _ = TradeSyncWatermark.objects.get_or_create(
+        user=user, account_id=account_id, defaults={"synced_from": window_from}
+    )
+    return TradeSyncWatermark.objects.select_for_update().get(pk=mark.pk)
+
+
+def advance_watermark(
+    mark: TradeSyncWatermark,
+    window_from: int,
+    synced_trades: List[Dict[str, Any]],
+) -> TradeSyncWatermark:
+    """Move the locked *mark* forward to the newest of *synced_trades*; never back."""
+    mark.synced_from = min(mark.synced_from, window_from)
+    newest = max([_mark_position(mark)] + [_sync_position(td) for td in synced_trades])
+    if newest > (0, 0):
+        mark.last_sell_time, mark.last_transaction_id = newest
+    mark.last_synced_at = timezone.now()
+    mark.save(update_fields=["synced_from", "last_sell_time", "last_transaction_id", "last_synced_at", "updated_at"])
+    return mark
+
+
+async def _fetch(
+    client: DerivClient,
+    api_token: str,
+    window_from: int,
+    resume_from: Dict[str, int],
+) -> Tuple[str, int, List[Dict[str, Any]]]:
+    """
+    Internal coroutine — authorize, then fetch the account's new trades in a
+    fresh WS connection.
+
+    Returns (loginid, date_from used, parsed trades).
+    """
     fresh = DerivClient(client.app_id)
     try:
-        return await fresh.fetch_all_trades(api_token=api_token, days_back=days_back)
+        await fresh.connect()
+        account = await fresh.authorize(api_token)
+        account_id = account.get("loginid") or ""
+        date_from = resume_from.get(account_id, window_from)
+        trades = await fresh.fetch_all_trades(api_token=api_token, date_from=date_from)
+        return account_id, date_from, trades
     finally:
         await fresh.disconnect()
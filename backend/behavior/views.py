@@ -14,6 +14,7 @@ logger = logging.getLogger(__name__)
 
 from .models import UserProfile, Trade, BehavioralMetric
 from .serializers import UserProfileSerializer, TradeSerializer, BehavioralMetricSerializer
+from .state import get_behavior_state
 from .tools import (
     analyze_trade_patterns,
     generate_behavioral_nudge_with_ai,
@@ -73,7 +74,7 @@ class TradeViewSet(viewsets.ModelViewSet):
         
         # Trigger behavioral analysis for this user
         try:
-            self._analyze_and_nudge(trade.user)
+            self._analyze_and_nudge(trade)
         except Exception as e:
             logger.warning("Error in behavioral analysis: %s", e)
             # Don't fail the trade creation if analysis fails
@@ -97,14 +98,17 @@ class TradeViewSet(viewsets.ModelViewSet):
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
     
-    def _analyze_and_nudge(self, user):
+    def _analyze_and_nudge(self, trade):
         """
         Internal method to analyze patterns and send nudge via WebSocket.
         Metric saving is handled by the post_save signal in signals.py
         which includes the full dataset (win_count, loss_count, avg_hold_time).
         """
-        # Analyze recent trades (last 24 hours)
-        analysis = analyze_trade_patterns(str(user.id), hours=24)
+        user = trade.user
+        # The post_save signal already folded this trade into the day's
+        # behavioral state; read the result instead of re-analyzing.
+        trading_date = (trade.opened_at or timezone.now()).date()
+        analysis = get_behavior_state(str(user.id), trading_date).analysis()
 
         if analysis['needs_nudge']:
             # Generate AI-powered nudge
@@ -586,4 +590,5 @@ class SyncTradesView(APIView):
             "real_trades": real_count,
             "demo_trades": demo_count,
             "is_demo": real_count == 0,
+            "incremental": sync_result.get("incremental", False),
         })
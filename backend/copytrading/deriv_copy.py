@@ -4,11 +4,14 @@ Integrates: copy_start, copy_stop, copytrading_list, copytrading_statistics
 """
 import json
 import asyncio
+import contextvars
 import threading
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import os
 
+from tradeiq.rate_limit import acquire_async
+
 
 class DerivCopyTradingClient:
     """
@@ -37,6 +40,7 @@ class DerivCopyTradingClient:
         """Run an async coroutine from sync Django context (dedicated thread)."""
         result = [None]
         exception = [None]
+        context = contextvars.copy_context()
 
         def _thread_target():
             loop = asyncio.new_event_loop()
@@ -48,7 +52,7 @@ class DerivCopyTradingClient:
             finally:
                 loop.close()
 
-        t = threading.Thread(target=_thread_target)
+        t = threading.Thread(target=context.run, args=(_thread_target,))
         t.start()
         t.join(timeout=30)
         if exception[0]:
@@ -67,12 +71,14 @@ class DerivCopyTradingClient:
             token = self._resolve_api_token(api_token)
             async with websockets.connect(self.ws_url, close_timeout=10) as ws:
                 # Authorize
+                await acquire_async("deriv", token)
                 await ws.send(json.dumps({"authorize": token}))
                 auth_resp = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
                 if "error" in auth_resp:
                     return {"error": auth_resp["error"].get("message", "Authorization failed")}
 
                 # Get copytrading list
+                await acquire_async("deriv", token)
                 await ws.send(json.dumps({"copytrading_list": 1}))
                 resp = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
 
@@ -102,11 +108,13 @@ class DerivCopyTradingClient:
             import websockets
             token = self._resolve_api_token(api_token)
             async with websockets.connect(self.ws_url, close_timeout=10) as ws:
+                await acquire_async("deriv", token)
                 await ws.send(json.dumps({"authorize": token}))
                 auth_resp = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
                 if "error" in auth_resp:
                     return {"error": auth_resp["error"].get("message", "Authorization failed")}
 
+                await acquire_async("deriv", token)
                 await ws.send(json.dumps({
                     "copytrading_statistics": 1,
                     "trader_id": trader_id,
@@ -156,6 +164,7 @@ class DerivCopyTradingClient:
             import websockets
             token = self._resolve_api_token(api_token)
             async with websockets.connect(self.ws_url, close_timeout=10) as ws:
+                await acquire_async("deriv", token)
                 await ws.send(json.dumps({"authorize": token}))
                 auth_resp = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
                 if "error" in auth_resp:
@@ -171,6 +180,7 @@ class DerivCopyTradingClient:
                 if trade_types:
                     request["trade_types"] = trade_types
 
+                await acquire_async("deriv", token)
                 await ws.send(json.dumps(request))
                 resp = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
 
@@ -197,11 +207,13 @@ class DerivCopyTradingClient:
             import websockets
             token = self._resolve_api_token(api_token)
             async with websockets.connect(self.ws_url, close_timeout=10) as ws:
+                await acquire_async("deriv", token)
                 await ws.send(json.dumps({"authorize": token}))
                 auth_resp = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
                 if "error" in auth_resp:
                     return {"error": auth_resp["error"].get("message", "Authorization failed")}
 
+                await acquire_async("deriv", token)
                 await ws.send(json.dumps({"copy_stop": trader_id}))
                 resp = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
 
@@ -24,6 +24,7 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         quiet = options.get("quiet", False)
         from behavior.models import UserProfile, Trade
+        from behavior.recompute import flush_recomputes
 
         # 1. Create demo user
         demo_user, created = UserProfile.objects.get_or_create(
@@ -94,6 +95,9 @@ class Command(BaseCommand):
                 closed_at=opened + timedelta(seconds=td["dur"]),
                 is_mock=True,
             )
+        # Pattern flags and risk scores are recomputed off the request path;
+        # run them before the command exits
+        flush_recomputes()
 
         if not quiet:
             self.stdout.write(
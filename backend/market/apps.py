@@ -11,3 +11,6 @@ class MarketConfig(AppConfig):
         if os.environ.get("RUN_MONITOR", "").lower() == "true":
             from market.monitor import start_monitor
             start_monitor()
+        if os.environ.get("RUN_INSIGHTS_WORKER", "").lower() == "true":
+            from market.insights_worker import start_insights_worker
+            start_insights_worker()
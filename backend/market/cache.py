@@ -57,7 +57,19 @@ def get_redis_client() -> redis.Redis:
 
 
 def get_cached_price(instrument: str) -> Optional[float]:
-    """Get the last cached price for an instrument."""
+    """Get the last cached price for an instrument.
+
+    Reads the host's shared-memory tick table first (see
+    ``market.shm_ticks``) and only goes to Redis on a miss.
+    """
+    try:
+        from .shm_ticks import read_price
+
+        price = read_price(instrument)
+        if price is not None:
+            return price
+    except Exception as e:
+        logger.debug("Shared tick table read error: %s", e)
     try:
         r = get_redis_client()
         key = f"tradeiq:price:{instrument}"
@@ -69,7 +81,16 @@ def get_cached_price(instrument: str) -> Optional[float]:
 
 
 def set_cached_price(instrument: str, price: float, ttl_seconds: int = 300):
-    """Store current price in Redis with TTL (default 5 minutes)."""
+    """Store current price in Redis with TTL (default 5 minutes).
+
+    In the feed process the price is also published to the shared tick table.
+    """
+    try:
+        from .shm_ticks import publish_price
+
+        publish_price(instrument, price, ttl_seconds)
+    except Exception as e:
+        logger.debug("Shared tick table publish error: %s", e)
     try:
         r = get_redis_client()
         key = f"tradeiq:price:{instrument}"
@@ -0,0 +1,261 @@
+"""
+On-disk historical candle store.
+
+One append-only file per ``(deriv_symbol, granularity)`` under
+``settings.CANDLE_STORE_DIR``, holding fixed-size little-endian records
+(epoch, open, high, low, close), oldest first. Only closed candles are
+written, so the file never needs rewriting as a bar forms.
+
+Reads memory-map the file: ``load_candles`` returns a ``CandleSeries`` whose
+columns are views into the map, and ``start``/``end`` are resolved with a
+binary search on the epoch column, so slicing years of 1-minute bars touches
+only the pages that are used and needs no network.
+
+Populate with ``python manage.py backfill_candles``. Once a series has been
+backfilled, ``get_candles_many`` keeps it current with every live fetch and
+serves long lookbacks from it.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from .candles import CandleSeries
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+logger = logging.getLogger("tradeiq.candle_store")
+
+# Deriv returns at most this many candles per ticks_history request.
+BACKFILL_PAGE_SIZE = 5000
+
+RECORD_DTYPE = np.dtype([
+    ("epoch", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+])
+
+_write_lock = threading.Lock()
+# path -> (file size, memmap)
+_maps: Dict[Path, Tuple[int, np.ndarray]] = {}
+_maps_lock = threading.Lock()
+
+
+def store_dir() -> Optional[Path]:
+    directory = getattr(settings, "CANDLE_STORE_DIR", "")
+    return Path(directory) if directory else None
+
+
+def candle_path(symbol: str, granularity: int) -> Optional[Path]:
+    directory = store_dir()
+    if directory is None:
+        return None
+    safe = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in symbol)
+    return directory / f"{safe}_{int(granularity)}.candles"
+
+
+def has_history(symbol: str, granularity: int) -> bool:
+    path = candle_path(symbol, granularity)
+    return path is not None and path.exists()
+
+
+def _records(path: Path) -> np.ndarray:
+    """Memory-mapped records of *path* (empty when missing); remapped when it grows."""
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    usable = size - size % RECORD_DTYPE.itemsize  # ignore a torn trailing record
+    if usable == 0:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    with _maps_lock:
+        cached = _maps.get(path)
+        if cached and cached[0] == usable:
+            return cached[1]
+        records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(usable // RECORD_DTYPE.itemsize,))
+        _maps[path] = (usable, records)
+        return records
+
+
+def last_epoch(symbol: str, granularity: int) -> Optional[int]:
+    path = candle_path(symbol, granularity)
+    if path is None:
+        return None
+    records = _records(path)
+    return int(records["epoch"][-1]) if len(records) else None
+
+
+def load_candles(
+    symbol: str,
+    granularity: int,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    count: Optional[int] = None,
+) -> CandleSeries:
+    """Stored candles with ``start <= epoch <= end``, the last *count* of them if given.
+
+    Columns are zero-copy views into the memory map.
+    """
+    path = candle_path(symbol, granularity)
+    records = _records(path) if path is not None else np.empty(0, dtype=RECORD_DTYPE)
+    epochs = records["epoch"]
+    lo = int(np.searchsorted(epochs, start, side="left")) if start is not None else 0
+    hi = int(np.searchsorted(epochs, end, side="right")) if end is not None else len(records)
+    if count is not None:
+        lo = max(lo, hi - count)
+    window = records[lo:hi]
+    return CandleSeries(
+        symbol=symbol,
+        granularity=granularity,
+        epoch=window["epoch"],
+        open=window["open"],
+        high=window["high"],
+        low=window["low"],
+        close=window["close"],
+    )
+
+
+def _to_records(series: CandleSeries) -> np.ndarray:
+    rows = np.empty(len(series), dtype=RECORD_DTYPE)
+    for name in RECORD_DTYPE.names:
+        rows[name] = getattr(series, name)
+    return rows
+
+
+def append_candles(series: CandleSeries, now: Optional[float] = None) -> int:
+    """Append the closed candles of *series* newer than the stored tail.
+
+    Returns the number of records written. Older or duplicate candles are
+    skipped, so callers may pass overlapping pages.
+    """
+    path = candle_path(series.symbol, series.granularity)
+    if path is None or not len(series):
+        return 0
+    now = time.time() if now is None else now
+    closed = series.epoch + series.granularity <= now
+
+    with _write_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "ab") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                # Re-read the tail under the lock; another process may have appended.
+                stored = _records(path)
+                usable = len(stored) * RECORD_DTYPE.itemsize
+                if os.fstat(fh.fileno()).st_size != usable:
+                    # Drop a torn trailing record so new rows stay aligned.
+                    fh.truncate(usable)
+                after = int(stored["epoch"][-1]) if len(stored) else None
+                keep = closed if after is None else closed & (series.epoch > after)
+                rows = _to_records(series)[keep]
+                if len(rows):
+                    rows = rows[np.unique(rows["epoch"], return_index=True)[1]]
+                    fh.write(rows.tobytes())
+                return len(rows)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+async def _fetch_history_pages(
+    symbol: str,
+    granularity: int,
+    since: int,
+    on_page: Optional[Callable[[int, int], None]] = None,
+) -> List[CandleSeries]:
+    """Page ``ticks_history`` backwards from now until *since*; newest page first."""
+    import websockets
+
+    from tradeiq.rate_limit import acquire_async
+
+    app_id = os.environ.get("DERIV_APP_ID", "125489")
+    ws_url = f"wss://ws.derivws.com/websockets/v3?app_id={app_id}"
+    pages: List[CandleSeries] = []
+    end: object = "latest"
+    async with websockets.connect(ws_url, close_timeout=5) as ws:
+        while True:
+            await acquire_async("deriv")
+            await ws.send(json.dumps({
+                "ticks_history": symbol,
+                "style": "candles",
+                "granularity": granularity,
+                "start": since,
+                "end": end,
+                "count": BACKFILL_PAGE_SIZE,
+            }))
+            data = json.loads(await asyncio.wait_for(ws.recv(), timeout=15))
+            if "error" in data:
+                raise RuntimeError(data["error"].get("message", "ticks_history failed"))
+            page = CandleSeries.from_deriv(symbol, granularity, data.get("candles", []) or [])
+            if not len(page):
+                break
+            pages.append(page)
+            if on_page:
+                on_page(len(page), int(page.epoch[0]))
+            first = int(page.epoch[0])
+            if first <= since or len(page) < BACKFILL_PAGE_SIZE:
+                break
+            end = first - 1
+    return pages
+
+
+def backfill(
+    symbol: str,
+    granularity: int,
+    since: int,
+    on_page: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """Fetch closed candles from *since* (or the stored tail) to now and append them.
+
+    Returns the number of new records. The store only grows forwards; to
+    reach further back than the first stored candle, delete the file first.
+    """
+    from .tools import _run_async_in_new_thread
+
+    stored_last = last_epoch(symbol, granularity)
+    if stored_last is not None:
+        since = max(since, stored_last + granularity)
+    pages = _run_async_in_new_thread(
+        _fetch_history_pages(symbol, granularity, since, on_page),
+        timeout=3600,
+    ) or []
+    written = 0
+    for page in reversed(pages):  # oldest first keeps the file append-only
+        written += append_candles(page)
+    return written
+
+
+def clear_maps() -> None:
+    """Drop cached memory maps (e.g. after files were removed)."""
+    with _maps_lock:
+        _maps.clear()
+
+
+def store_summary() -> Dict[str, Dict[str, int]]:
+    """``{"SYMBOL_GRAN": {"bars", "first_epoch", "last_epoch"}}`` for every stored series."""
+    directory = store_dir()
+    if directory is None or not directory.exists():
+        return {}
+    summary = {}
+    for path in sorted(directory.glob("*.candles")):
+        records = _records(path)
+        if len(records):
+            summary[path.stem] = {
+                "bars": len(records),
+                "first_epoch": int(records["epoch"][0]),
+                "last_epoch": int(records["epoch"][-1]),
+            }
+    return summary
@@ -0,0 +1,250 @@
+"""
+Cached candle store for multi-symbol analysis.
+
+``fetch_price_history`` returns candles as lists of dicts for charting; this
+module keeps the same data as numpy columns (``CandleSeries``) so indicators
+can be computed across many symbols at once.
+
+- Series are cached in-process per ``(deriv_symbol, granularity)`` and stay
+  fresh until the current candle closes (capped at ``LIVE_CANDLE_TTL_SECONDS``
+  so the forming bar does not go stale on long timeframes).
+- Cache misses for many symbols are fetched over ONE WebSocket connection,
+  pipelined with ``req_id`` instead of one connection per symbol.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from tradeiq.rate_limit import acquire_async
+
+logger = logging.getLogger(__name__)
+
+LIVE_CANDLE_TTL_SECONDS = 60
+DEFAULT_CANDLE_COUNT = 120
+# Requests kept in flight on one connection (Deriv rate-limits bursts).
+PIPELINE_WINDOW = 25
+PIPELINE_TIMEOUT_SECONDS = 10
+
+
+@dataclass
+class CandleSeries:
+    """OHLC candles for one symbol as parallel numpy columns (oldest first)."""
+    symbol: str
+    granularity: int
+    epoch: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.epoch)
+
+    @classmethod
+    def from_deriv(cls, symbol: str, granularity: int, candles: List[Dict[str, Any]]) -> "CandleSeries":
+        """Build from a raw Deriv ``ticks_history`` candles list."""
+        rows = [c for c in candles if c.get("epoch") is not None]
+        return cls(
+            symbol=symbol,
+            granularity=granularity,
+            epoch=np.array([int(c["epoch"]) for c in rows], dtype=np.int64),
+            open=np.array([float(c.get("open", 0.0)) for c in rows], dtype=np.float64),
+            high=np.array([float(c.get("high", 0.0)) for c in rows], dtype=np.float64),
+            low=np.array([float(c.get("low", 0.0)) for c in rows], dtype=np.float64),
+            close=np.array([float(c.get("close", 0.0)) for c in rows], dtype=np.float64),
+        )
+
+    def tail(self, count: int) -> "CandleSeries":
+        return CandleSeries(
+            symbol=self.symbol,
+            granularity=self.granularity,
+            epoch=self.epoch[-count:],
+            open=self.open[-count:],
+            high=self.high[-count:],
+            low=self.low[-count:],
+            close=self.close[-count:],
+        )
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Same shape as ``fetch_price_history`` candles."""
+        return [
+            {
+                "time": datetime.fromtimestamp(int(e), tz=timezone.utc).isoformat(),
+                "open": float(o),
+                "high": float(h),
+                "low": float(lo),
+                "close": float(c),
+            }
+            for e, o, h, lo, c in zip(self.epoch, self.open, self.high, self.low, self.close)
+        ]
+
+
+# (deriv_symbol, granularity) -> (series, expires_at)
+_candle_cache: Dict[Tuple[str, int], Tuple[CandleSeries, float]] = {}
+_candle_cache_lock = threading.Lock()
+
+
+def _expiry_for(series: CandleSeries, now: float) -> float:
+    if not len(series):
+        return now + LIVE_CANDLE_TTL_SECONDS
+    next_close = float(series.epoch[-1]) + series.granularity
+    return min(max(next_close, now + 1), now + LIVE_CANDLE_TTL_SECONDS)
+
+
+def get_cached_candles(symbol: str, granularity: int, count: int) -> Optional[CandleSeries]:
+    """Return a fresh cached series with at least *count* bars, else None."""
+    now = time.time()
+    with _candle_cache_lock:
+        entry = _candle_cache.get((symbol, granularity))
+    if entry is None:
+        return None
+    series, expires_at = entry
+    if now >= expires_at or len(series) < count:
+        return None
+    return series.tail(count)
+
+
+def store_candles(series: CandleSeries) -> None:
+    with _candle_cache_lock:
+        _candle_cache[(series.symbol, series.granularity)] = (series, _expiry_for(series, time.time()))
+
+
+def clear_candle_cache() -> None:
+    with _candle_cache_lock:
+        _candle_cache.clear()
+
+
+async def _fetch_candles_pipelined(
+    symbols: List[str],
+    granularity: int,
+    count: int,
+) -> Dict[str, CandleSeries]:
+    """Fetch candles for *symbols* over one connection, ``req_id``-multiplexed."""
+    import websockets
+
+    app_id = os.environ.get("DERIV_APP_ID", "125489")
+    ws_url = f"wss://ws.derivws.com/websockets/v3?app_id={app_id}"
+    results: Dict[str, CandleSeries] = {}
+
+    async with websockets.connect(ws_url, close_timeout=5) as ws:
+        for start in range(0, len(symbols), PIPELINE_WINDOW):
+            window = symbols[start:start + PIPELINE_WINDOW]
+            pending = {}
+            for offset, symbol in enumerate(window):
+                req_id = start + offset + 1
+                pending[req_id] = symbol
+                await acquire_async("deriv")
+                await ws.send(json.dumps({
+                    "ticks_history": symbol,
+                    "adjust_start_time": 1,
+                    "count": max(10, min(count, 5000)),
+                    "end": "latest",
+                    "style": "candles",
+                    "granularity": granularity,
+                    "req_id": req_id,
+                }))
+
+            deadline = time.monotonic() + PIPELINE_TIMEOUT_SECONDS
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning("Candle fetch timed out for %d symbols", len(pending))
+                    break
+                data = json.loads(await asyncio.wait_for(ws.recv(), timeout=remaining))
+                symbol = pending.pop(data.get("req_id"), None)
+                if symbol is None:
+                    continue
+                if "error" in data:
+                    logger.debug("Candles for %s failed: %s", symbol, data["error"].get("message"))
+                    continue
+                results[symbol] = CandleSeries.from_deriv(symbol, granularity, data.get("candles", []) or [])
+    return results
+
+
+def get_candles_many(
+    symbols: Iterable[str],
+    granularity: int,
+    count: int = DEFAULT_CANDLE_COUNT,
+) -> Dict[str, CandleSeries]:
+    """Candle series for many Deriv symbols, serving fresh ones from cache.
+
+    Symbols with a backfilled on-disk history (``market.candle_store``) are
+    kept current from each fetch and can serve more than one request's worth
+    of bars; if the network fails they are served from disk.
+    Symbols that fail to load are simply missing from the result.
+    """
+    from .tools import _run_async_in_new_thread
+
+    symbols = list(dict.fromkeys(symbols))
+    found: Dict[str, CandleSeries] = {}
+    misses: List[str] = []
+    for symbol in symbols:
+        cached = get_cached_candles(symbol, granularity, count)
+        if cached is not None:
+            found[symbol] = cached
+        else:
+            misses.append(symbol)
+
+    if misses:
+        windows = -(-len(misses) // PIPELINE_WINDOW)
+        try:
+            fetched = _run_async_in_new_thread(
+                _fetch_candles_pipelined(misses, granularity, count),
+                timeout=windows * PIPELINE_TIMEOUT_SECONDS + 5,
+            ) or {}
+        except Exception as exc:
+            logger.warning("Candle fetch failed for %d symbols: %s", len(misses), exc)
+            fetched = {}
+        for symbol in misses:
+            series = _with_stored_history(symbol, granularity, count, fetched.get(symbol))
+            if series is None:
+                continue
+            store_candles(series)
+            found[symbol] = series.tail(count)
+    return found
+
+
+def _with_stored_history(
+    symbol: str,
+    granularity: int,
+    count: int,
+    live: Optional[CandleSeries],
+) -> Optional[CandleSeries]:
+    """Merge a live fetch with the symbol's stored history, when it has one."""
+    from . import candle_store
+
+    if not candle_store.has_history(symbol, granularity):
+        return live
+    if live is not None:
+        try:
+            candle_store.append_candles(live)
+        except OSError as exc:
+            logger.warning("Could not extend stored candles for %s: %s", symbol, exc)
+    stored = candle_store.load_candles(symbol, granularity, count=count)
+    if live is None:
+        return stored if len(stored) else None
+    if not len(stored) or len(stored) <= len(live):
+        return live
+    forming = live.epoch > stored.epoch[-1]
+    return CandleSeries(
+        symbol=symbol,
+        granularity=granularity,
+        epoch=np.concatenate([stored.epoch, live.epoch[forming]]),
+        open=np.concatenate([stored.open, live.open[forming]]),
+        high=np.concatenate([stored.high, live.high[forming]]),
+        low=np.concatenate([stored.low, live.low[forming]]),
+        close=np.concatenate([stored.close, live.close[forming]]),
+    )
+
+
+def get_candles(symbol: str, granularity: int, count: int = DEFAULT_CANDLE_COUNT) -> Optional[CandleSeries]:
+    """Candle series for one Deriv symbol (None if it could not be loaded)."""
+    return get_candles_many([symbol], granularity, count).get(symbol)
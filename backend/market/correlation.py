@@ -0,0 +1,256 @@
+"""
+Cross-instrument correlation service.
+
+Keeps a rolling correlation matrix of log returns for the watched
+instruments, built from the cached candle store (``market.candles``):
+
+- Series are aligned on the candle epochs every instrument shares; only
+  closed candles are used so the window never contains a forming bar.
+- The matrix comes from running sums (Σr and XᵀX) over the window, so each
+  new closed candle is an O(n²) rank-one update instead of a full recompute.
+  A full rebuild happens when the instrument set changes, when the window
+  can't be extended contiguously, or every ``REBUILD_EVERY`` updates.
+
+``find_comovers("EUR/USD")`` answers "what is moving with X?" from the cached
+matrix — a cheap lookup the analyst can call instead of reasoning about
+each instrument in isolation. Lookups never fetch candles: a stale matrix
+is refreshed on a background thread (the market monitor also starts one
+every scan cycle), and the lookup answers from the matrix it already has.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .candles import DEFAULT_CANDLE_COUNT, CandleSeries, get_candles_many
+
+logger = logging.getLogger(__name__)
+
+CORRELATION_WINDOW = 100  # returns per instrument
+CORRELATION_GRANULARITY = 3600
+REFRESH_SECONDS = 300
+REBUILD_EVERY = 50
+MIN_OBSERVATIONS = 20
+
+
+def _aligned_closes(series: Dict[str, CandleSeries], symbols: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Closed-candle closes on the epochs all *symbols* share → ``(epochs, closes[T, n])``."""
+    common: Optional[np.ndarray] = None
+    for symbol in symbols:
+        epochs = series[symbol].epoch[:-1]  # drop the forming candle
+        common = epochs if common is None else np.intersect1d(common, epochs, assume_unique=True)
+    if common is None or not len(common):
+        return np.zeros(0, dtype=np.int64), np.zeros((0, len(symbols)))
+    closes = np.empty((len(common), len(symbols)), dtype=np.float64)
+    for col, symbol in enumerate(symbols):
+        s = series[symbol]
+        closes[:, col] = s.close[np.searchsorted(s.epoch, common)]
+    return common, closes
+
+
+class RollingCorrelation:
+    """Rolling return correlation over a fixed set of columns."""
+
+    def __init__(self, symbols: Sequence[str], window: int = CORRELATION_WINDOW):
+        self.symbols = list(symbols)
+        self.window = window
+        n = len(self.symbols)
+        self._rows: deque = deque()
+        self._sum = np.zeros(n)
+        self._xtx = np.zeros((n, n))
+        self.last_epoch: Optional[int] = None
+        self._last_close: Optional[np.ndarray] = None
+        self._updates = 0
+
+    def rebuild(self, epochs: np.ndarray, closes: np.ndarray) -> None:
+        """Recompute the window from scratch in one matrix operation."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.diff(np.log(closes), axis=0)[-self.window:]
+        returns = np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+        self._rows = deque(returns)
+        self._sum = returns.sum(axis=0)
+        self._xtx = returns.T @ returns
+        self.last_epoch = int(epochs[-1]) if len(epochs) else None
+        self._last_close = closes[-1].copy() if len(closes) else None
+        self._updates = 0
+
+    def update(self, epochs: np.ndarray, closes: np.ndarray) -> bool:
+        """Append rows newer than ``last_epoch``; False if a rebuild is needed."""
+        if self.last_epoch is None or self._last_close is None or self._updates >= REBUILD_EVERY:
+            return False
+        start = int(np.searchsorted(epochs, self.last_epoch))
+        if start >= len(epochs) or int(epochs[start]) != self.last_epoch:
+            return False  # gap: our last row fell out of the fetched history
+        for idx in range(start + 1, len(epochs)):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                row = np.nan_to_num(np.log(closes[idx] / self._last_close), nan=0.0, posinf=0.0, neginf=0.0)
+            self._rows.append(row)
+            self._sum += row
+            self._xtx += np.outer(row, row)
+            if len(self._rows) > self.window:
+                old = self._rows.popleft()
+                self._sum -= old
+                self._xtx -= np.outer(old, old)
+            self._last_close = closes[idx].copy()
+            self.last_epoch = int(epochs[idx])
+            self._updates += 1
+        return True
+
+    @property
+    def observations(self) -> int:
+        return len(self._rows)
+
+    def matrix(self) -> np.ndarray:
+        """Pearson correlation matrix (NaN where a column has no variance)."""
+        n_obs = len(self._rows)
+        size = len(self.symbols)
+        if n_obs < 2:
+            return np.full((size, size), np.nan)
+        mean = self._sum / n_obs
+        cov = self._xtx / n_obs - np.outer(mean, mean)
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        corr[~np.isfinite(corr)] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+
+def _default_universe() -> Dict[str, str]:
+    """Watched instruments: one friendly name per distinct Deriv symbol."""
+    from .monitor import DEFAULT_WATCHLIST
+    from .tools import DERIV_SYMBOLS, _get_deriv_symbol
+
+    universe: Dict[str, str] = {}
+    for name in list(DEFAULT_WATCHLIST) + list(DERIV_SYMBOLS):
+        universe.setdefault(_get_deriv_symbol(name), name)
+    return universe
+
+
+class CorrelationService:
+    """Maintains the rolling matrix for a set of instruments."""
+
+    def __init__(
+        self,
+        instruments: Optional[Dict[str, str]] = None,
+        granularity: int = CORRELATION_GRANULARITY,
+        window: int = CORRELATION_WINDOW,
+    ):
+        self._instruments = instruments  # deriv symbol -> display name
+        self.granularity = granularity
+        self.window = window
+        self._state: Optional[RollingCorrelation] = None
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._refresher_lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> None:
+        """Pull candles from the store and extend (or rebuild) the matrix."""
+        with self._lock:
+            if not force and time.time() - self._refreshed_at < REFRESH_SECONDS:
+                return
+            instruments = self._instruments or _default_universe()
+            count = max(DEFAULT_CANDLE_COUNT, self.window + 2)
+            series = get_candles_many(list(instruments), self.granularity, count)
+            symbols = [s for s in instruments if s in series and len(series[s]) > 2]
+            epochs, closes = _aligned_closes(series, symbols)
+            self._refreshed_at = time.time()
+            if len(epochs) < 2:
+                logger.debug("Correlation refresh: not enough aligned candles")
+                return
+
+            state = self._state
+            if state is None or state.symbols != symbols or not state.update(epochs, closes):
+                state = RollingCorrelation(symbols, self.window)
+                state.rebuild(epochs, closes)
+            self._state = state
+
+    def refresh_in_background(self) -> bool:
+        """Start a refresh thread if the matrix is stale and none is running."""
+        if time.time() - self._refreshed_at < REFRESH_SECONDS:
+            return False
+        with self._refresher_lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return False
+            self._refresher = threading.Thread(
+                target=self._refresh_logged, daemon=True, name="correlation-refresh"
+            )
+            self._refresher.start()
+            return True
+
+    def _refresh_logged(self) -> None:
+        from tradeiq.rate_limit import PRIORITY_BACKGROUND, request_priority
+
+        try:
+            with request_priority(PRIORITY_BACKGROUND):
+                self.refresh()
+        except Exception as exc:
+            logger.warning("Correlation refresh failed: %s", exc)
+
+    def snapshot(self) -> Tuple[List[str], np.ndarray, int]:
+        """``(symbols, correlation matrix, observations)``."""
+        state = self._state
+        if state is None:
+            return [], np.zeros((0, 0)), 0
+        return list(state.symbols), state.matrix(), state.observations
+
+    def comovers(self, instrument: str, top_n: int = 5, min_correlation: float = 0.5) -> Dict[str, Any]:
+        from .tools import _get_deriv_symbol
+
+        self.refresh_in_background()
+        names = self._instruments or _default_universe()
+        symbols, corr, observations = self.snapshot()
+        deriv_symbol = _get_deriv_symbol(instrument)
+        result: Dict[str, Any] = {
+            "instrument": instrument,
+            "timeframe_seconds": self.granularity,
+            "observations": observations,
+            "moving_with": [],
+            "moving_against": [],
+        }
+        if deriv_symbol not in symbols or observations < MIN_OBSERVATIONS:
+            result["error"] = "Not enough aligned history to correlate this instrument."
+            return result
+
+        row = corr[symbols.index(deriv_symbol)]
+        ranked = sorted(
+            (
+                (float(row[col]), symbol)
+                for col, symbol in enumerate(symbols)
+                if symbol != deriv_symbol and not np.isnan(row[col]) and abs(row[col]) >= min_correlation
+            ),
+            key=lambda pair: -abs(pair[0]),
+        )
+        for value, symbol in ranked:
+            bucket = "moving_with" if value > 0 else "moving_against"
+            if len(result[bucket]) < top_n:
+                result[bucket].append({
+                    "instrument": names.get(symbol, symbol),
+                    "deriv_symbol": symbol,
+                    "correlation": round(value, 3),
+                })
+        return result
+
+
+_service: Optional[CorrelationService] = None
+_service_lock = threading.Lock()
+
+
+def get_correlation_service() -> CorrelationService:
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = CorrelationService()
+        return _service
+
+
+def find_comovers(instrument: str, top_n: int = 5, min_correlation: float = 0.5) -> Dict[str, Any]:
+    """Instruments whose hourly returns move with (or against) *instrument*."""
+    try:
+        return get_correlation_service().comovers(instrument, top_n=top_n, min_correlation=min_correlation)
+    except Exception as exc:
+        logger.warning("Correlation lookup failed for %s: %s", instrument, exc)
+        return {"instrument": instrument, "moving_with": [], "moving_against": [], "error": str(exc)}
@@ -0,0 +1,158 @@
+"""
+Background producer for news-based MarketInsights.
+
+Insights used to be generated inside ``GET /api/market/insights/`` whenever
+none were fresh, so a headline fetch plus an LLM call blocked page loads and
+concurrent readers could all trigger generation. Now a daemon thread runs
+``run_insight_cycle`` periodically and the list endpoint only reads.
+
+Generation happens at most once per ``INSIGHT_WINDOW_SECONDS`` window:
+- if an insight already exists for the current window (e.g. from a manual
+  refresh) the cycle is skipped;
+- otherwise the window is claimed with Redis ``SET NX`` so only one process
+  generates. Without Redis the claim is process-local;
+- if generation raises or saves nothing, the claim is released so the next
+  check (``CHECK_INTERVAL_SECONDS`` later) retries.
+
+Startup: ``RUN_INSIGHTS_WORKER=true`` or ``python manage.py run_insights_worker``
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from typing import Optional
+
+from tradeiq.rate_limit import PRIORITY_BACKGROUND, request_priority
+
+logger = logging.getLogger("tradeiq.insights")
+
+INSIGHT_WINDOW_SECONDS = 2 * 3600
+CHECK_INTERVAL_SECONDS = 60
+INSIGHT_HEADLINE_LIMIT = 8
+INSIGHTS_PER_WINDOW = 5
+LOCK_KEY_PREFIX = "tradeiq:insights:window"
+
+_local_claims_lock = threading.Lock()
+_local_claimed_window: Optional[int] = None
+
+
+def _window_id(now: float) -> int:
+    return int(now // INSIGHT_WINDOW_SECONDS)
+
+
+def _claim_window(window: int) -> bool:
+    """Claim *window* for generation. True for exactly one caller per window."""
+    global _local_claimed_window
+    try:
+        from .cache import get_redis_client
+
+        claimed = get_redis_client().set(
+            f"{LOCK_KEY_PREFIX}:{window}", "1", nx=True, ex=INSIGHT_WINDOW_SECONDS
+        )
+        return bool(claimed)
+    except Exception as exc:
+        logger.debug("Redis unavailable for insight lock, using process lock: %s", exc)
+
+    with _local_claims_lock:
+        if _local_claimed_window is not None and _local_claimed_window >= window:
+            return False
+        _local_claimed_window = window
+        return True
+
+
+def _release_window(window: int) -> None:
+    """Give up *window* after a failed generation so the next check retries."""
+    global _local_claimed_window
+    try:
+        from .cache import get_redis_client
+
+        get_redis_client().delete(f"{LOCK_KEY_PREFIX}:{window}")
+    except Exception as exc:
+        logger.debug("Redis unavailable to release insight lock: %s", exc)
+    with _local_claims_lock:
+        if _local_claimed_window == window:
+            _local_claimed_window = None
+
+
+def run_insight_cycle(now: Optional[float] = None) -> int:
+    """Generate insights if the current window has none. Returns how many were saved."""
+    from .models import MarketInsight
+    from .tools import generate_insights_from_news
+
+    now = time.time() if now is None else now
+    window = _window_id(now)
+    window_start = datetime.fromtimestamp(window * INSIGHT_WINDOW_SECONDS, tz=dt_timezone.utc)
+
+    if MarketInsight.objects.filter(generated_at__gte=window_start).exists():
+        return 0
+    if not _claim_window(window):
+        return 0
+
+    try:
+        saved = generate_insights_from_news(limit=INSIGHT_HEADLINE_LIMIT, max_insights=INSIGHTS_PER_WINDOW)
+    except Exception:
+        _release_window(window)
+        raise
+    if not saved:
+        _release_window(window)
+        logger.warning("Insight worker saved no insights for window %d; will retry", window)
+        return 0
+    logger.info("Insight worker generated %d insights for window %d", len(saved), window)
+    return len(saved)
+
+
+class InsightWorker:
+    """Daemon thread that runs ``run_insight_cycle`` every ``CHECK_INTERVAL_SECONDS``."""
+
+    def __init__(self, interval: float = CHECK_INTERVAL_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            logger.warning("Insight worker already running")
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="insight-worker")
+        self._thread.start()
+        logger.info("Insight worker started (window %ds)", INSIGHT_WINDOW_SECONDS)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+        logger.info("Insight worker stopped")
+
+    def _loop(self):
+        from django.db import close_old_connections
+
+        while not self._stop.is_set():
+            try:
+                with request_priority(PRIORITY_BACKGROUND):
+                    run_insight_cycle()
+            except Exception as exc:
+                logger.error("Insight worker cycle failed: %s", exc, exc_info=True)
+            finally:
+                close_old_connections()
+            self._stop.wait(self.interval)
+
+
+_worker_instance: Optional[InsightWorker] = None
+
+
+def get_insights_worker() -> InsightWorker:
+    global _worker_instance
+    if _worker_instance is None:
+        _worker_instance = InsightWorker()
+    return _worker_instance
+
+
+def start_insights_worker() -> InsightWorker:
+    worker = get_insights_worker()
+    worker.start()
+    return worker
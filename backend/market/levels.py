@@ -0,0 +1,141 @@
+"""
+Support/resistance level detection.
+
+Swing pivots (``market.patterns.pivot_points``) across the whole cached
+history are sorted by price and swept into clusters: a pivot joins the
+current cluster while it is within ``LEVEL_TOLERANCE_ATR`` × ATR of the
+cluster's lowest price. Each cluster becomes a level scored by its touches,
+with older touches decaying (half-life ``RECENCY_HALF_LIFE_BARS``).
+
+Sorting dominates, so detection is O(n log n) in the number of bars. Results
+are cached per (symbol, granularity) and reused until a new candle arrives.
+"""
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .candles import CandleSeries
+from .patterns import _atr, pivot_points
+
+LEVEL_HISTORY_BARS = 500
+LEVEL_TOLERANCE_ATR = 0.5
+RECENCY_HALF_LIFE_BARS = 100
+MIN_TOUCHES = 2
+MAX_LEVELS = 8
+_LEVEL_CACHE_MAX = 512
+
+
+@dataclass
+class PriceLevel:
+    price: float
+    touches: int
+    score: float
+    last_touch_bars_ago: int
+    low: float
+    high: float
+
+    def to_dict(self, current_price: Optional[float] = None) -> Dict[str, Any]:
+        data = asdict(self)
+        data["price"] = round(self.price, 6)
+        data["low"] = round(self.low, 6)
+        data["high"] = round(self.high, 6)
+        data["score"] = round(self.score, 3)
+        if current_price is not None:
+            data["kind"] = "support" if self.price <= current_price else "resistance"
+        return data
+
+
+def cluster_levels(
+    prices: np.ndarray,
+    bars_ago: np.ndarray,
+    tolerance: float,
+) -> List[PriceLevel]:
+    """Cluster pivot *prices* within *tolerance*; strongest levels first."""
+    if not len(prices):
+        return []
+    order = np.argsort(prices, kind="stable")
+    prices = prices[order]
+    bars_ago = bars_ago[order]
+    weights = 0.5 ** (bars_ago / RECENCY_HALF_LIFE_BARS)
+
+    # Cluster boundaries: a new cluster starts once a price is more than
+    # `tolerance` above the first price of the current cluster.
+    starts = [0]
+    for i in range(1, len(prices)):
+        if prices[i] - prices[starts[-1]] > tolerance:
+            starts.append(i)
+    bounds = starts + [len(prices)]
+
+    levels = []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        w = weights[lo:hi]
+        levels.append(PriceLevel(
+            price=float(np.average(prices[lo:hi], weights=w)),
+            touches=hi - lo,
+            score=float(w.sum()),
+            last_touch_bars_ago=int(bars_ago[lo:hi].min()),
+            low=float(prices[lo]),
+            high=float(prices[hi - 1]),
+        ))
+    levels.sort(key=lambda lvl: (-lvl.score, -lvl.touches))
+    return levels
+
+
+def detect_levels(series: CandleSeries) -> List[PriceLevel]:
+    """Scored support/resistance levels for the whole *series*."""
+    if len(series) < 3:
+        return []
+    highs, lows = pivot_points(series)
+    prices = np.concatenate([series.high[highs], series.low[lows]])
+    bars_ago = np.concatenate([highs, lows]).astype(np.float64)
+    bars_ago = (len(series) - 1) - bars_ago
+    tolerance = LEVEL_TOLERANCE_ATR * _atr(series)
+    if tolerance <= 0:
+        tolerance = float(np.abs(series.close[-1])) * 1e-4
+    return cluster_levels(prices, bars_ago, tolerance)
+
+
+# (symbol, granularity) -> (last epoch, bar count, levels)
+_level_cache: Dict[Tuple[str, int], Tuple[int, int, List[PriceLevel]]] = {}
+_level_cache_lock = threading.Lock()
+
+
+def get_levels(series: CandleSeries) -> List[PriceLevel]:
+    """``detect_levels`` cached until *series* gains a new candle."""
+    if not len(series):
+        return []
+    key = (series.symbol, series.granularity)
+    last_epoch = int(series.epoch[-1])
+    with _level_cache_lock:
+        cached = _level_cache.get(key)
+    if cached and cached[0] == last_epoch and cached[1] == len(series):
+        return cached[2]
+    levels = detect_levels(series)
+    with _level_cache_lock:
+        if len(_level_cache) >= _LEVEL_CACHE_MAX:
+            _level_cache.clear()
+        _level_cache[key] = (last_epoch, len(series), levels)
+    return levels
+
+
+def nearest_levels(
+    levels: List[PriceLevel],
+    current_price: float,
+) -> Tuple[Optional[PriceLevel], Optional[PriceLevel]]:
+    """Closest multi-touch support below and resistance above *current_price*.
+
+    Falls back to single-touch levels when no multi-touch level exists on
+    that side.
+    """
+    def _closest(candidates, below: bool) -> Optional[PriceLevel]:
+        side = [lvl for lvl in candidates if (lvl.price <= current_price) == below]
+        if not side:
+            return None
+        return max(side, key=lambda lvl: lvl.price) if below else min(side, key=lambda lvl: lvl.price)
+
+    strong = [lvl for lvl in levels if lvl.touches >= MIN_TOUCHES]
+    support = _closest(strong, below=True) or _closest(levels, below=True)
+    resistance = _closest(strong, below=False) or _closest(levels, below=False)
+    return support, resistance
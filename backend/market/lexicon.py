@@ -0,0 +1,177 @@
+"""
+Offline finance lexicon sentiment scorer.
+
+A small hand-tuned word/phrase lexicon for market headlines with negation
+("not", "fails to", "n't" flip the next few words) and intensifiers
+("sharply", "record", "slightly"). Scoring a handful of headlines takes
+microseconds, so ``get_sentiment`` only pays for an LLM call when the
+lexicon is unsure or the caller wants key points.
+
+Scores follow the VADER convention: raw valence sums are squashed into
+[-1, 1] with ``x / sqrt(x² + NORMALIZATION_ALPHA)``.
+"""
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Tuple
+
+NORMALIZATION_ALPHA = 15.0
+NEGATION_WINDOW = 3
+
+# Single-word valences (inflected forms resolve to these; see _valence).
+_POSITIVE = {
+    "surge": 2.0, "soar": 2.2, "rally": 2.0, "jump": 1.6, "gain": 1.4, "rise": 1.2,
+    "rising": 1.2, "climb": 1.3, "advance": 1.1, "rebound": 1.5, "recover": 1.3,
+    "bullish": 2.2, "upgrade": 1.6, "beat": 1.5, "outperform": 1.6, "strong": 1.1,
+    "strength": 1.1, "growth": 1.0, "boost": 1.3, "optimism": 1.5, "optimistic": 1.5,
+    "upbeat": 1.4, "higher": 0.9, "high": 0.5, "record": 0.6, "profit": 1.0,
+    "expand": 0.9, "robust": 1.2, "improve": 1.1, "buy": 0.8, "inflow": 1.0,
+    "approve": 1.0, "approval": 1.0, "breakout": 1.3, "peak": 0.6,
+}
+_NEGATIVE = {
+    "plunge": -2.3, "crash": -2.6, "slump": -2.0, "tumble": -2.0, "sink": -1.7,
+    "fall": -1.3, "falling": -1.3, "fell": -1.3, "drop": -1.4, "decline": -1.3,
+    "slide": -1.3, "slip": -1.0, "lose": -1.2, "loss": -1.3, "bearish": -2.2,
+    "downgrade": -1.7, "miss": -1.4, "weak": -1.2, "weakness": -1.2, "recession": -2.0,
+    "selloff": -2.0, "sell-off": -2.0, "fear": -1.5, "worry": -1.3, "concern": -1.1,
+    "risk": -0.5, "warn": -1.3, "warning": -1.3, "crisis": -2.2, "default": -1.9,
+    "bankrupt": -2.4, "lower": -0.9, "low": -0.5, "outflow": -1.0, "volatile": -0.6,
+    "turmoil": -1.9, "slowdown": -1.5, "contraction": -1.5, "inflation": -0.6,
+    "hack": -1.9, "fraud": -2.2, "lawsuit": -1.3, "ban": -1.5, "sanction": -1.2,
+    "tariff": -0.9, "layoff": -1.5, "cut": -0.6,
+}
+_PHRASES: Dict[Tuple[str, ...], float] = {
+    ("all-time", "high"): 2.2,
+    ("record", "high"): 2.0,
+    ("risk", "on"): 1.2,
+    ("risk-on",): 1.2,
+    ("risk", "off"): -1.4,
+    ("risk-off",): -1.4,
+    ("beats", "expectations"): 1.8,
+    ("misses", "expectations"): -1.8,
+    ("rate", "hike"): -0.9,
+    ("rate", "hikes"): -0.9,
+    ("rate", "cut"): 0.9,
+    ("rate", "cuts"): 0.9,
+    ("record", "low"): -2.0,
+    ("multi-year", "low"): -1.8,
+    ("short", "squeeze"): 1.2,
+    ("profit", "warning"): -2.0,
+    ("safe", "haven"): -0.4,
+}
+_NEGATORS = {"not", "no", "never", "without", "neither", "nor", "fails", "failed", "barely", "hardly"}
+_BOOSTERS = {
+    "sharply": 0.5, "strongly": 0.4, "significantly": 0.4, "very": 0.3, "massive": 0.5,
+    "huge": 0.4, "biggest": 0.5, "steep": 0.4, "steeply": 0.4, "heavily": 0.4, "extremely": 0.5,
+    "slightly": -0.5, "modestly": -0.4, "marginally": -0.5, "somewhat": -0.3, "little": -0.3,
+}
+_TOKEN_RE = re.compile(r"[a-z][a-z'\-]*")
+
+_LEXICON = {**_POSITIVE, **_NEGATIVE}
+_SUFFIXES = ("ing", "ed", "es", "s", "d")
+
+
+def _valence(token: str) -> float:
+    """Lexicon value of *token*, trying simple inflections ("surged" → "surge")."""
+    value = _LEXICON.get(token)
+    if value is not None:
+        return value
+    if token.endswith(("ies", "ied")):
+        value = _LEXICON.get(token[:-3] + "y")
+        if value is not None:
+            return value
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            base = token[:-len(suffix)]
+            candidates = (base, base + "e", base[:-1] if base[-1] == base[-2] else base)
+            for candidate in candidates:
+                if candidate in _LEXICON:
+                    return _LEXICON[candidate]
+    return 0.0
+
+
+def _normalize(raw: float) -> float:
+    return raw / math.sqrt(raw * raw + NORMALIZATION_ALPHA) if raw else 0.0
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def score_text(text: str) -> Tuple[float, int]:
+    """Score one text. Returns ``(score in [-1, 1], lexicon hits)``."""
+    tokens = tokenize(text)
+    raw = 0.0
+    hits = 0
+    i = 0
+    while i < len(tokens):
+        value = 0.0
+        width = 1
+        for phrase, phrase_value in _PHRASES.items():
+            if tuple(tokens[i:i + len(phrase)]) == phrase:
+                value, width = phrase_value, len(phrase)
+                break
+        if not value:
+            value = _valence(tokens[i])
+        if value:
+            window = tokens[max(0, i - NEGATION_WINDOW):i]
+            if any(t in _NEGATORS or t.endswith("n't") for t in window):
+                value *= -0.75
+            if i > 0 and tokens[i - 1] in _BOOSTERS:
+                value *= 1.0 + _BOOSTERS[tokens[i - 1]]
+            if i + width < len(tokens) and tokens[i + width] in _BOOSTERS:
+                value *= 1.0 + _BOOSTERS[tokens[i + width]]
+            raw += value
+            hits += 1
+        i += width
+    return _normalize(raw), hits
+
+
+@dataclass
+class LexiconSentiment:
+    score: float
+    confidence: float
+    hits: int
+    article_scores: List[float] = field(default_factory=list)
+
+    @property
+    def label(self) -> str:
+        if self.score > 0.1:
+            return "bullish"
+        if self.score < -0.1:
+            return "bearish"
+        return "neutral"
+
+
+def score_articles(articles: Sequence[Dict[str, Any]]) -> LexiconSentiment:
+    """Aggregate sentiment over article titles + descriptions.
+
+    Confidence grows with coverage (share of articles with lexicon hits),
+    agreement (articles pointing the same way) and the number of hits.
+    """
+    scores: List[float] = []
+    total_hits = 0
+    for article in articles:
+        title_score, title_hits = score_text(article.get("title", ""))
+        desc_score, desc_hits = score_text(article.get("description") or "")
+        hits = title_hits + desc_hits
+        total_hits += hits
+        if hits:
+            # Headlines carry more signal than descriptions.
+            weight = 2 * title_hits + desc_hits
+            scores.append((2 * title_hits * title_score + desc_hits * desc_score) / weight)
+    if not scores:
+        return LexiconSentiment(score=0.0, confidence=0.0, hits=0)
+
+    mean = sum(scores) / len(scores)
+    coverage = len(scores) / max(1, len(articles))
+    same_side = sum(1 for s in scores if (s > 0) == (mean > 0) and s != 0) / len(scores)
+    evidence = min(1.0, total_hits / 6.0)
+    confidence = round(coverage * same_side * evidence * min(1.0, abs(mean) * 3), 3)
+    return LexiconSentiment(score=round(mean, 3), confidence=confidence, hits=total_hits, article_scores=scores)
+
+
+def headline_impact(article: Dict[str, Any]) -> float:
+    """Absolute lexicon strength of a headline (used for ranking)."""
+    score, _ = score_text(f"{article.get('title', '')} {article.get('description') or ''}")
+    return abs(score)
@@ -0,0 +1,54 @@
+"""Backfill the on-disk candle store: python manage.py backfill_candles "EUR/USD" BTC/USD --timeframe 1h --days 365"""
+import time
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from market import candle_store
+from market.tools import TIMEFRAME_TO_GRANULARITY, _get_deriv_symbol
+from tradeiq.rate_limit import PRIORITY_BACKGROUND, request_priority
+
+
+class Command(BaseCommand):
+    help = "Page Deriv ticks_history into the local append-only candle store"
+
+    def add_arguments(self, parser):
+        parser.add_argument("instruments", nargs="*", help="Instrument names or Deriv symbols")
+        parser.add_argument("--timeframe", default="1h", choices=sorted(TIMEFRAME_TO_GRANULARITY))
+        parser.add_argument("--days", type=int, default=365, help="History to fetch when the store is empty")
+        parser.add_argument("--rebuild", action="store_true", help="Delete stored history and refetch")
+        parser.add_argument("--list", action="store_true", help="Show what is stored and exit")
+
+    def handle(self, *args, **options):
+        if candle_store.store_dir() is None:
+            raise CommandError("CANDLE_STORE_DIR is not set")
+        if options["list"]:
+            for name, info in candle_store.store_summary().items():
+                first = datetime.fromtimestamp(info["first_epoch"], tz=timezone.utc).date()
+                last = datetime.fromtimestamp(info["last_epoch"], tz=timezone.utc).isoformat()
+                self.stdout.write(f"{name}: {info['bars']} bars, {first} → {last}")
+            return
+        if not options["instruments"]:
+            raise CommandError("Pass at least one instrument (or --list)")
+
+        granularity = TIMEFRAME_TO_GRANULARITY[options["timeframe"]]
+        since = int(time.time()) - options["days"] * 86400
+        for instrument in options["instruments"]:
+            symbol = _get_deriv_symbol(instrument)
+            if options["rebuild"]:
+                path = candle_store.candle_path(symbol, granularity)
+                if path is not None and path.exists():
+                    path.unlink()
+                candle_store.clear_maps()
+
+            def progress(bars, first_epoch, symbol=symbol):
+                reached = datetime.fromtimestamp(first_epoch, tz=timezone.utc).date()
+                self.stdout.write(f"  {symbol}: +{bars} bars (back to {reached})")
+
+            try:
+                with request_priority(PRIORITY_BACKGROUND):
+                    written = candle_store.backfill(symbol, granularity, since, on_page=progress)
+            except Exception as exc:
+                self.stderr.write(self.style.ERROR(f"{instrument} ({symbol}): {exc}"))
+                continue
+            self.stdout.write(self.style.SUCCESS(f"{instrument} ({symbol}): stored {written} new candles"))
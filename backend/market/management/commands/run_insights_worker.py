@@ -0,0 +1,27 @@
+"""Start the background insight producer: python manage.py run_insights_worker"""
+from django.core.management.base import BaseCommand
+from market.insights_worker import run_insight_cycle, start_insights_worker
+
+
+class Command(BaseCommand):
+    help = "Generate news-based market insights once per window in the background"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run a single cycle and exit")
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            saved = run_insight_cycle()
+            self.stdout.write(self.style.SUCCESS(f"Generated {saved} insights."))
+            return
+
+        self.stdout.write("Starting insight worker...")
+        worker = start_insights_worker()
+        self.stdout.write(self.style.SUCCESS("Insight worker running. Press Ctrl+C to stop."))
+        try:
+            import time
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            worker.stop()
+            self.stdout.write("Insight worker stopped.")
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='marketinsight',
+            index=models.Index(fields=['generated_at'], name='market_insight_generated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='marketinsight',
+            index=models.Index(fields=['instrument', 'generated_at'], name='market_insight_instr_gen_idx'),
+        ),
+    ]
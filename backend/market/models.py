@@ -17,3 +17,7 @@ class MarketInsight(models.Model):
     class Meta:
         db_table = "market_insights"
         ordering = ["-generated_at"]
+        indexes = [
+            models.Index(fields=["generated_at"], name="market_insight_generated_idx"),
+            models.Index(fields=["instrument", "generated_at"], name="market_insight_instr_gen_idx"),
+        ]
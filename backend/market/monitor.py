@@ -2,7 +2,9 @@
 Real-time Market Monitor — TradeIQ's heartbeat.
 
 Architecture:
-1. Background daemon thread scans watchlist every 5 seconds
+1. Background daemon thread pops due instruments from an adaptive
+   ScanScheduler (see market/scheduler.py): calm instruments are scanned less
+   often, volatile ones more often, closed markets are parked until reopen
 2. Compares current price to cached previous price
 3. On >1% change, triggers 5-Agent Pipeline in a separate thread
 4. Pipeline result pushed to all connected WebSocket clients via Django Channels
@@ -14,14 +16,20 @@ import threading
 import time
 import json
 import logging
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List
 from datetime import datetime
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
+from market.correlation import get_correlation_service
+from market.scheduler import ScanScheduler
+from tradeiq.rate_limit import PRIORITY_BACKGROUND, request_priority
+
 logger = logging.getLogger("tradeiq.monitor")
 
 SCAN_INTERVAL_SECONDS = 5
+# Upper bound on a single sleep so stop() is honoured promptly.
+MAX_IDLE_SLEEP_SECONDS = 1.0
 VOLATILITY_THRESHOLD_PCT = 1.0
 HIGH_VOLATILITY_PCT = 3.0
 DEFAULT_WATCHLIST = [
@@ -29,16 +37,62 @@ DEFAULT_WATCHLIST = [
     "Volatility 100 Index", "Volatility 75 Index",
 ]
 
-_price_cache: Dict[str, float] = {}
 _monitor_instance: Optional["MarketMonitor"] = None
 
 
+class LivePriceSource:
+    """Deriv price feed and market hours, as used by the monitor by default.
+
+    ``market.replay.ReplaySource`` implements the same two methods over
+    recorded candles.
+    """
+
+    def price(self, instrument: str) -> Dict:
+        from market.tools import fetch_price_data
+
+        return fetch_price_data(instrument)
+
+    def reopens_at(self, instrument: str, now: float) -> Optional[float]:
+        """None while *instrument* is open, else when it reopens (epoch seconds)."""
+        from market.tools import _is_market_closed, _market_reopens_at
+
+        if not _is_market_closed(instrument):
+            return None
+        return _market_reopens_at(instrument).timestamp()
+
+
 class MarketMonitor:
-    """Continuously monitors market prices and triggers alerts on volatility."""
+    """Continuously monitors market prices and triggers alerts on volatility.
 
-    def __init__(self, watchlist: Optional[List[str]] = None):
+    The price feed, clock and sleep are injectable so the monitor can be
+    driven by ``market.replay`` at accelerated speed; ``on_event`` receives
+    every volatility event and ``run_pipeline=False`` skips the agent
+    pipeline and WebSocket push.
+    """
+
+    def __init__(
+        self,
+        watchlist: Optional[List[str]] = None,
+        price_source=None,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+        on_event: Optional[Callable[[Dict], None]] = None,
+        run_pipeline: bool = True,
+    ):
         self.watchlist = watchlist or DEFAULT_WATCHLIST
+        self.price_source = price_source or LivePriceSource()
+        self.clock = clock
+        self.sleep = sleep
+        self.on_event = on_event
+        self.run_pipeline = run_pipeline
+        self.scheduler = ScanScheduler(
+            self.watchlist,
+            threshold_pct=VOLATILITY_THRESHOLD_PCT,
+            base_interval=SCAN_INTERVAL_SECONDS,
+            clock=clock,
+        )
         self.channel_layer = None
+        self._price_cache: Dict[str, float] = {}
         self._running = False
         self._thread: Optional[threading.Thread] = None
 
@@ -46,13 +100,16 @@ class MarketMonitor:
         if self._running:
             logger.warning("Monitor already running")
             return
+        from market.trading_times import get_trading_calendar
+
+        get_trading_calendar()  # warm the market-hours calendar in the background
         self._running = True
         self._thread = threading.Thread(
             target=self._monitor_loop, daemon=True, name="market-monitor"
         )
         self._thread.start()
         logger.info(
-            "Market monitor started. Watching %d instruments every %ds",
+            "Market monitor started. Watching %d instruments (adaptive cadence, base %ds)",
             len(self.watchlist), SCAN_INTERVAL_SECONDS,
         )
 
@@ -63,38 +120,59 @@ class MarketMonitor:
         logger.info("Market monitor stopped")
 
     def _monitor_loop(self):
-        while self._running:
-            try:
-                self._scan_markets()
-            except Exception as exc:
-                logger.error("Monitor scan error: %s", exc, exc_info=True)
-            time.sleep(SCAN_INTERVAL_SECONDS)
+        # Scans yield upstream request budget to interactive callers.
+        with request_priority(PRIORITY_BACKGROUND):
+            while self._running:
+                try:
+                    # Keep the analyst's correlation lookups off the network
+                    get_correlation_service().refresh_in_background()
+                    self._scan_markets()
+                except Exception as exc:
+                    logger.error("Monitor scan error: %s", exc, exc_info=True)
+                self.sleep(min(self.scheduler.seconds_until_next(), MAX_IDLE_SLEEP_SECONDS))
 
     def _scan_markets(self):
-        from market.tools import fetch_price_data
+        """Scan every instrument that is due, then reschedule it."""
+        for instrument in self.scheduler.pop_due():
+            self._scan_instrument(instrument)
+
+    def _scan_instrument(self, instrument: str):
+        now = self.clock()
+        reopens_at = self.price_source.reopens_at(instrument, now)
+        if reopens_at is not None:
+            until = reopens_at
+            if until <= now:
+                # Reopen beyond the calendar horizon: re-check at the idle cadence.
+                until = now + self.scheduler.max_interval
+            self.scheduler.defer(instrument, until)
+            self._price_cache.pop(instrument, None)
+            logger.debug("%s market closed; next scan at %s", instrument, until)
+            return
+
+        current_price = None
+        try:
+            result = self.price_source.price(instrument)
+            if "error" in result or not result.get("price"):
+                return
+
+            current_price = float(result["price"])
+            cached_price = self._price_cache.get(instrument)
+
+            if cached_price is not None and cached_price > 0:
+                change_pct = ((current_price - cached_price) / cached_price) * 100
+                if abs(change_pct) >= VOLATILITY_THRESHOLD_PCT:
+                    self._handle_volatility_event(
+                        instrument=instrument,
+                        current_price=current_price,
+                        previous_price=cached_price,
+                        change_pct=change_pct,
+                    )
 
-        for instrument in self.watchlist:
-            try:
-                result = fetch_price_data(instrument)
-                if "error" in result or not result.get("price"):
-                    continue
-
-                current_price = float(result["price"])
-                cached_price = _price_cache.get(instrument)
-
-                if cached_price is not None and cached_price > 0:
-                    change_pct = ((current_price - cached_price) / cached_price) * 100
-                    if abs(change_pct) >= VOLATILITY_THRESHOLD_PCT:
-                        self._handle_volatility_event(
-                            instrument=instrument,
-                            current_price=current_price,
-                            previous_price=cached_price,
-                            change_pct=change_pct,
-                        )
-
-                _price_cache[instrument] = current_price
-            except Exception as exc:
-                logger.warning("Error scanning %s: %s", instrument, exc)
+            self._price_cache[instrument] = current_price
+        except Exception as exc:
+            logger.warning("Error scanning %s: %s", instrument, exc)
+        finally:
+            self.scheduler.record(instrument, current_price)
 
     def _handle_volatility_event(
         self,
@@ -110,6 +188,18 @@ class MarketMonitor:
             "VOLATILITY EVENT: %s %s %+.2f%% (%.2f -> %.2f)",
             instrument, direction, change_pct, previous_price, current_price,
         )
+        if self.on_event:
+            self.on_event({
+                "instrument": instrument,
+                "price": current_price,
+                "previous_price": previous_price,
+                "change_pct": change_pct,
+                "direction": direction,
+                "magnitude": magnitude,
+                "at": self.clock(),
+            })
+        if not self.run_pipeline:
+            return
 
         threading.Thread(
             target=self._run_pipeline_and_push,
@@ -195,6 +285,9 @@ def get_monitor() -> MarketMonitor:
 
 
 def start_monitor() -> MarketMonitor:
+    from market.shm_ticks import start_publisher
+
+    start_publisher()  # this process is the host's price feed
     monitor = get_monitor()
     monitor.start()
     return monitor
@@ -0,0 +1,177 @@
+"""
+Local candlestick pattern engine.
+
+Runs over a cached ``CandleSeries`` (see ``market.candles``) with numpy masks
+instead of calling Finnhub per request, so it works for every Deriv symbol —
+synthetic indices included — and needs no API key.
+
+Single/two-bar patterns (doji, hammer, shooting star, pin bar, engulfing)
+are boolean masks over the whole series. Swing pivots use a centred rolling
+max/min; double tops/bottoms pair consecutive pivots of the same kind.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .candles import CandleSeries
+
+PIVOT_SPAN = 3  # bars on each side a swing high/low must dominate
+TREND_LOOKBACK = 5
+ATR_PERIOD = 14
+DOUBLE_PATTERN_TOLERANCE_ATR = 0.5  # peak/trough match tolerance
+DOUBLE_PATTERN_MIN_DEPTH_ATR = 1.0  # pullback between the two peaks
+
+
+def _atr(series: CandleSeries, period: int = ATR_PERIOD) -> float:
+    if len(series) < 2:
+        return float(series.high[-1] - series.low[-1]) if len(series) else 0.0
+    prev_close = series.close[:-1]
+    true_range = np.maximum(
+        series.high[1:] - series.low[1:],
+        np.maximum(np.abs(series.high[1:] - prev_close), np.abs(series.low[1:] - prev_close)),
+    )
+    return float(true_range[-period:].mean())
+
+
+def pivot_points(series: CandleSeries, span: int = PIVOT_SPAN) -> Tuple[np.ndarray, np.ndarray]:
+    """Indices of swing highs and swing lows (``span`` bars either side)."""
+    width = 2 * span + 1
+    if len(series) < width:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    highs = sliding_window_view(series.high, width)
+    lows = sliding_window_view(series.low, width)
+    centre_high = series.high[span:-span]
+    centre_low = series.low[span:-span]
+    # argmax picks the first maximum, so flat tops only count once
+    swing_high = (highs.argmax(axis=1) == span) & (centre_high >= highs.max(axis=1))
+    swing_low = (lows.argmin(axis=1) == span) & (centre_low <= lows.min(axis=1))
+    return np.flatnonzero(swing_high) + span, np.flatnonzero(swing_low) + span
+
+
+def candlestick_masks(series: CandleSeries) -> Dict[str, np.ndarray]:
+    """Boolean mask per single/two-bar pattern, aligned with the series."""
+    o, h, l, c = series.open, series.high, series.low, series.close
+    n = len(series)
+    body = np.abs(c - o)
+    rng = h - l
+    upper = h - np.maximum(o, c)
+    lower = np.minimum(o, c) - l
+    has_range = rng > 0
+
+    prior_close = np.full(n, np.nan)
+    if n > TREND_LOOKBACK:
+        prior_close[TREND_LOOKBACK:] = c[:-TREND_LOOKBACK]
+    with np.errstate(invalid="ignore"):
+        after_decline = np.roll(c, 1) < np.roll(prior_close, 1)
+        after_advance = np.roll(c, 1) > np.roll(prior_close, 1)
+    after_decline[:1] = after_advance[:1] = False
+
+    doji = has_range & (body <= 0.1 * rng)
+    real_body = has_range & (body > 0.1 * rng)
+    hammer_shape = real_body & (lower >= 2 * body) & (upper <= 0.5 * body)
+    star_shape = real_body & (upper >= 2 * body) & (lower <= 0.5 * body)
+
+    o1, c1, body1 = np.roll(o, 1), np.roll(c, 1), np.roll(body, 1)
+    bullish_engulfing = (c1 < o1) & (c > o) & (o <= c1) & (c >= o1) & (body > body1)
+    bearish_engulfing = (c1 > o1) & (c < o) & (o >= c1) & (c <= o1) & (body > body1)
+    bullish_engulfing[:1] = bearish_engulfing[:1] = False
+
+    return {
+        "doji": doji,
+        "hammer": hammer_shape & after_decline,
+        "shooting_star": star_shape & after_advance,
+        "bullish_pin_bar": has_range & (lower >= rng * 2 / 3),
+        "bearish_pin_bar": has_range & (upper >= rng * 2 / 3),
+        "bullish_engulfing": bullish_engulfing,
+        "bearish_engulfing": bearish_engulfing,
+    }
+
+
+_PATTERN_BIAS = {
+    "doji": "neutral",
+    "hammer": "bullish",
+    "shooting_star": "bearish",
+    "bullish_pin_bar": "bullish",
+    "bearish_pin_bar": "bearish",
+    "bullish_engulfing": "bullish",
+    "bearish_engulfing": "bearish",
+    "double_top": "bearish",
+    "double_bottom": "bullish",
+}
+
+
+def _double_pattern(
+    series: CandleSeries,
+    peaks: np.ndarray,
+    troughs: np.ndarray,
+    atr: float,
+    top: bool,
+) -> Optional[Dict[str, Any]]:
+    """Most recent double top (``top``) or bottom from consecutive pivots."""
+    if len(peaks) < 2 or atr <= 0:
+        return None
+    prices = series.high if top else series.low
+    between_prices = series.low if top else series.high
+    for first, second in zip(peaks[-2::-1], peaks[:0:-1]):
+        if abs(prices[first] - prices[second]) > DOUBLE_PATTERN_TOLERANCE_ATR * atr:
+            continue
+        between = troughs[(troughs > first) & (troughs < second)]
+        if not len(between):
+            continue
+        neckline_idx = between[np.argmin(between_prices[between])] if top else between[np.argmax(between_prices[between])]
+        neckline = float(between_prices[neckline_idx])
+        depth = (min(prices[first], prices[second]) - neckline) if top else (neckline - max(prices[first], prices[second]))
+        if depth < DOUBLE_PATTERN_MIN_DEPTH_ATR * atr:
+            continue
+        last_close = float(series.close[-1])
+        confirmed = last_close < neckline if top else last_close > neckline
+        return {
+            "index": int(second),
+            "first_index": int(first),
+            "price": float(prices[second]),
+            "neckline": neckline,
+            "status": "confirmed" if confirmed else "forming",
+        }
+    return None
+
+
+def detect_patterns(series: CandleSeries, lookback: int = 20) -> Dict[str, Any]:
+    """Detect patterns in *series*; candlestick hits are limited to the last *lookback* bars."""
+    n = len(series)
+    if n < 3:
+        return {"patterns": [], "pivots": {"highs": [], "lows": []}}
+
+    def _stamp(idx: int) -> Dict[str, Any]:
+        return {"index": int(idx), "time": int(series.epoch[idx]), "bars_ago": int(n - 1 - idx)}
+
+    patterns: List[Dict[str, Any]] = []
+    start = max(0, n - lookback)
+    for name, mask in candlestick_masks(series).items():
+        for idx in np.flatnonzero(mask[start:]) + start:
+            patterns.append({
+                "pattern": name,
+                "patterntype": _PATTERN_BIAS[name],
+                "price": float(series.close[idx]),
+                **_stamp(idx),
+            })
+
+    highs, lows = pivot_points(series)
+    atr = _atr(series)
+    for name, found in (
+        ("double_top", _double_pattern(series, highs, lows, atr, top=True)),
+        ("double_bottom", _double_pattern(series, lows, highs, atr, top=False)),
+    ):
+        if found:
+            idx = found.pop("index")
+            patterns.append({"pattern": name, "patterntype": _PATTERN_BIAS[name], **found, **_stamp(idx)})
+
+    patterns.sort(key=lambda p: (p["bars_ago"], p["pattern"]))
+    return {
+        "patterns": patterns,
+        "pivots": {
+            "highs": [{"price": float(series.high[i]), **_stamp(i)} for i in highs[-5:]],
+            "lows": [{"price": float(series.low[i]), **_stamp(i)} for i in lows[-5:]],
+        },
+    }
@@ -0,0 +1,130 @@
+"""
+Provider-aware response cache for upstream market data calls.
+
+Each provider has its own freshness budget (Finnhub's economic calendar
+changes a few times a day, quotes every second, patterns only when a candle
+closes), so entries carry per-provider TTLs. Error responses are cached for
+a shorter ``negative_ttl`` so a failing or rate-limited upstream is not
+hammered by every request.
+
+Concurrent misses for the same key wait on one upstream fetch
+(single-flight). Per-provider counters report how many upstream calls the
+cache saved; see ``provider_cache_stats()`` / ``GET /api/market/provider-stats/``.
+"""
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# provider -> (ttl seconds, negative ttl seconds)
+PROVIDER_TTLS: Dict[str, Tuple[float, float]] = {
+    "finnhub_calendar": (15 * 60, 120),
+    "finnhub_quote": (5, 30),
+    "patterns": (3600, 60),  # callers pass the time until candle close
+}
+DEFAULT_TTLS = (60, 30)
+MAX_ENTRIES_PER_PROVIDER = 1024
+
+
+@dataclass
+class ProviderStats:
+    hits: int = 0
+    negative_hits: int = 0
+    misses: int = 0
+    upstream_calls: int = 0
+    upstream_errors: int = 0
+
+    @property
+    def calls_saved(self) -> int:
+        return self.hits + self.negative_hits
+
+
+_entries: Dict[Tuple[str, Hashable], Tuple[float, bool, Any]] = {}  # -> (expires_at, is_error, value)
+_stats: Dict[str, ProviderStats] = {}
+_lock = threading.Lock()
+_inflight: Dict[Tuple[str, Hashable], threading.Lock] = {}
+
+
+def _default_is_error(value: Any) -> bool:
+    return not value or (isinstance(value, dict) and bool(value.get("error")))
+
+
+def cached_call(
+    provider: str,
+    key: Hashable,
+    fetch: Callable[[], Any],
+    ttl: Optional[float] = None,
+    negative_ttl: Optional[float] = None,
+    is_error: Callable[[Any], bool] = _default_is_error,
+) -> Any:
+    """Return a cached ``fetch()`` result for ``(provider, key)``.
+
+    Successful results live for *ttl* (provider default when None); results
+    for which *is_error* is true live for *negative_ttl*. Exceptions from
+    *fetch* propagate and are not cached.
+    """
+    default_ttl, default_negative = PROVIDER_TTLS.get(provider, DEFAULT_TTLS)
+    ttl = default_ttl if ttl is None else ttl
+    negative_ttl = default_negative if negative_ttl is None else negative_ttl
+    cache_key = (provider, key)
+
+    def _lookup() -> Tuple[bool, Any]:
+        entry = _entries.get(cache_key)
+        if entry and entry[0] > time.time():
+            stats = _stats.setdefault(provider, ProviderStats())
+            if entry[1]:
+                stats.negative_hits += 1
+            else:
+                stats.hits += 1
+            return True, entry[2]
+        return False, None
+
+    with _lock:
+        found, value = _lookup()
+        if found:
+            return value
+        flight = _inflight.setdefault(cache_key, threading.Lock())
+
+    with flight:
+        with _lock:
+            found, value = _lookup()  # filled while we waited
+            if found:
+                return value
+            stats = _stats.setdefault(provider, ProviderStats())
+            stats.misses += 1
+            stats.upstream_calls += 1
+        try:
+            value = fetch()
+        except Exception:
+            with _lock:
+                stats.upstream_errors += 1
+                _inflight.pop(cache_key, None)
+            raise
+
+        failed = is_error(value)
+        with _lock:
+            if failed:
+                stats.upstream_errors += 1
+            if sum(1 for p, _ in _entries if p == provider) >= MAX_ENTRIES_PER_PROVIDER:
+                now = time.time()
+                for stale in [k for k, e in _entries.items() if k[0] == provider and e[0] <= now]:
+                    del _entries[stale]
+            _entries[cache_key] = (time.time() + (negative_ttl if failed else ttl), failed, value)
+            _inflight.pop(cache_key, None)
+        return value
+
+
+def provider_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Per-provider counters including ``calls_saved``."""
+    with _lock:
+        return {
+            provider: {**asdict(stats), "calls_saved": stats.calls_saved}
+            for provider, stats in _stats.items()
+        }
+
+
+def clear_provider_cache(reset_stats: bool = False) -> None:
+    with _lock:
+        _entries.clear()
+        if reset_stats:
+            _stats.clear()
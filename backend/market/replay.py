@@ -0,0 +1,319 @@
+"""
+Market replay: drive the monitor and agents from recorded candles.
+
+``ReplaySource`` turns stored candles (``market.candle_store``) into a tick
+path and serves it through the same interfaces as the live feed:
+
+- ``price()`` / ``reopens_at()`` — the ``MarketMonitor`` price-source
+  protocol (see ``market.monitor.LivePriceSource``);
+- ``live_feed()`` — temporarily routes ``market.tools.fetch_price_data`` /
+  ``fetch_price_history`` to the replay, so ``market_monitor_detect`` sees
+  the recorded market.
+
+Only the monitor and the detector are replayed. The agent pipeline
+(``run_pipeline=True`` / ``--pipeline``) still reads live data: agents
+import the price functions by name, technicals and levels go through
+``market.candles``, and the pipeline runs on threads that outlive
+``live_feed()``.
+
+Time comes from a ``VirtualClock`` that only moves when something sleeps on
+it. At ``speed`` N a sleep of N seconds takes one real second (1x–1000x);
+speed 0 skips real sleeping entirely, which is what benchmarks use.
+
+Each candle becomes four ticks (open, the extreme against the candle's
+direction, the other extreme, close) spread over the bar, so intrabar
+moves reach the monitor the way they would live. Gaps longer than
+``GAP_FACTOR`` bars (weekends, halts) are reported as closed markets.
+
+Offline use only: ``live_feed()`` patches module attributes process-wide.
+
+CLI: ``python manage.py replay_market "EUR/USD" --days 30 --speed 0``
+"""
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from .candles import CandleSeries
+
+MAX_SPEED = 1000.0
+GAP_FACTOR = 3
+# Fractions of a bar at which the open / first extreme / second extreme / close ticks occur.
+_TICK_OFFSETS = np.array([0.0, 0.25, 0.5, 0.75])
+
+
+class VirtualClock:
+    """Simulated time that advances only through ``sleep``."""
+
+    def __init__(self, start: float, speed: float = 0.0):
+        if speed < 0 or speed > MAX_SPEED:
+            raise ValueError(f"speed must be 0 (unthrottled) or up to {MAX_SPEED:g}x")
+        self.speed = speed
+        self._now = float(start)
+        self._lock = threading.Lock()
+
+    def now(self) -> float:
+        with self._lock:
+            return self._now
+
+    def sleep(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        if self.speed:
+            time.sleep(seconds / self.speed)
+        with self._lock:
+            self._now += seconds
+
+
+def resample(series: CandleSeries, granularity: int) -> CandleSeries:
+    """Aggregate *series* into bars of *granularity* seconds (a multiple of its own)."""
+    if granularity <= series.granularity or not len(series):
+        return series
+    buckets = series.epoch // granularity
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(series)] - 1
+    return CandleSeries(
+        symbol=series.symbol,
+        granularity=granularity,
+        epoch=buckets[starts] * granularity,
+        open=series.open[starts],
+        high=np.maximum.reduceat(series.high, starts),
+        low=np.minimum.reduceat(series.low, starts),
+        close=series.close[ends],
+    )
+
+
+def _head(series: CandleSeries, count: int) -> CandleSeries:
+    return CandleSeries(
+        symbol=series.symbol,
+        granularity=series.granularity,
+        epoch=series.epoch[:count],
+        open=series.open[:count],
+        high=series.high[:count],
+        low=series.low[:count],
+        close=series.close[:count],
+    )
+
+
+@dataclass
+class _Track:
+    series: CandleSeries
+    times: np.ndarray
+    prices: np.ndarray
+
+
+class ReplaySource:
+    """Recorded candles for several instruments, replayed on a ``VirtualClock``."""
+
+    def __init__(self, series: Dict[str, CandleSeries], clock: Optional[VirtualClock] = None):
+        self._tracks: Dict[str, _Track] = {}
+        for instrument, candles in series.items():
+            if len(candles):
+                self._tracks[instrument] = _Track(candles, *self._tick_path(candles))
+        if not self._tracks:
+            raise ValueError("No candles to replay")
+        self.start = min(float(t.times[0]) for t in self._tracks.values())
+        self.end = max(float(t.times[-1]) for t in self._tracks.values())
+        self.clock = clock or VirtualClock(self.start)
+        self.ticks_served = 0
+
+    @classmethod
+    def from_store(
+        cls,
+        instruments: Iterable[str],
+        granularity: int,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        speed: float = 0.0,
+    ) -> "ReplaySource":
+        from . import candle_store
+        from .tools import _get_deriv_symbol
+
+        series = {
+            instrument: candle_store.load_candles(_get_deriv_symbol(instrument), granularity, start, end)
+            for instrument in instruments
+        }
+        missing = [name for name, s in series.items() if not len(s)]
+        if missing:
+            raise ValueError(f"No stored candles for {', '.join(missing)}; run backfill_candles first")
+        source = cls(series)
+        source.clock = VirtualClock(source.start, speed)
+        return source
+
+    @staticmethod
+    def _tick_path(series: CandleSeries):
+        bullish = series.close >= series.open
+        first = np.where(bullish, series.low, series.high)
+        second = np.where(bullish, series.high, series.low)
+        prices = np.column_stack([series.open, first, second, series.close]).ravel()
+        times = (series.epoch[:, None] + _TICK_OFFSETS * series.granularity).ravel()
+        return times, prices
+
+    @property
+    def instruments(self) -> List[str]:
+        return list(self._tracks)
+
+    def _index(self, track: _Track, now: float) -> int:
+        return int(np.searchsorted(track.times, now, side="right")) - 1
+
+    # ── MarketMonitor price-source protocol ─────────────────────────
+
+    def price(self, instrument: str) -> Dict[str, Any]:
+        now = self.clock.now()
+        track = self._tracks.get(instrument)
+        idx = self._index(track, now) if track else -1
+        if idx < 0:
+            return {"instrument": instrument, "price": None, "error": "No replay data at this time", "source": "replay"}
+        self.ticks_served += 1
+        return {
+            "instrument": instrument,
+            "price": float(track.prices[idx]),
+            "timestamp": datetime.fromtimestamp(now, tz=timezone.utc).isoformat(),
+            "source": "replay",
+        }
+
+    def reopens_at(self, instrument: str, now: float) -> Optional[float]:
+        track = self._tracks.get(instrument)
+        if track is None:
+            return None
+        idx = self._index(track, now)
+        if idx + 1 >= len(track.times):
+            return None  # past the end: the last price stays current
+        next_tick = float(track.times[idx + 1])
+        if idx < 0:
+            return next_tick
+        if next_tick - float(track.times[idx]) > GAP_FACTOR * track.series.granularity:
+            return next_tick
+        return None
+
+    # ── market.tools-compatible feed ────────────────────────────────
+
+    def price_history(self, instrument: str, timeframe: str = "1h", count: int = 120) -> Dict[str, Any]:
+        """``fetch_price_history`` over candles closed by the replay clock."""
+        from .tools import TIMEFRAME_TO_GRANULARITY
+
+        track = self._tracks.get(instrument)
+        if track is None:
+            return {"instrument": instrument, "timeframe": timeframe, "candles": [],
+                    "error": "Instrument not in replay", "source": "replay"}
+        granularity = TIMEFRAME_TO_GRANULARITY.get(timeframe, 3600)
+        now = self.clock.now()
+        closed = int(np.searchsorted(track.series.epoch + track.series.granularity, now, side="right"))
+        candles = resample(_head(track.series, closed), granularity).tail(count).to_dicts() if closed else []
+        change = candles[-1]["close"] - candles[0]["close"] if len(candles) >= 2 else 0.0
+        first = candles[0]["close"] if candles else 0.0
+        return {
+            "instrument": instrument,
+            "timeframe": timeframe,
+            "candles": candles,
+            "change": round(change, 6),
+            "change_percent": round(change / first * 100.0, 4) if first else 0.0,
+            "source": "replay",
+            "error": None,
+        }
+
+    @contextmanager
+    def live_feed(self) -> Iterator["ReplaySource"]:
+        """Route ``market.tools`` price/history/market-hours lookups to this replay."""
+        from . import tools
+
+        originals = (tools.fetch_price_data, tools.fetch_price_history, tools._is_market_closed)
+        tools.fetch_price_data = self.price
+        tools.fetch_price_history = self.price_history
+        tools._is_market_closed = lambda instrument, now=None: (
+            self.reopens_at(instrument, self.clock.now()) is not None
+        )
+        try:
+            yield self
+        finally:
+            tools.fetch_price_data, tools.fetch_price_history, tools._is_market_closed = originals
+
+
+@dataclass
+class ReplayReport:
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    scans: int = 0
+    simulated_seconds: float = 0.0
+    wall_seconds: float = 0.0
+
+    @property
+    def scans_per_second(self) -> float:
+        return self.scans / self.wall_seconds if self.wall_seconds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "events": len(self.events),
+            "scans": self.scans,
+            "simulated_seconds": round(self.simulated_seconds, 1),
+            "wall_seconds": round(self.wall_seconds, 3),
+            "scans_per_second": round(self.scans_per_second, 1),
+        }
+
+
+def replay_monitor(
+    source: ReplaySource,
+    until: Optional[float] = None,
+    run_pipeline: bool = False,
+    on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> ReplayReport:
+    """Run a ``MarketMonitor`` over *source* until *until* (default: end of data).
+
+    Events carry their simulated time in ``at``. With ``run_pipeline`` the
+    agent pipeline is started for each event as it is in production, on its own
+    thread and against live market data.
+    """
+    from .monitor import MarketMonitor
+
+    report = ReplayReport()
+    clock = source.clock
+
+    def record(event: Dict[str, Any]) -> None:
+        report.events.append(event)
+        if on_event:
+            on_event(event)
+
+    monitor = MarketMonitor(
+        watchlist=source.instruments,
+        price_source=source,
+        clock=clock.now,
+        sleep=clock.sleep,
+        on_event=record,
+        run_pipeline=run_pipeline,
+    )
+    until = source.end if until is None else until
+    began, wall_start, served = clock.now(), time.perf_counter(), source.ticks_served
+    with source.live_feed():
+        while clock.now() <= until:
+            monitor._scan_markets()
+            clock.sleep(max(monitor.scheduler.seconds_until_next(), 0.001))
+    report.scans = source.ticks_served - served
+    report.simulated_seconds = clock.now() - began
+    report.wall_seconds = time.perf_counter() - wall_start
+    return report
+
+
+def replay_detector(source: ReplaySource, every_seconds: float, until: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Run ``market_monitor_detect`` every *every_seconds* of simulated time.
+
+    Returns one row per run with the detected instrument, change and ATR ratio.
+    """
+    from agents.agent_team import market_monitor_detect
+
+    rows = []
+    until = source.end if until is None else until
+    with source.live_feed():
+        while source.clock.now() <= until:
+            event = market_monitor_detect(instruments=source.instruments)
+            rows.append({
+                "at": source.clock.now(),
+                "instrument": event.instrument if event else None,
+                "change_pct": event.price_change_pct if event else None,
+                "magnitude": event.magnitude if event else None,
+                "atr_ratio": (event.raw_data or {}).get("atr_ratio") if event else None,
+            })
+            source.clock.sleep(every_seconds)
+    return rows
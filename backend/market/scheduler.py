@@ -0,0 +1,208 @@
+"""
+Adaptive scan scheduler for the Market Monitor.
+
+Instead of scanning every watched instrument on a fixed cadence, each
+instrument gets its own next-due time in a priority queue (min-heap):
+
+- Calm instruments drift towards ``MAX_SCAN_INTERVAL_SECONDS``.
+- When realized volatility rises, the interval shrinks towards
+  ``MIN_SCAN_INTERVAL_SECONDS`` so moves are caught close to when they happen.
+- Instruments whose market is closed are deferred until it reopens instead
+  of being polled for nothing.
+
+Realized volatility is an EWMA of squared log returns per second between
+consecutive scans. The interval is chosen so the expected move over one
+interval is a fraction of the monitor's alert threshold.
+"""
+import heapq
+import itertools
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+MIN_SCAN_INTERVAL_SECONDS = 2.0
+MAX_SCAN_INTERVAL_SECONDS = 60.0
+DEFAULT_SCAN_INTERVAL_SECONDS = 5.0
+
+# Target expected move per scan, as a fraction of the alert threshold.
+TARGET_MOVE_FRACTION = 0.25
+# EWMA weight given to the newest variance observation.
+VOLATILITY_EWMA_ALPHA = 0.3
+
+
+@dataclass
+class SymbolScanState:
+    """Per-instrument scheduling state."""
+    instrument: str
+    next_due: float = 0.0
+    last_price: Optional[float] = None
+    last_scanned_at: Optional[float] = None
+    variance_rate: Optional[float] = None  # EWMA of r^2 / dt (per second)
+    deferred_until: Optional[float] = None
+    scans: int = 0
+
+
+class ScanScheduler:
+    """Min-heap of instruments keyed by next-due time.
+
+    Thread-safe: the monitor loop pops and reschedules from one thread, while
+    other threads may add/remove instruments or read ``snapshot()``.
+    """
+
+    def __init__(
+        self,
+        instruments: List[str],
+        threshold_pct: float,
+        base_interval: float = DEFAULT_SCAN_INTERVAL_SECONDS,
+        min_interval: float = MIN_SCAN_INTERVAL_SECONDS,
+        max_interval: float = MAX_SCAN_INTERVAL_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.threshold_pct = threshold_pct
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        self._states: Dict[str, SymbolScanState] = {}
+        # Entry version per instrument; stale heap entries are skipped lazily.
+        self._versions: Dict[str, int] = {}
+
+        now = self.clock()
+        for instrument in instruments:
+            self.add(instrument, due=now)
+
+    # ── Queue management ────────────────────────────────────────────
+
+    def add(self, instrument: str, due: Optional[float] = None) -> None:
+        """Start scheduling *instrument* (no-op if already scheduled)."""
+        with self._lock:
+            if instrument in self._states:
+                return
+            self._states[instrument] = SymbolScanState(instrument=instrument)
+            self._push(instrument, self.clock() if due is None else due)
+
+    def remove(self, instrument: str) -> None:
+        """Stop scheduling *instrument*."""
+        with self._lock:
+            self._states.pop(instrument, None)
+            self._versions.pop(instrument, None)
+
+    def _push(self, instrument: str, due: float) -> None:
+        version = self._versions.get(instrument, 0) + 1
+        self._versions[instrument] = version
+        self._states[instrument].next_due = due
+        heapq.heappush(self._heap, (due, next(self._counter), instrument, version))
+
+    def pop_due(self, now: Optional[float] = None) -> List[str]:
+        """Pop every instrument whose next-due time has passed.
+
+        Popped instruments are not rescheduled until ``record`` or ``defer``
+        is called for them.
+        """
+        now = self.clock() if now is None else now
+        due: List[str] = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, _, instrument, version = heapq.heappop(self._heap)
+                if self._versions.get(instrument) != version:
+                    continue  # removed or rescheduled since this entry was pushed
+                due.append(instrument)
+        return due
+
+    def seconds_until_next(self, now: Optional[float] = None) -> float:
+        """Seconds until the earliest scheduled scan (``max_interval`` when idle)."""
+        now = self.clock() if now is None else now
+        with self._lock:
+            while self._heap and self._versions.get(self._heap[0][2]) != self._heap[0][3]:
+                heapq.heappop(self._heap)
+            if not self._heap:
+                return self.max_interval
+            return max(0.0, self._heap[0][0] - now)
+
+    # ── Rescheduling ────────────────────────────────────────────────
+
+    def record(self, instrument: str, price: Optional[float], now: Optional[float] = None) -> float:
+        """Record a scan result and reschedule. Returns the chosen interval.
+
+        A missing price (fetch failed) reschedules at the base interval
+        without touching the volatility estimate.
+        """
+        now = self.clock() if now is None else now
+        with self._lock:
+            state = self._states.get(instrument)
+            if state is None:
+                return 0.0
+
+            if price is not None and price > 0:
+                if state.last_price and state.last_scanned_at is not None:
+                    dt = now - state.last_scanned_at
+                    if dt > 0:
+                        log_return = math.log(price / state.last_price)
+                        observation = (log_return * log_return) / dt
+                        if state.variance_rate is None:
+                            state.variance_rate = observation
+                        else:
+                            state.variance_rate = (
+                                VOLATILITY_EWMA_ALPHA * observation
+                                + (1 - VOLATILITY_EWMA_ALPHA) * state.variance_rate
+                            )
+                state.last_price = price
+                state.last_scanned_at = now
+                interval = self._interval_for(state)
+            else:
+                interval = self.base_interval
+
+            state.deferred_until = None
+            state.scans += 1
+            self._push(instrument, now + interval)
+            return interval
+
+    def defer(self, instrument: str, until: float) -> None:
+        """Park *instrument* until *until* (e.g. its market reopens).
+
+        The price history is dropped so the first scan after reopening is not
+        compared against the pre-close price.
+        """
+        with self._lock:
+            state = self._states.get(instrument)
+            if state is None:
+                return
+            state.deferred_until = until
+            state.last_price = None
+            state.last_scanned_at = None
+            self._push(instrument, until)
+
+    def _interval_for(self, state: SymbolScanState) -> float:
+        """Interval whose expected move is ``TARGET_MOVE_FRACTION`` of the threshold."""
+        if state.variance_rate is None:
+            return self.base_interval
+        if state.variance_rate <= 0:
+            return self.max_interval
+        target = (self.threshold_pct / 100.0) * TARGET_MOVE_FRACTION
+        interval = (target * target) / state.variance_rate
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    # ── Introspection ───────────────────────────────────────────────
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        """Current schedule, soonest first (for logging / health endpoints)."""
+        now = self.clock()
+        with self._lock:
+            rows = []
+            for state in self._states.values():
+                vol = math.sqrt(state.variance_rate) if state.variance_rate else None
+                rows.append({
+                    "instrument": state.instrument,
+                    "due_in_seconds": round(max(0.0, state.next_due - now), 2),
+                    "volatility_per_sqrt_second": vol,
+                    "deferred": state.deferred_until is not None,
+                    "scans": state.scans,
+                })
+        rows.sort(key=lambda r: r["due_in_seconds"])
+        return rows
@@ -0,0 +1,279 @@
+"""
+Market screener — evaluates indicator filters across the symbol catalogue.
+
+Candles come from the cached candle store (``market.candles``); indicators
+are computed for every symbol at once on a ``(symbols × bars)`` matrix, so a
+screen over a few hundred symbols is a handful of numpy reductions once the
+cache is warm.
+
+Filters are simple comparisons, either as strings or dicts::
+
+    "rsi14 < 30"
+    "price > sma50"
+    {"field": "atr_ratio", "op": ">", "value": 2}
+"""
+import logging
+import operator
+import re
+import threading
+import time
+import warnings
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .candles import DEFAULT_CANDLE_COUNT, CandleSeries, get_candles_many
+
+logger = logging.getLogger(__name__)
+
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+MAX_RESULTS = 200
+ACTIVE_SYMBOLS_TTL_SECONDS = 3600
+
+INDICATOR_FIELDS = (
+    "price",
+    "change_pct",
+    "rsi14",
+    "sma20",
+    "sma50",
+    "atr14",
+    "atr_pct",
+    "atr_ratio",
+    "price_vs_sma20_pct",
+    "price_vs_sma50_pct",
+)
+FIELD_ALIASES = {"close": "price", "rsi": "rsi14", "atr": "atr14"}
+
+_OPERATORS: Dict[str, Callable[[np.ndarray, Any], np.ndarray]] = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+_FILTER_RE = re.compile(r"^\s*([A-Za-z_][\w]*)\s*(<=|>=|==|!=|<|>)\s*(\S+)\s*$")
+
+
+# ─── Indicator matrix ────────────────────────────────────────────────
+
+
+def _stack(series_list: Sequence[CandleSeries], attr: str, width: int) -> np.ndarray:
+    """Right-align one OHLC column of every series into a NaN-padded matrix."""
+    matrix = np.full((len(series_list), width), np.nan, dtype=np.float64)
+    for row, series in enumerate(series_list):
+        values = getattr(series, attr)[-width:]
+        if len(values):
+            matrix[row, width - len(values):] = values
+    return matrix
+
+
+def compute_indicator_matrix(series_list: Sequence[CandleSeries]) -> Dict[str, np.ndarray]:
+    """Indicators for every series as ``{field: array(len(series_list))}``.
+
+    Formulas match ``analyze_technicals`` (simple-average RSI/ATR). Values that
+    need more history than a symbol has are NaN.
+    """
+    width = max((len(s) for s in series_list), default=0)
+    if width < 2:
+        empty = np.full(len(series_list), np.nan)
+        return {field: empty.copy() for field in INDICATOR_FIELDS}
+
+    close = _stack(series_list, "close", width)
+    high = _stack(series_list, "high", width)
+    low = _stack(series_list, "low", width)
+    rows = np.arange(len(series_list))
+
+    with warnings.catch_warnings(), np.errstate(divide="ignore", invalid="ignore"):
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+
+        price = close[:, -1]
+        first = close[rows, np.argmax(~np.isnan(close), axis=1)]
+        change_pct = (price - first) / first * 100.0
+
+        sma20 = close[:, -20:].mean(axis=1) if width >= 20 else np.full(len(rows), np.nan)
+        sma50 = close[:, -50:].mean(axis=1) if width >= 50 else np.full(len(rows), np.nan)
+
+        deltas = np.diff(close[:, -(RSI_PERIOD + 1):], axis=1)
+        avg_gain = np.clip(deltas, 0, None).mean(axis=1)
+        avg_loss = np.clip(-deltas, 0, None).mean(axis=1)
+        rsi14 = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        rsi14 = np.where(avg_loss == 0, np.where(avg_gain > 0, 100.0, 50.0), rsi14)
+        rsi14 = np.where(np.isnan(avg_gain) | np.isnan(avg_loss), np.nan, rsi14)
+
+        prev_close = close[:, :-1]
+        true_range = np.fmax(
+            high[:, 1:] - low[:, 1:],
+            np.fmax(np.abs(high[:, 1:] - prev_close), np.abs(low[:, 1:] - prev_close)),
+        )
+        true_range[np.isnan(prev_close)] = np.nan
+        atr14 = true_range[:, -ATR_PERIOD:].mean(axis=1)
+        atr_baseline = np.nanmean(true_range, axis=1)
+        atr_ratio = atr14 / atr_baseline
+
+        return {
+            "price": price,
+            "change_pct": change_pct,
+            "rsi14": rsi14,
+            "sma20": sma20,
+            "sma50": sma50,
+            "atr14": atr14,
+            "atr_pct": atr14 / price * 100.0,
+            "atr_ratio": atr_ratio,
+            "price_vs_sma20_pct": (price - sma20) / sma20 * 100.0,
+            "price_vs_sma50_pct": (price - sma50) / sma50 * 100.0,
+        }
+
+
+# ─── Filters ─────────────────────────────────────────────────────────
+
+
+def _resolve_field(name: str) -> str:
+    key = FIELD_ALIASES.get(name.lower(), name.lower())
+    if key not in INDICATOR_FIELDS:
+        raise ValueError(
+            f"Unknown screener field '{name}'. Available: {', '.join(INDICATOR_FIELDS)}"
+        )
+    return key
+
+
+def parse_filter(spec: Union[str, Dict[str, Any]]) -> Tuple[str, str, Union[float, str]]:
+    """Normalize a filter into ``(field, op, value_or_field)``.
+
+    Raises ``ValueError`` for malformed filters or unknown fields.
+    """
+    if isinstance(spec, str):
+        match = _FILTER_RE.match(spec)
+        if not match:
+            raise ValueError(f"Invalid filter '{spec}'. Expected e.g. 'rsi14 < 30'.")
+        field, op, raw = match.groups()
+    elif isinstance(spec, dict):
+        field, op, raw = spec.get("field"), spec.get("op"), spec.get("value")
+        if not field or op is None or raw is None:
+            raise ValueError("Filter objects need 'field', 'op' and 'value'.")
+    else:
+        raise ValueError(f"Unsupported filter: {spec!r}")
+
+    if op not in _OPERATORS:
+        raise ValueError(f"Unsupported operator '{op}'. Use one of {', '.join(_OPERATORS)}")
+
+    field = _resolve_field(str(field))
+    try:
+        value: Union[float, str] = float(raw)
+    except (TypeError, ValueError):
+        value = _resolve_field(str(raw))
+    return field, op, value
+
+
+def apply_filters(
+    indicators: Dict[str, np.ndarray],
+    filters: Sequence[Tuple[str, str, Union[float, str]]],
+) -> np.ndarray:
+    """Boolean mask of rows passing every filter (NaN never passes)."""
+    size = len(indicators["price"])
+    mask = ~np.isnan(indicators["price"]) if size else np.zeros(0, dtype=bool)
+    with np.errstate(invalid="ignore"):
+        for field, op, value in filters:
+            lhs = indicators[field]
+            rhs = indicators[value] if isinstance(value, str) else value
+            mask &= _OPERATORS[op](lhs, rhs) & ~np.isnan(lhs)
+            if isinstance(value, str):
+                mask &= ~np.isnan(rhs)
+    return mask
+
+
+# ─── Universe ────────────────────────────────────────────────────────
+
+
+_universe_cache: Dict[str, Any] = {"symbols": None, "expires_at": 0.0}
+_universe_lock = threading.Lock()
+
+
+def _screener_universe(market: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Active, non-suspended Deriv symbols (cached for an hour)."""
+    from .tools import fetch_active_symbols
+
+    now = time.time()
+    with _universe_lock:
+        symbols = _universe_cache["symbols"]
+        if symbols is None or now >= _universe_cache["expires_at"]:
+            symbols = [
+                {
+                    "symbol": s.get("deriv_symbol") or s.get("symbol", ""),
+                    "display_name": s.get("display_name", ""),
+                    "market": s.get("market", ""),
+                }
+                for s in fetch_active_symbols()
+                if not s.get("is_trading_suspended")
+            ]
+            _universe_cache.update(symbols=symbols, expires_at=now + ACTIVE_SYMBOLS_TTL_SECONDS)
+    if market:
+        symbols = [s for s in symbols if s["market"] == market]
+    return [s for s in symbols if s["symbol"]]
+
+
+# ─── Entry point ─────────────────────────────────────────────────────
+
+
+def run_screener(
+    filters: Optional[Sequence[Union[str, Dict[str, Any]]]] = None,
+    timeframe: str = "1h",
+    market: Optional[str] = None,
+    symbols: Optional[Sequence[str]] = None,
+    sort_by: str = "change_pct",
+    descending: bool = True,
+    limit: int = 50,
+) -> Dict[str, Any]:
+    """Screen the symbol catalogue (or *symbols*) and return ranked matches.
+
+    Raises ``ValueError`` for invalid filters, sort fields or timeframes.
+    """
+    from .tools import TIMEFRAME_TO_GRANULARITY, _get_deriv_symbol
+
+    started = time.perf_counter()
+    parsed = [parse_filter(f) for f in (filters or [])]
+    sort_field = _resolve_field(sort_by)
+    if timeframe not in TIMEFRAME_TO_GRANULARITY:
+        raise ValueError(f"Unsupported timeframe '{timeframe}'.")
+    granularity = TIMEFRAME_TO_GRANULARITY[timeframe]
+    limit = max(1, min(int(limit), MAX_RESULTS))
+
+    if symbols:
+        universe = [
+            {"symbol": _get_deriv_symbol(s), "display_name": s, "market": ""}
+            for s in symbols
+        ]
+    else:
+        universe = _screener_universe(market)
+
+    series_by_symbol = get_candles_many([u["symbol"] for u in universe], granularity, DEFAULT_CANDLE_COUNT)
+    rows = [u for u in universe if u["symbol"] in series_by_symbol]
+    indicators = compute_indicator_matrix([series_by_symbol[u["symbol"]] for u in rows])
+
+    mask = apply_filters(indicators, parsed) if rows else np.zeros(0, dtype=bool)
+    matched = np.flatnonzero(mask)
+    keys = indicators[sort_field][matched] if len(matched) else np.zeros(0)
+    keys = np.where(np.isnan(keys), -np.inf if descending else np.inf, keys)
+    order = np.argsort(-keys if descending else keys, kind="stable")
+    ranked = matched[order][:limit]
+
+    results = []
+    for idx in ranked:
+        row = dict(rows[idx])
+        for field in INDICATOR_FIELDS:
+            value = float(indicators[field][idx])
+            row[field] = None if np.isnan(value) else round(value, 6)
+        results.append(row)
+
+    return {
+        "timeframe": timeframe,
+        "filters": [f"{field} {op} {value}" for field, op, value in parsed],
+        "sort_by": sort_field,
+        "evaluated": len(rows),
+        "universe": len(universe),
+        "matched": int(len(matched)),
+        "results": results,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "source": "deriv",
+    }
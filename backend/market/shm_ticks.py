@@ -0,0 +1,346 @@
+"""
+Shared-memory last-tick table.
+
+The feed process (the one running the market monitor) publishes every price
+it caches into a ``multiprocessing.shared_memory`` segment; any worker on
+the same host attaches once and then reads prices straight from memory, with
+no Redis round-trip and no syscalls. ``get_cached_price`` checks it first.
+
+Layout: a 32-byte header (magic, layout version, slot count, layout hash,
+owner pid) followed by one 32-byte slot per canonical Deriv symbol, indexed
+by the symbol's position in the sorted ``DERIV_SYMBOLS`` values:
+
+    seq u64 | price f64 | published_at f64 | expires_at f64
+
+Each slot is a seqlock. The single writer bumps ``seq`` to odd, writes the
+fields, then bumps it to even; readers retry while ``seq`` is odd or changed
+during the read. Readers whose symbol table hashes differently (another code
+version) refuse to attach and fall back to Redis.
+
+The default segment name is derived from the project directory and
+settings module, so separate deployments on one host get separate tables.
+A segment is only unlinked by the process that created it. If the name is
+taken, a live owner's segment is left alone and this process becomes a
+reader. A segment left by a dead owner is reused in place when its size
+fits.
+
+Settings: ``TICK_SHM_NAME`` (segment name; empty disables the table).
+"""
+import atexit
+import hashlib
+import logging
+import os
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger("tradeiq.shm_ticks")
+
+MAGIC = 0x5449434B  # "TICK"
+LAYOUT_VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "<u4"), ("version", "<u4"), ("slots", "<u4"), ("_pad", "<u4"),
+                         ("layout_hash", "<u8"), ("owner_pid", "<u8")])
+SLOT_DTYPE = np.dtype([("seq", "<u8"), ("price", "<f8"), ("published_at", "<f8"), ("expires_at", "<f8")])
+READ_RETRIES = 8
+ATTACH_RETRY_SECONDS = 5.0
+SHM_NAME_PREFIX = "tradeiq_ticks"
+
+# Segments created by this process (or inherited across fork).
+_created_names = set()
+
+
+def default_shm_name() -> str:
+    """``tradeiq_ticks_<hash>``, unique to this deployment's directory and settings."""
+    from django.conf import settings
+
+    deployment = f"{settings.BASE_DIR}|{os.environ.get('DJANGO_SETTINGS_MODULE', '')}"
+    return f"{SHM_NAME_PREFIX}_{hashlib.blake2b(deployment.encode(), digest_size=4).hexdigest()}"
+
+
+def shm_name() -> str:
+    name = os.environ.get("TICK_SHM_NAME")
+    return default_shm_name() if name is None else name
+
+
+def _owner_alive(pid: int, name: str) -> bool:
+    if pid == os.getpid():  # ours, unless the pid was reused after a restart
+        return name in _created_names
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def canonical_symbols() -> List[str]:
+    """Sorted canonical Deriv symbols; a symbol's index is its slot ID."""
+    from .tools import DERIV_SYMBOLS
+
+    return sorted(set(DERIV_SYMBOLS.values()))
+
+
+def _layout_hash(symbols: List[str]) -> int:
+    digest = hashlib.blake2b("\n".join(symbols).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class TickTable:
+    """A mapped tick table; ``create`` for the writer, ``attach`` for readers."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, symbols: List[str], owner: bool, created: bool = False):
+        self._shm = shm
+        self.owner = owner
+        self.created = created  # only the creator unlinks
+        self.symbols = symbols
+        self._ids: Dict[str, int] = {symbol: i for i, symbol in enumerate(symbols)}
+        self.header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=shm.buf)
+        slots = np.ndarray((len(symbols),), dtype=SLOT_DTYPE, buffer=shm.buf, offset=HEADER_DTYPE.itemsize)
+        # Column views so every access is a plain aligned 8-byte load/store.
+        self._seq = slots["seq"]
+        self._price = slots["price"]
+        self._published = slots["published_at"]
+        self._expires = slots["expires_at"]
+        self._write_lock = threading.Lock()
+        # Reads and writes in progress; close() unmaps once the last one ends
+        self._ref_lock = threading.Lock()
+        self._refs = 0
+        self._closing = False
+
+    @classmethod
+    def create(cls, name: str, symbols: Optional[List[str]] = None) -> "TickTable":
+        symbols = symbols if symbols is not None else canonical_symbols()
+        size = HEADER_DTYPE.itemsize + SLOT_DTYPE.itemsize * len(symbols)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            created = True
+        except FileExistsError:
+            shm = cls._reclaim(name, size)
+            created = False
+        if created:
+            _created_names.add(name)
+        table = cls(shm, symbols, owner=True, created=created)
+        table._seq[:] = 0
+        table.header[0] = (MAGIC, LAYOUT_VERSION, len(symbols), 0, _layout_hash(symbols), os.getpid())
+        return table
+
+    @staticmethod
+    def _reclaim(name: str, size: int) -> shared_memory.SharedMemory:
+        """Reuse *name* left by a dead publisher; raises if its owner is alive or it is too small."""
+        shm = shared_memory.SharedMemory(name=name)
+        if name not in _created_names:
+            try:
+                resource_tracker.unregister(shm._name, "shared_memory")
+            except Exception:
+                pass
+        header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=shm.buf)[0]
+        owner = int(header["owner_pid"]) if shm.size >= HEADER_DTYPE.itemsize else 0
+        del header
+        if _owner_alive(owner, name):
+            shm.close()
+            raise FileExistsError(f"Tick table {name!r} is published by live process {owner}")
+        if shm.size < size:
+            shm.close()
+            raise FileExistsError(f"Stale tick table {name!r} is too small; remove it or set TICK_SHM_NAME")
+        return shm
+
+    @classmethod
+    def attach(cls, name: str, symbols: Optional[List[str]] = None) -> "TickTable":
+        symbols = symbols if symbols is not None else canonical_symbols()
+        shm = shared_memory.SharedMemory(name=name)
+        if name not in _created_names:
+            # Readers must not unlink the writer's segment when they exit
+            # (Python < 3.13 tracks attached segments too). Processes forked
+            # from the writer share its tracker registration, so leave it.
+            try:
+                resource_tracker.unregister(shm._name, "shared_memory")
+            except Exception:
+                pass
+        header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=shm.buf)[0]
+        expected = (MAGIC, LAYOUT_VERSION, len(symbols), _layout_hash(symbols))
+        actual = (int(header["magic"]), int(header["version"]), int(header["slots"]), int(header["layout_hash"]))
+        if actual != expected:
+            del header
+            shm.close()
+            raise ValueError(f"Tick table {name!r} has an incompatible layout")
+        del header
+        return cls(shm, symbols, owner=False)
+
+    def slot_id(self, symbol: str) -> Optional[int]:
+        return self._ids.get(symbol)
+
+    def publish(self, symbol: str, price: float, ttl_seconds: float, now: Optional[float] = None) -> bool:
+        """Write *price* for *symbol* (writer only). False for unknown symbols."""
+        i = self._ids.get(symbol)
+        if i is None:
+            return False
+        now = time.time() if now is None else now
+        if not self._pin():
+            return False
+        try:
+            with self._write_lock:
+                self._seq[i] += 1  # odd: write in progress
+                self._price[i] = price
+                self._published[i] = now
+                self._expires[i] = now + ttl_seconds
+                self._seq[i] += 1  # even: consistent
+        finally:
+            self._unpin()
+        return True
+
+    def read(self, symbol: str, now: Optional[float] = None) -> Optional[float]:
+        """Latest unexpired price for *symbol*, or None. Never waits on the writer."""
+        i = self._ids.get(symbol)
+        if i is None or not self._pin():
+            return None
+        try:
+            seq = self._seq
+            for _ in range(READ_RETRIES):
+                before = int(seq[i])
+                if before & 1:
+                    continue
+                price = float(self._price[i])
+                expires_at = float(self._expires[i])
+                if int(seq[i]) == before:
+                    break
+            else:
+                return None
+        finally:
+            self._unpin()
+        if before == 0 or expires_at < (time.time() if now is None else now):
+            return None
+        return price
+
+    @property
+    def retired(self) -> bool:
+        """True once the writer has closed this segment (readers should re-attach)."""
+        if not self._pin():
+            return True
+        try:
+            return int(self.header["magic"][0]) != MAGIC
+        finally:
+            self._unpin()
+
+    def _pin(self) -> bool:
+        """Keep the mapping alive for one access; False once the table is closing."""
+        with self._ref_lock:
+            if self._closing:
+                return False
+            self._refs += 1
+            return True
+
+    def _unpin(self) -> None:
+        with self._ref_lock:
+            self._refs -= 1
+            if not self._closing or self._refs:
+                return
+        self._unmap()
+
+    def close(self) -> None:
+        """Stop new accesses; unmap now, or when the last one in progress ends."""
+        with self._ref_lock:
+            if self._closing:
+                return
+            self._closing = True
+            if self.owner:
+                self.header["magic"][0] = 0  # tell attached readers to let go
+            if self._refs:
+                return
+        self._unmap()
+
+    def _unmap(self) -> None:
+        self._seq = self._price = self._published = self._expires = self.header = None
+        self._shm.close()
+        if self.created:
+            _created_names.discard(self._shm.name)
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+_table: Optional[TickTable] = None
+_table_lock = threading.Lock()
+_next_attach_at = 0.0
+
+
+def start_publisher() -> Optional[TickTable]:
+    """Create the host's tick table in this (feed) process."""
+    global _table
+    name = shm_name()
+    if not name:
+        return None
+    with _table_lock:
+        if _table is not None and _table.owner:
+            return _table
+        try:
+            _table = TickTable.create(name)
+        except Exception as exc:
+            logger.warning("Could not create shared tick table %r: %s", name, exc)
+            return None
+    atexit.register(_table.close)
+    logger.info("Publishing last ticks to shared memory %r (%d symbols)", name, len(_table.symbols))
+    return _table
+
+
+def _get_table() -> Optional[TickTable]:
+    """The table this process publishes to or reads from, attaching lazily."""
+    global _table, _next_attach_at
+    if _table is not None:
+        return _table
+    name = shm_name()
+    now = time.monotonic()
+    if not name or now < _next_attach_at:
+        return None
+    with _table_lock:
+        if _table is None and now >= _next_attach_at:
+            try:
+                _table = TickTable.attach(name)
+            except (FileNotFoundError, ValueError) as exc:
+                _next_attach_at = now + ATTACH_RETRY_SECONDS
+                logger.debug("Shared tick table unavailable: %s", exc)
+    return _table
+
+
+def _canonical(instrument: str) -> str:
+    from .tools import _get_deriv_symbol
+
+    return _get_deriv_symbol(instrument)
+
+
+def read_price(instrument: str) -> Optional[float]:
+    global _table
+    table = _get_table()
+    if table is None:
+        return None
+    if not table.owner and table.retired:
+        with _table_lock:
+            if _table is table:
+                _table = None
+        table.close()  # other threads' reads in progress finish first
+        return None
+    return table.read(_canonical(instrument))
+
+
+def publish_price(instrument: str, price: float, ttl_seconds: float) -> bool:
+    """Publish when this process owns the table; no-op elsewhere."""
+    table = _table
+    if table is None or not table.owner:
+        return False
+    return table.publish(_canonical(instrument), price, ttl_seconds)
+
+
+def reset_table() -> None:
+    """Detach (and unlink, if created here) this process's table."""
+    global _table, _next_attach_at
+    with _table_lock:
+        if _table is not None:
+            _table.close()
+        _table = None
+        _next_attach_at = 0.0
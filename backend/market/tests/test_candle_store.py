@@ -0,0 +1,81 @@
+import tempfile
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from market import candle_store
+from market.candles import CandleSeries, clear_candle_cache, get_candles
+
+GRAN = 60
+NOW = 1_700_000_000
+
+
+def _series(start_epoch, bars, symbol="frxEURUSD"):
+    epoch = start_epoch + GRAN * np.arange(bars, dtype=np.int64)
+    close = 1.0 + np.arange(bars) * 0.001
+    return CandleSeries(symbol, GRAN, epoch, close, close + 0.0005, close - 0.0005, close)
+
+
+class CandleStoreTest(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = override_settings(CANDLE_STORE_DIR=tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(candle_store.clear_maps)
+        self.addCleanup(clear_candle_cache)
+
+    def test_append_skips_forming_and_overlapping_candles(self):
+        first = _series(NOW - 10 * GRAN, 10)  # last bar closes exactly at NOW
+        self.assertEqual(candle_store.append_candles(first, now=NOW - 1), 9)
+        overlap = _series(NOW - 5 * GRAN, 8)
+        self.assertEqual(candle_store.append_candles(overlap, now=NOW + 3 * GRAN), 4)
+
+        stored = candle_store.load_candles("frxEURUSD", GRAN)
+        self.assertEqual(len(stored), 13)
+        self.assertTrue(np.all(np.diff(stored.epoch) == GRAN))
+
+    def test_append_after_torn_record_stays_aligned(self):
+        candle_store.append_candles(_series(NOW - 10 * GRAN, 5), now=NOW)
+        path = candle_store.candle_path("frxEURUSD", GRAN)
+        with open(path, "ab") as fh:
+            fh.write(b"\x01" * (candle_store.RECORD_DTYPE.itemsize // 2))  # crashed mid-write
+
+        self.assertEqual(candle_store.append_candles(_series(NOW - 5 * GRAN, 5), now=NOW), 5)
+
+        self.assertEqual(path.stat().st_size, 10 * candle_store.RECORD_DTYPE.itemsize)
+        stored = candle_store.load_candles("frxEURUSD", GRAN)
+        np.testing.assert_array_equal(stored.epoch, NOW - GRAN * np.arange(10, 0, -1))
+        np.testing.assert_allclose(stored.close[5:], 1.0 + np.arange(5) * 0.001)
+
+    def test_range_slicing_is_zero_copy(self):
+        candle_store.append_candles(_series(NOW - 1000 * GRAN, 1000), now=NOW)
+        window = candle_store.load_candles(
+            "frxEURUSD", GRAN, start=NOW - 500 * GRAN, end=NOW - 401 * GRAN
+        )
+        self.assertEqual(len(window), 100)
+        self.assertEqual(int(window.epoch[0]), NOW - 500 * GRAN)
+        self.assertFalse(window.close.flags.owndata)
+        self.assertEqual(len(candle_store.load_candles("frxEURUSD", GRAN, count=30)), 30)
+        self.assertEqual(len(candle_store.load_candles("R_100", GRAN)), 0)
+
+    @patch("market.candles._fetch_candles_pipelined", new_callable=MagicMock)
+    def test_get_candles_reads_through_backfilled_history(self, mock_fetch):
+        candle_store.append_candles(_series(NOW - 2000 * GRAN, 1990), now=NOW)
+        live = _series(NOW - 20 * GRAN, 20)  # overlaps the tail and adds the forming bar
+        mock_fetch.return_value = {"frxEURUSD": live}
+        with patch("market.tools._run_async_in_new_thread", side_effect=lambda coro, timeout=12: coro):
+            series = get_candles("frxEURUSD", GRAN, count=1500)
+
+        self.assertEqual(len(series), 1500)
+        self.assertEqual(int(series.epoch[-1]), int(live.epoch[-1]))
+        self.assertTrue(np.all(np.diff(series.epoch) == GRAN))
+
+    @patch("market.candles._fetch_candles_pipelined", new_callable=MagicMock, return_value={})
+    def test_network_failure_falls_back_to_store(self, _fetch):
+        candle_store.append_candles(_series(NOW - 300 * GRAN, 300), now=NOW)
+        with patch("market.tools._run_async_in_new_thread", side_effect=lambda coro, timeout=12: coro):
+            series = get_candles("frxEURUSD", GRAN, count=120)
+        self.assertEqual(len(series), 120)
@@ -0,0 +1,108 @@
+from unittest.mock import patch
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from market.candles import CandleSeries
+from market.correlation import CorrelationService, RollingCorrelation, _aligned_closes
+
+
+def _series(symbol, closes, start_epoch=0, granularity=3600):
+    closes = np.asarray(closes, dtype=np.float64)
+    return CandleSeries(
+        symbol=symbol,
+        granularity=granularity,
+        epoch=start_epoch + np.arange(len(closes), dtype=np.int64) * granularity,
+        open=closes, high=closes, low=closes, close=closes,
+    )
+
+
+def _prices(returns):
+    return 100 * np.exp(np.concatenate([[0.0], np.cumsum(returns)]))
+
+
+class RollingCorrelationTest(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        base = rng.normal(0, 0.01, 300)
+        noise = rng.normal(0, 0.01, (300, 3))
+        # A, B move together, C moves against A, D is independent.
+        returns = np.column_stack([base, base + 0.3 * noise[:, 0], -base + 0.3 * noise[:, 1], noise[:, 2]])
+        self.closes = 100 * np.exp(np.vstack([np.zeros(4), np.cumsum(returns, axis=0)]))
+        self.epochs = np.arange(len(self.closes), dtype=np.int64) * 3600
+
+    @patch("market.correlation.REBUILD_EVERY", 10_000)
+    def test_incremental_update_matches_rebuild(self):
+        rolling = RollingCorrelation(["A", "B", "C", "D"], window=100)
+        rolling.rebuild(self.epochs[:150], self.closes[:150])
+        for end in list(range(157, 301, 7)) + [len(self.epochs)]:
+            self.assertTrue(rolling.update(self.epochs[:end], self.closes[:end]))
+        self.assertEqual(rolling.last_epoch, self.epochs[-1])
+
+        fresh = RollingCorrelation(["A", "B", "C", "D"], window=100)
+        fresh.rebuild(self.epochs, self.closes)
+        np.testing.assert_allclose(rolling.matrix(), fresh.matrix(), atol=1e-9)
+        expected = np.corrcoef(np.diff(np.log(self.closes), axis=0)[-100:].T)
+        np.testing.assert_allclose(fresh.matrix(), expected, atol=1e-9)
+
+    def test_periodic_rebuild_is_requested(self):
+        rolling = RollingCorrelation(["A", "B", "C", "D"], window=100)
+        rolling.rebuild(self.epochs[:150], self.closes[:150])
+        self.assertTrue(rolling.update(self.epochs[:250], self.closes[:250]))
+        self.assertFalse(rolling.update(self.epochs[:260], self.closes[:260]))
+
+    def test_gap_requires_rebuild(self):
+        rolling = RollingCorrelation(["A", "B", "C", "D"], window=100)
+        rolling.rebuild(self.epochs[:120], self.closes[:120])
+        self.assertFalse(rolling.update(self.epochs[200:], self.closes[200:]))
+
+
+class AlignmentTest(SimpleTestCase):
+    def test_aligns_on_shared_closed_candles(self):
+        a = _series("A", [1, 2, 3, 4, 5])
+        b = _series("B", [10, 20, 30, 40], start_epoch=3600)
+        epochs, closes = _aligned_closes({"A": a, "B": b}, ["A", "B"])
+        # Forming candles (A@4h, B@4h) are excluded; shared closed epochs are 1h-3h.
+        self.assertEqual(epochs.tolist(), [3600, 7200, 10800])
+        self.assertEqual(closes.tolist(), [[2, 10], [3, 20], [4, 30]])
+
+
+class ComoversTest(SimpleTestCase):
+    def test_lookup_splits_with_and_against(self):
+        rng = np.random.default_rng(1)
+        base = rng.normal(0, 0.01, 150)
+        series = {
+            "frxEURUSD": _series("frxEURUSD", _prices(base)),
+            "frxGBPUSD": _series("frxGBPUSD", _prices(base + rng.normal(0, 0.003, 150))),
+            "frxUSDCHF": _series("frxUSDCHF", _prices(-base + rng.normal(0, 0.003, 150))),
+            "R_100": _series("R_100", _prices(rng.normal(0, 0.01, 150))),
+        }
+        names = {"frxEURUSD": "EUR/USD", "frxGBPUSD": "GBP/USD", "frxUSDCHF": "USD/CHF", "R_100": "Volatility 100 Index"}
+        service = CorrelationService(instruments=names)
+        with patch("market.correlation.get_candles_many", return_value=series) as mock_candles:
+            service.refresh()
+            result = service.comovers("EUR/USD")
+            service.comovers("EUR/USD")
+
+        mock_candles.assert_called_once()  # lookups are served from the cached matrix
+        self.assertEqual([c["instrument"] for c in result["moving_with"]], ["GBP/USD"])
+        self.assertEqual([c["instrument"] for c in result["moving_against"]], ["USD/CHF"])
+        self.assertGreater(result["moving_with"][0]["correlation"], 0.9)
+
+    def test_stale_lookup_refreshes_in_background(self):
+        import threading
+
+        release = threading.Event()
+
+        def slow_candles(*args, **kwargs):
+            release.wait(5)
+            return {}
+
+        service = CorrelationService(instruments={"frxEURUSD": "EUR/USD"})
+        with patch("market.correlation.get_candles_many", side_effect=slow_candles) as mock_candles:
+            result = service.comovers("EUR/USD")  # returns while the fetch is blocked
+            self.assertIn("error", result)
+            self.assertFalse(service.refresh_in_background())  # one refresh at a time
+            release.set()
+            service._refresher.join(5)
+        mock_candles.assert_called_once()
@@ -0,0 +1,92 @@
+import json
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+from rest_framework.test import APIClient
+
+from market.tools import explain_market_move, explain_market_moves
+
+SHARED = {"title": "Dollar slides after Fed", "url": "https://x/fed", "source": "Reuters", "description": ""}
+
+
+def _news(instrument, limit=5):
+    own = {"title": f"{instrument} news", "url": f"https://x/{instrument}", "source": "CNBC", "description": ""}
+    return [SHARED, own]
+
+
+@patch("market.tools.analyze_technicals", return_value={"trend": "bearish", "indicators": {"rsi14": 35.0}})
+@patch("market.tools.fetch_price_data", side_effect=lambda inst: {"price": 1.1})
+@patch("market.tools.search_news", side_effect=_news)
+class ExplainMarketMovesTest(SimpleTestCase):
+    @patch("market.tools.get_llm_client")
+    def test_one_llm_call_with_deduped_articles(self, mock_llm, mock_search, _price, _tech):
+        chat = MagicMock(return_value=json.dumps({"explanations": [
+            {"instrument": "EUR/USD", "explanation": "Fell on Fed.", "sentiment": "bearish",
+             "sentiment_score": -0.6, "article_ids": ["A1"]},
+            {"instrument": "GBP/USD", "explanation": "Followed EUR.", "sentiment": "bearish",
+             "sentiment_score": -0.4, "article_ids": []},
+        ]}))
+        mock_llm.return_value = MagicMock(simple_chat=chat)
+
+        result = explain_market_moves([{"instrument": "EUR/USD", "change_pct": -1.2}, "GBP/USD"])
+
+        chat.assert_called_once()
+        self.assertEqual(mock_search.call_count, 2)
+        self.assertEqual(len(result["articles"]), 3)  # shared article sent once
+        self.assertEqual(chat.call_args.kwargs["user_message"].count("Dollar slides after Fed"), 1)
+        eur, gbp = result["explanations"]
+        self.assertEqual(eur["sources"]["news"], ["https://x/fed"])
+        self.assertEqual(gbp["sources"]["news"], ["https://x/fed", "https://x/GBP/USD"])
+        self.assertEqual(eur["sentiment"]["score"], -0.6)
+
+    @patch("market.tools.get_llm_client")
+    def test_malformed_reply_fields_fall_back_per_mover(self, mock_llm, _search, _price, _tech):
+        mock_llm.return_value = MagicMock(simple_chat=MagicMock(return_value=json.dumps({"explanations": [
+            {"instrument": "EUR/USD", "explanation": "Fell on Fed.", "sentiment": "bearish",
+             "sentiment_score": "strong", "article_ids": None},
+            {"instrument": "GBP/USD", "explanation": "Followed EUR.", "sentiment": "bearish",
+             "sentiment_score": -0.4, "article_ids": [{"id": "A1"}, "A1"]},
+        ]})))
+
+        result = explain_market_moves([{"instrument": "EUR/USD", "change_pct": -1.2}, "GBP/USD"])
+
+        eur, gbp = result["explanations"]
+        self.assertEqual(eur["explanation"], "Fell on Fed.")
+        self.assertEqual(eur["sentiment"]["sentiment"], "bearish")  # from the price action
+        self.assertNotEqual(eur["sentiment"]["score"], 0.0)
+        self.assertEqual(eur["sources"]["news"], ["https://x/fed", "https://x/EUR/USD"])
+        self.assertEqual(gbp["sentiment"]["score"], -0.4)
+        self.assertEqual(gbp["sources"]["news"], ["https://x/fed"])
+
+    @patch("market.tools.get_llm_client", side_effect=RuntimeError("no key"))
+    def test_malformed_movers_are_skipped_or_coerced(self, _llm, _search, _price, _tech):
+        result = explain_market_moves([
+            {"instrument": "EUR/USD", "change_pct": "-1.5"},
+            {"instrument": "GBP/USD", "change_pct": "abc"},
+            42,
+            {"instrument": 7},
+        ])
+        eur, gbp = result["explanations"]
+        self.assertEqual(eur["move"], "EUR/USD moved -1.50%")
+        self.assertEqual(eur["sentiment"]["sentiment"], "bearish")
+        self.assertEqual(gbp["move"], "GBP/USD recent move")
+
+    def test_view_rejects_movers_without_instruments(self, _search, _price, _tech):
+        response = APIClient().post("/api/market/explain/", {"movers": [42, {"change_pct": "1"}]}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    @patch("market.tools.get_llm_client", side_effect=RuntimeError("no key"))
+    def test_falls_back_per_mover_without_llm(self, _llm, _search, _price, _tech):
+        result = explain_market_moves([{"instrument": "EUR/USD", "change_pct": -1.5}])
+        self.assertEqual(result["explanations"][0]["sentiment"]["sentiment"], "bearish")
+        self.assertIn("temporarily unavailable", result["explanations"][0]["explanation"])
+
+
+class ExplainMarketMoveNewsReuseTest(SimpleTestCase):
+    @patch("market.tools.get_llm_client")
+    @patch("market.tools.fetch_price_data", return_value={"price": 1.1})
+    @patch("market.tools.search_news", side_effect=_news)
+    def test_sentiment_reuses_fetched_news(self, mock_search, _price, mock_llm):
+        mock_llm.return_value = MagicMock(simple_chat=MagicMock(return_value='{"sentiment": "bearish", "score": -0.3}'))
+        explain_market_move("EUR/USD", "EUR/USD fell 1%")
+        mock_search.assert_called_once()
@@ -0,0 +1,47 @@
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from market.models import MarketInsight
+from market.tools import cleanup_old_insights, generate_insights_from_news
+
+
+class InsightRetentionTest(TestCase):
+    def _seed(self, instrument, count):
+        now = timezone.now()
+        for i in range(count):
+            obj = MarketInsight.objects.create(instrument=instrument, insight_type="news", content=f"{instrument} {i}")
+            MarketInsight.objects.filter(pk=obj.pk).update(generated_at=now - timedelta(minutes=i))
+
+    def test_keeps_newest_per_instrument_in_one_statement(self):
+        self._seed("EUR/USD", 8)
+        self._seed("BTC/USD", 2)
+
+        with self.assertNumQueries(1):
+            deleted = cleanup_old_insights(keep_per_instrument=3)
+
+        self.assertEqual(deleted, 5)
+        self.assertEqual(
+            sorted(MarketInsight.objects.filter(instrument="EUR/USD").values_list("content", flat=True)),
+            ["EUR/USD 0", "EUR/USD 1", "EUR/USD 2"],
+        )
+        self.assertEqual(MarketInsight.objects.filter(instrument="BTC/USD").count(), 2)
+
+    @patch("market.tools.fetch_top_headlines")
+    @patch("market.tools.get_llm_client")
+    def test_generated_insights_are_bulk_inserted(self, mock_llm, mock_headlines):
+        mock_headlines.return_value = [{"title": "Gold rallies", "description": "", "source": "Reuters"}]
+        mock_llm.return_value = MagicMock(simple_chat=MagicMock(return_value=(
+            '[{"instrument": "GOLD", "insight_type": "news", "content": "a", "sentiment_score": 0.4},'
+            ' {"instrument": "EUR/USD", "insight_type": "technical", "content": "b", "sentiment_score": -0.2}]'
+        )))
+
+        with patch.object(MarketInsight.objects, "create") as mock_create:
+            saved = generate_insights_from_news(limit=1, max_insights=2)
+
+        mock_create.assert_not_called()
+        self.assertEqual([s["instrument"] for s in saved], ["GOLD", "EUR/USD"])
+        self.assertTrue(all(s["generated_at"] for s in saved))
+        self.assertEqual(MarketInsight.objects.count(), 2)
@@ -0,0 +1,59 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+import market.insights_worker as insights_worker
+from market.insights_worker import INSIGHT_WINDOW_SECONDS, run_insight_cycle
+from market.models import MarketInsight
+
+
+def _fake_generate(limit, max_insights):
+    MarketInsight.objects.create(instrument="EUR/USD", insight_type="news", content="x")
+    return [{"instrument": "EUR/USD"}]
+
+
+@patch("market.cache.get_redis_client", side_effect=ValueError("REDIS_URL not set"))
+class InsightCycleTest(TestCase):
+    def setUp(self):
+        insights_worker._local_claimed_window = None
+
+    @patch("market.tools.generate_insights_from_news", side_effect=_fake_generate)
+    def test_generates_once_per_window(self, mock_generate, _redis):
+        self.assertEqual(run_insight_cycle(), 1)
+        self.assertEqual(run_insight_cycle(), 0)
+        mock_generate.assert_called_once()
+
+    @patch("market.tools.generate_insights_from_news",
+           side_effect=[RuntimeError("LLM down"), [], [{"instrument": "EUR/USD"}]])
+    def test_failed_generation_releases_the_window(self, mock_generate, _redis):
+        now = 10 * INSIGHT_WINDOW_SECONDS + 5
+        with self.assertRaises(RuntimeError):
+            run_insight_cycle(now=now)
+        self.assertEqual(run_insight_cycle(now=now + 60), 0)  # saved nothing
+        self.assertEqual(run_insight_cycle(now=now + 120), 1)
+        self.assertEqual(mock_generate.call_count, 3)
+
+    @patch("market.tools.generate_insights_from_news")
+    def test_list_endpoint_never_generates(self, mock_generate, _redis):
+        response = APIClient().get("/api/market/insights/")
+        self.assertEqual(response.status_code, 200)
+        mock_generate.assert_not_called()
+
+
+class RedisLockTest(TestCase):
+    @patch("market.tools.generate_insights_from_news", return_value=[])
+    @patch("market.cache.get_redis_client")
+    def test_redis_set_nx_decides_the_winner(self, mock_client, mock_generate):
+        mock_client.return_value.set.return_value = None  # another process holds the window
+        self.assertEqual(run_insight_cycle(), 0)
+        mock_generate.assert_not_called()
+        _, kwargs = mock_client.return_value.set.call_args
+        self.assertEqual(kwargs, {"nx": True, "ex": INSIGHT_WINDOW_SECONDS})
+
+    @patch("market.tools.generate_insights_from_news", return_value=[])
+    @patch("market.cache.get_redis_client")
+    def test_failed_generation_deletes_the_redis_claim(self, mock_client, _generate):
+        mock_client.return_value.set.return_value = True
+        run_insight_cycle(now=10 * INSIGHT_WINDOW_SECONDS)
+        mock_client.return_value.delete.assert_called_once_with("tradeiq:insights:window:10")
@@ -0,0 +1,58 @@
+from unittest.mock import patch
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from market.candles import CandleSeries
+from market.levels import cluster_levels, get_levels, nearest_levels
+from market.tools import analyze_technicals
+
+
+def _range_bound_series(symbol="R_100", bars=300):
+    """Oscillates between ~100 and ~110 with small noise, so both edges get many touches."""
+    rng = np.random.default_rng(3)
+    t = np.arange(bars)
+    close = 105 + 5 * np.sin(t * 2 * np.pi / 24) + rng.normal(0, 0.1, bars)
+    return CandleSeries(
+        symbol=symbol,
+        granularity=3600,
+        epoch=t.astype(np.int64) * 3600,
+        open=np.roll(close, 1),
+        high=close + 0.2,
+        low=close - 0.2,
+        close=close,
+    )
+
+
+class ClusterLevelsTest(SimpleTestCase):
+    def test_nearby_pivots_merge_and_recent_touches_score_higher(self):
+        prices = np.array([100.0, 100.1, 100.05, 110.0, 110.2])
+        bars_ago = np.array([10.0, 200.0, 300.0, 1.0, 2.0])
+        levels = cluster_levels(prices, bars_ago, tolerance=0.5)
+        self.assertEqual([lvl.touches for lvl in levels], [2, 3])  # recent pair outranks stale triple
+        self.assertEqual(levels[1].last_touch_bars_ago, 10)
+        self.assertAlmostEqual(levels[0].price, 110.1, places=1)
+
+
+class DetectLevelsTest(SimpleTestCase):
+    def test_range_edges_become_multi_touch_levels(self):
+        series = _range_bound_series()
+        levels = get_levels(series)
+        support, resistance = nearest_levels(levels, current_price=105.0)
+        self.assertAlmostEqual(support.price, 99.8, delta=0.5)
+        self.assertAlmostEqual(resistance.price, 110.2, delta=0.5)
+        self.assertGreaterEqual(support.touches, 10)
+        self.assertIs(get_levels(series), levels)  # cached until a new candle
+
+
+class AnalyzeTechnicalsLevelsTest(SimpleTestCase):
+    @patch("market.tools._is_market_closed", return_value=False)
+    @patch("market.candles.get_candles")
+    def test_uses_clustered_levels(self, mock_candles, _closed):
+        mock_candles.return_value = _range_bound_series()
+        result = analyze_technicals("Volatility 100", "1h")
+        mock_candles.assert_called_once_with("R_100", 3600, count=500)
+        key_levels = result["key_levels"]
+        self.assertAlmostEqual(key_levels["support"], 99.8, delta=0.5)
+        self.assertAlmostEqual(key_levels["resistance"], 110.2, delta=0.5)
+        self.assertTrue(key_levels["levels"])
@@ -0,0 +1,91 @@
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from market.lexicon import headline_impact, score_articles, score_text
+from market.tools import _rank_headlines, get_sentiment
+
+
+def _article(title, description="", source="Reuters"):
+    return {"title": title, "description": description, "source": source, "url": f"https://x/{title}"}
+
+
+BULLISH_NEWS = [
+    _article("Bitcoin surges to record high as ETF inflows jump"),
+    _article("Crypto rally extends, traders turn bullish"),
+    _article("Bitcoin climbs sharply on strong demand"),
+]
+MIXED_NEWS = [
+    _article("Markets mixed ahead of Fed decision"),
+    _article("Bitcoin edges higher"),
+    _article("Crypto traders wait for data"),
+]
+
+
+class LexiconScoringTest(SimpleTestCase):
+    def test_polarity_and_inflections(self):
+        self.assertGreater(score_text("Gold surged to a record high")[0], 0.5)
+        self.assertLess(score_text("EUR/USD plunges after weak data")[0], -0.5)
+        self.assertEqual(score_text("Markets await the Fed"), (0.0, 0))
+
+    def test_negation_flips_and_boosters_scale(self):
+        self.assertLess(score_text("Gold does not rally")[0], 0)
+        self.assertLess(
+            abs(score_text("Stocks slightly lower")[0]),
+            abs(score_text("Stocks sharply lower")[0]),
+        )
+
+    def test_confidence_reflects_agreement_and_coverage(self):
+        strong = score_articles(BULLISH_NEWS)
+        self.assertEqual(strong.label, "bullish")
+        self.assertGreater(strong.confidence, score_articles(MIXED_NEWS).confidence)
+
+        split = score_articles([_article("Bitcoin soars"), _article("Bitcoin crashes")])
+        self.assertLess(split.confidence, 0.35)
+        self.assertEqual(score_articles([]).confidence, 0.0)
+
+    def test_headline_ranking_by_impact(self):
+        articles = [_article("Fed meeting ahead"), _article("Oil prices crash on recession fears")]
+        self.assertGreater(headline_impact(articles[1]), headline_impact(articles[0]))
+        ranked = _rank_headlines(articles, limit=1)
+        self.assertEqual(ranked[0]["title"], "Oil prices crash on recession fears")
+        self.assertLess(ranked[0]["sentiment_score"], 0)
+
+
+class SentimentFastPathTest(SimpleTestCase):
+    @patch("market.tools.get_llm_client")
+    def test_confident_lexicon_skips_llm(self, mock_llm):
+        result = get_sentiment("BTC/USD", news=BULLISH_NEWS)
+        mock_llm.assert_not_called()
+        self.assertEqual(result["method"], "lexicon")
+        self.assertEqual(result["sentiment"], "bullish")
+        self.assertEqual(len(result["key_points"]), 3)
+
+    @patch("market.tools.get_llm_client")
+    def test_low_confidence_or_key_points_use_llm(self, mock_llm):
+        mock_llm.return_value = MagicMock(simple_chat=MagicMock(
+            return_value='{"sentiment": "bullish", "score": 0.4, "key_points": ["x"], "confidence": 0.6}'
+        ))
+        self.assertNotIn("method", get_sentiment("BTC/USD", news=MIXED_NEWS))
+        get_sentiment("BTC/USD", news=BULLISH_NEWS, include_key_points=True)
+        self.assertEqual(mock_llm.call_count, 2)
+
+    @patch("market.tools.get_llm_client", side_effect=RuntimeError("no key"))
+    def test_llm_failure_falls_back_to_lexicon(self, _llm):
+        result = get_sentiment("BTC/USD", news=MIXED_NEWS, price_change_pct=-1.0)
+        self.assertEqual(result["method"], "lexicon")
+        self.assertEqual(result["sentiment"], "bullish")
+
+    @patch("market.tools.get_llm_client")
+    def test_lexicon_path_never_returns_zero_score(self, mock_llm):
+        balanced = [
+            _article("Bitcoin surges to record high"),
+            _article("Bitcoin plunges to record low"),
+        ]
+        with patch("market.tools.score_articles", return_value=score_articles(balanced)) as scored:
+            scored.return_value.score, scored.return_value.confidence = 0.0, 0.9
+            flat = get_sentiment("BTC/USD", news=balanced, price_change_pct=0.0)
+            dip = get_sentiment("BTC/USD", news=balanced, price_change_pct=-0.01)
+        mock_llm.assert_not_called()
+        self.assertEqual((flat["method"], flat["score"]), ("lexicon", 0.05))
+        self.assertEqual((dip["score"], dip["sentiment"]), (-0.05, "bearish"))
@@ -0,0 +1,70 @@
+from unittest.mock import patch
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from market.candles import CandleSeries
+from market.patterns import candlestick_masks, detect_patterns, pivot_points
+from market.tools import fetch_pattern_recognition
+
+
+def _series(rows):
+    """rows: list of (open, high, low, close)."""
+    arr = np.asarray(rows, dtype=np.float64)
+    return CandleSeries(
+        symbol="R_100",
+        granularity=3600,
+        epoch=np.arange(len(arr), dtype=np.int64) * 3600,
+        open=arr[:, 0], high=arr[:, 1], low=arr[:, 2], close=arr[:, 3],
+    )
+
+
+def _declining(n=6, start=110.0):
+    return [(start - i, start - i + 0.5, start - i - 1.5, start - i - 1) for i in range(n)]
+
+
+class CandlestickMaskTest(SimpleTestCase):
+    def test_bullish_engulfing_and_doji(self):
+        rows = _declining() + [
+            (104.0, 104.2, 102.8, 103.0),  # bearish
+            (102.9, 105.0, 102.7, 104.8),  # engulfs it
+            (104.8, 105.3, 104.3, 104.82),  # doji
+        ]
+        masks = candlestick_masks(_series(rows))
+        self.assertEqual(np.flatnonzero(masks["bullish_engulfing"]).tolist(), [7])
+        self.assertTrue(masks["doji"][8])
+        self.assertFalse(masks["bearish_engulfing"].any())
+
+    def test_hammer_needs_prior_decline(self):
+        hammer = (100.0, 100.4, 97.0, 100.35)
+        falling = candlestick_masks(_series(_declining() + [hammer]))
+        self.assertTrue(falling["hammer"][-1])
+        self.assertTrue(falling["bullish_pin_bar"][-1])
+
+        rising = [(90 + i, 91.5 + i, 89.5 + i, 91 + i) for i in range(6)] + [hammer]
+        self.assertFalse(candlestick_masks(_series(rising))["hammer"][-1])
+
+
+class ChartPatternTest(SimpleTestCase):
+    def _double_top_rows(self):
+        path = [100, 102, 104, 106, 108, 110, 108, 106, 104, 102, 104, 106, 108, 110, 108, 106, 104, 101, 99]
+        return [(p - 0.2, p + 0.5, p - 0.5, p) for p in path]
+
+    def test_pivots_and_double_top(self):
+        series = _series(self._double_top_rows())
+        highs, lows = pivot_points(series)
+        self.assertEqual(highs.tolist(), [5, 13])
+        self.assertEqual(lows.tolist(), [9])
+
+        found = [p for p in detect_patterns(series)["patterns"] if p["pattern"] == "double_top"]
+        self.assertEqual(len(found), 1)
+        self.assertEqual(found[0]["first_index"], 5)
+        self.assertEqual(found[0]["status"], "confirmed")  # closed below the neckline
+
+    @patch("market.candles.get_candles")
+    def test_fetch_pattern_recognition_is_local(self, mock_candles):
+        mock_candles.return_value = _series(self._double_top_rows())
+        result = fetch_pattern_recognition("Volatility 100", resolution="15")
+        mock_candles.assert_called_once_with("R_100", 900, count=200)
+        self.assertEqual(result["source"], "local")
+        self.assertIn("double_top", [p["pattern"] for p in result["patterns"]])
@@ -0,0 +1,77 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from market.provider_cache import cached_call, clear_provider_cache, provider_cache_stats
+from market.tools import fetch_economic_calendar, fetch_finnhub_quote
+
+
+class ProviderCacheTest(SimpleTestCase):
+    def setUp(self):
+        clear_provider_cache(reset_stats=True)
+
+    def tearDown(self):
+        clear_provider_cache(reset_stats=True)
+
+    def test_hits_and_negative_hits_are_counted(self):
+        ok = MagicMock(return_value={"events": [1]})
+        for _ in range(3):
+            cached_call("finnhub_calendar", "k", ok)
+        ok.assert_called_once()
+
+        failing = MagicMock(return_value={"error": "HTTP 429"})
+        for _ in range(2):
+            cached_call("finnhub_quote", "k", failing)
+        failing.assert_called_once()
+
+        stats = provider_cache_stats()
+        self.assertEqual(stats["finnhub_calendar"]["calls_saved"], 2)
+        self.assertEqual(stats["finnhub_quote"]["negative_hits"], 1)
+        self.assertEqual(stats["finnhub_quote"]["upstream_errors"], 1)
+
+    def test_expired_entries_refetch(self):
+        fetch = MagicMock(return_value={"price": 1})
+        cached_call("finnhub_quote", "k", fetch, ttl=0)
+        cached_call("finnhub_quote", "k", fetch, ttl=0)
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_concurrent_misses_share_one_fetch(self):
+        release = threading.Event()
+        calls = []
+
+        def slow_fetch():
+            calls.append(1)
+            release.wait(2)
+            return {"events": []}
+
+        threads = [threading.Thread(target=cached_call, args=("finnhub_calendar", "k", slow_fetch)) for _ in range(5)]
+        for t in threads:
+            t.start()
+        release.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+
+
+@patch.dict("os.environ", {"FINNHUB_API_KEY": "test"})
+class FinnhubCachingTest(SimpleTestCase):
+    def setUp(self):
+        clear_provider_cache(reset_stats=True)
+
+    def tearDown(self):
+        clear_provider_cache(reset_stats=True)
+
+    @patch("market.tools.requests.get")
+    def test_calendar_is_fetched_once(self, mock_get):
+        mock_get.return_value = MagicMock(status_code=200, json=MagicMock(return_value={"economicCalendar": []}))
+        fetch_economic_calendar()
+        fetch_economic_calendar()
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch("market.tools.requests.get")
+    def test_quote_errors_are_negatively_cached(self, mock_get):
+        mock_get.return_value = MagicMock(status_code=429)
+        self.assertEqual(fetch_finnhub_quote("EUR/USD"), {})
+        self.assertEqual(fetch_finnhub_quote("EUR/USD"), {})
+        self.assertEqual(mock_get.call_count, 1)
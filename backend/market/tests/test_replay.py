@@ -0,0 +1,82 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from market.candles import CandleSeries
+from market.replay import ReplaySource, VirtualClock, resample, replay_monitor
+from market.scheduler import MAX_SCAN_INTERVAL_SECONDS
+
+GRAN = 60
+START = 1_700_000_040  # minute-aligned
+
+
+def _series(closes, start=START, symbol="R_100"):
+    closes = np.asarray(closes, dtype=np.float64)
+    opens = np.r_[closes[0], closes[:-1]]
+    epoch = start + GRAN * np.arange(len(closes), dtype=np.int64)
+    return CandleSeries(symbol, GRAN, epoch, opens, np.maximum(opens, closes), np.minimum(opens, closes), closes)
+
+
+class VirtualClockTest(SimpleTestCase):
+    def test_sleep_advances_time_and_speed_is_bounded(self):
+        clock = VirtualClock(100.0)
+        clock.sleep(30)
+        self.assertEqual(clock.now(), 130.0)
+        with self.assertRaises(ValueError):
+            VirtualClock(0, speed=5000)
+
+
+class ReplaySourceTest(SimpleTestCase):
+    def test_price_follows_clock_through_intrabar_ticks(self):
+        source = ReplaySource({"Volatility 100": _series([100.0, 102.0])})
+        self.assertEqual(source.price("Volatility 100")["price"], 100.0)
+        source.clock.sleep(GRAN + GRAN * 0.75)  # close tick of the second bar
+        self.assertEqual(source.price("Volatility 100")["price"], 102.0)
+        self.assertEqual(source.price("Volatility 100")["source"], "replay")
+
+    def test_gaps_report_closed_market(self):
+        weekday = _series([1.0] * 10)
+        monday = _series([1.0] * 10, start=START + 2 * 86400)
+        joined = CandleSeries(
+            "frxEURUSD", GRAN, *(np.concatenate([getattr(weekday, f), getattr(monday, f)])
+                                  for f in ("epoch", "open", "high", "low", "close"))
+        )
+        source = ReplaySource({"EUR/USD": joined})
+        self.assertIsNone(source.reopens_at("EUR/USD", START + 5 * GRAN))
+        self.assertEqual(source.reopens_at("EUR/USD", START + 86400), START + 2 * 86400)
+
+    def test_history_only_includes_closed_bars_and_resamples(self):
+        source = ReplaySource({"Volatility 100": _series(np.arange(1.0, 181.0))})
+        source.clock.sleep(120 * GRAN + 1)
+        history = source.price_history("Volatility 100", "1h", count=10)
+        self.assertLessEqual(len(history["candles"]), 3)
+        self.assertEqual(history["candles"][-1]["close"], 120.0)
+
+        hourly = resample(_series(np.arange(1.0, 121.0), start=1_700_002_800), 3600)
+        self.assertEqual(len(hourly), 2)
+        self.assertEqual((hourly.high[0], hourly.close[0]), (60.0, 60.0))
+
+    def test_live_feed_patches_and_restores_tools(self):
+        from market import tools
+
+        original = tools.fetch_price_data
+        source = ReplaySource({"Volatility 100": _series([100.0, 101.0])})
+        with source.live_feed():
+            self.assertEqual(tools.fetch_price_data("Volatility 100")["source"], "replay")
+        self.assertIs(tools.fetch_price_data, original)
+
+
+class ReplayMonitorTest(SimpleTestCase):
+    def test_monitor_detects_known_move_at_its_simulated_time(self):
+        closes = [100.0] * 30 + [103.0] * 30  # +3% jump at bar 30
+        source = ReplaySource({"Volatility 100": _series(closes)})
+        report = replay_monitor(source)
+
+        self.assertEqual(len(report.events), 1)
+        event = report.events[0]
+        self.assertEqual(event["direction"], "spike")
+        self.assertEqual(event["magnitude"], "high")
+        jump_at = START + 30 * GRAN
+        self.assertGreaterEqual(event["at"], jump_at)
+        # Calm series have drifted to the slowest cadence by the time of the jump.
+        self.assertLess(event["at"], jump_at + GRAN + MAX_SCAN_INTERVAL_SECONDS)
+        self.assertGreater(report.scans, 0)
@@ -0,0 +1,94 @@
+"""Tests for the adaptive market scan scheduler."""
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from market.monitor import MarketMonitor
+from market.scheduler import ScanScheduler
+from market.tools import _forex_market_reopens_at
+
+
+class FakeClock:
+    def __init__(self, start: float = 1_000_000.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ScanSchedulerTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = ScanScheduler(
+            ["CALM", "WILD"],
+            threshold_pct=1.0,
+            base_interval=5.0,
+            min_interval=2.0,
+            max_interval=60.0,
+            clock=self.clock,
+        )
+
+    def test_all_instruments_due_initially(self):
+        self.assertEqual(sorted(self.scheduler.pop_due()), ["CALM", "WILD"])
+        # Popped instruments are not due again until rescheduled
+        self.assertEqual(self.scheduler.pop_due(), [])
+
+    def test_calm_symbol_backs_off_and_volatile_symbol_speeds_up(self):
+        prices = {"CALM": 100.0, "WILD": 100.0}
+        for step in range(6):
+            for inst in self.scheduler.pop_due():
+                if inst == "WILD":
+                    prices[inst] *= 1.01 if step % 2 else 0.99
+                self.scheduler.record(inst, prices[inst])
+            self.clock.now += 5.0
+
+        rows = {r["instrument"]: r for r in self.scheduler.snapshot()}
+        self.assertGreater(rows["CALM"]["due_in_seconds"], 30.0)  # backed off to max interval
+        self.assertLessEqual(rows["WILD"]["due_in_seconds"], 2.0)  # clamped to min
+
+    def test_failed_fetch_uses_base_interval(self):
+        self.scheduler.pop_due()
+        interval = self.scheduler.record("CALM", None)
+        self.assertEqual(interval, 5.0)
+
+    def test_deferred_symbol_waits_until_reopen(self):
+        self.scheduler.pop_due()
+        self.scheduler.defer("CALM", self.clock.now + 3600)
+        self.scheduler.record("WILD", 100.0)
+        self.clock.now += 3599
+        self.assertEqual(self.scheduler.pop_due(), ["WILD"])
+        self.clock.now += 1
+        self.assertEqual(self.scheduler.pop_due(), ["CALM"])
+
+    def test_removed_symbol_is_never_popped(self):
+        self.scheduler.remove("CALM")
+        self.assertEqual(self.scheduler.pop_due(), ["WILD"])
+
+
+class ForexReopenTest(SimpleTestCase):
+    def test_reopen_is_sunday_2200_utc(self):
+        saturday = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+        self.assertEqual(
+            _forex_market_reopens_at(saturday),
+            datetime(2026, 10, 18, 22, 0, tzinfo=timezone.utc),
+        )
+
+    def test_open_market_reopens_now(self):
+        friday_noon = datetime(2026, 10, 16, 12, 0, tzinfo=timezone.utc)
+        self.assertEqual(_forex_market_reopens_at(friday_noon), friday_noon)
+
+
+class MonitorSchedulingTest(SimpleTestCase):
+    @patch("market.tools._is_market_closed", side_effect=lambda inst, now=None: inst == "EUR/USD")
+    @patch("market.tools.fetch_price_data")
+    def test_closed_forex_symbol_is_deferred_without_fetch(self, mock_fetch, _closed):
+        monitor = MarketMonitor(watchlist=["EUR/USD", "R_100"])
+        mock_fetch.return_value = {"price": 1234.5}
+
+        monitor._scan_markets()
+
+        mock_fetch.assert_called_once_with("R_100")
+        rows = {r["instrument"]: r for r in monitor.scheduler.snapshot()}
+        self.assertTrue(rows["EUR/USD"]["deferred"])
+        self.assertFalse(rows["R_100"]["deferred"])
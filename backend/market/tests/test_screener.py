@@ -0,0 +1,99 @@
+import time
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from django.test import SimpleTestCase
+from rest_framework.test import APIClient
+
+from market.candles import CandleSeries, clear_candle_cache, get_candles_many, store_candles
+from market.screener import compute_indicator_matrix, parse_filter, run_screener
+from market.tools import _compute_atr, _compute_rsi
+
+
+def _series(symbol, closes, granularity=3600, spread=0.5):
+    closes = np.asarray(closes, dtype=np.float64)
+    epoch = (np.arange(len(closes), dtype=np.int64) * granularity) + int(time.time()) - granularity // 2
+    return CandleSeries(
+        symbol=symbol,
+        granularity=granularity,
+        epoch=epoch,
+        open=closes.copy(),
+        high=closes + spread,
+        low=closes - spread,
+        close=closes,
+    )
+
+
+def _random_walk(seed, n=120):
+    rng = np.random.default_rng(seed)
+    return 100 + np.cumsum(rng.normal(0, 1, n))
+
+
+class IndicatorMatrixTest(SimpleTestCase):
+    def test_matches_scalar_helpers(self):
+        series = [_series(f"S{i}", _random_walk(i)) for i in range(5)]
+        ind = compute_indicator_matrix(series)
+        for row, s in enumerate(series):
+            closes = s.close.tolist()
+            candles = s.to_dicts()
+            self.assertAlmostEqual(ind["rsi14"][row], _compute_rsi(closes), places=9)
+            self.assertAlmostEqual(ind["atr14"][row], _compute_atr(candles), places=9)
+            self.assertAlmostEqual(ind["sma50"][row], sum(closes[-50:]) / 50, places=9)
+
+    def test_short_history_yields_nan_not_error(self):
+        ind = compute_indicator_matrix([_series("LONG", _random_walk(1)), _series("SHORT", [1.0, 1.1, 1.2])])
+        self.assertFalse(np.isnan(ind["sma50"][0]))
+        self.assertTrue(np.isnan(ind["sma50"][1]))
+        self.assertAlmostEqual(ind["price"][1], 1.2)
+
+
+class FilterParsingTest(SimpleTestCase):
+    def test_string_and_dict_forms(self):
+        self.assertEqual(parse_filter("rsi < 30"), ("rsi14", "<", 30.0))
+        self.assertEqual(parse_filter("close > sma50"), ("price", ">", "sma50"))
+        self.assertEqual(parse_filter({"field": "atr_ratio", "op": ">", "value": 2}), ("atr_ratio", ">", 2.0))
+
+    def test_rejects_unknown_field(self):
+        with self.assertRaises(ValueError):
+            parse_filter("macd > 0")
+
+
+class RunScreenerTest(SimpleTestCase):
+    def setUp(self):
+        clear_candle_cache()
+        self.universe = [{"symbol": f"SYM{i}", "display_name": f"Symbol {i}", "market": "synthetic_index"}
+                         for i in range(300)]
+        for i, u in enumerate(self.universe):
+            store_candles(_series(u["symbol"], _random_walk(i)))
+
+    def tearDown(self):
+        clear_candle_cache()
+
+    @patch("market.candles._fetch_candles_pipelined")
+    def test_cached_screen_is_fast_and_ranked(self, mock_fetch):
+        with patch("market.screener._screener_universe", return_value=self.universe):
+            started = time.perf_counter()
+            result = run_screener(filters=["rsi14 < 50", "price < sma50"], sort_by="rsi14", descending=False)
+            elapsed = time.perf_counter() - started
+
+        mock_fetch.assert_not_called()
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(result["evaluated"], 300)
+        rsis = [r["rsi14"] for r in result["results"]]
+        self.assertEqual(rsis, sorted(rsis))
+        for row in result["results"]:
+            self.assertLess(row["rsi14"], 50)
+            self.assertLess(row["price"], row["sma50"])
+
+    def test_cache_misses_are_fetched_in_one_batch(self):
+        fresh = _series("NEW1", _random_walk(7))
+        with patch("market.candles._fetch_candles_pipelined", new_callable=MagicMock) as mock_fetch, \
+                patch("market.tools._run_async_in_new_thread", return_value={"NEW1": fresh}) as mock_run:
+            found = get_candles_many(["SYM0", "NEW1", "NEW2"], 3600)
+        mock_fetch.assert_called_once_with(["NEW1", "NEW2"], 3600, 120)
+        self.assertEqual(mock_run.call_count, 1)
+        self.assertEqual(set(found), {"SYM0", "NEW1"})
+
+    def test_view_rejects_bad_filter(self):
+        response = APIClient().post("/api/market/screener/", {"filters": ["rsi14 ~ 3"]}, format="json")
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,120 @@
+import multiprocessing
+import os
+import uuid
+from multiprocessing import shared_memory
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from market import shm_ticks
+from market.cache import get_cached_price
+from market.shm_ticks import TickTable
+
+SYMBOLS = ["R_100", "cryBTCUSD", "frxEURUSD"]
+
+
+def _read_in_child(name, queue):
+    table = TickTable.attach(name, SYMBOLS)
+    queue.put(table.read("frxEURUSD"))
+    table.close()
+
+
+class TickTableTest(SimpleTestCase):
+    def setUp(self):
+        self.name = f"tradeiq_test_{uuid.uuid4().hex[:8]}"
+        self.writer = TickTable.create(self.name, SYMBOLS)
+        self.addCleanup(self.writer.close)
+
+    def test_reader_sees_published_price_until_it_expires(self):
+        reader = TickTable.attach(self.name, SYMBOLS)
+        self.addCleanup(reader.close)
+        self.assertIsNone(reader.read("frxEURUSD"))
+        self.assertTrue(self.writer.publish("frxEURUSD", 1.0845, ttl_seconds=5, now=1000.0))
+        self.assertEqual(reader.read("frxEURUSD", now=1004.0), 1.0845)
+        self.assertIsNone(reader.read("frxEURUSD", now=1006.0))
+        self.assertFalse(self.writer.publish("UNKNOWN", 1.0, ttl_seconds=5))
+
+    def test_write_in_progress_is_never_returned(self):
+        self.writer.publish("R_100", 100.0, ttl_seconds=60)
+        self.writer._seq[self.writer.slot_id("R_100")] += 1  # writer stalled mid-update
+        self.assertIsNone(self.writer.read("R_100"))
+
+    def test_readers_notice_a_closed_writer(self):
+        reader = TickTable.attach(self.name, SYMBOLS)
+        self.addCleanup(reader.close)
+        self.assertFalse(reader.retired)
+        self.writer.close()
+        self.assertTrue(reader.retired)
+
+    def test_close_waits_for_reads_in_progress(self):
+        reader = TickTable.attach(self.name, SYMBOLS)
+        self.writer.publish("R_100", 100.0, ttl_seconds=60)
+        self.assertTrue(reader._pin())  # another thread is mid-read
+        reader.close()
+        self.assertIsNotNone(reader._seq)  # still mapped for that read
+        self.assertIsNone(reader.read("R_100"))  # new reads are refused
+        self.assertTrue(reader.retired)
+        reader._unpin()
+        self.assertIsNone(reader._seq)
+        reader.close()
+
+    def test_incompatible_layout_is_rejected(self):
+        with self.assertRaises(ValueError):
+            TickTable.attach(self.name, SYMBOLS + ["R_75"])
+
+    def test_live_owner_keeps_its_segment(self):
+        self.writer.publish("frxEURUSD", 1.1, ttl_seconds=60)
+        self.writer.header["owner_pid"][0] = os.getppid()  # another running publisher
+        with self.assertRaises(FileExistsError):
+            TickTable.create(self.name, SYMBOLS)
+        self.assertEqual(TickTable.attach(self.name, SYMBOLS).read("frxEURUSD"), 1.1)
+
+    def test_dead_owner_segment_is_reused_but_not_unlinked(self):
+        child = multiprocessing.get_context("fork").Process(target=os._exit, args=(0,))
+        child.start()
+        child.join(timeout=10)
+        self.writer.header["owner_pid"][0] = child.pid
+
+        successor = TickTable.create(self.name, SYMBOLS)
+        self.assertFalse(successor.created)
+        successor.publish("R_100", 100.0, ttl_seconds=60)
+        self.assertEqual(self.writer.read("R_100"), 100.0)  # same segment
+        successor.close()
+        self.assertTrue(self.writer.retired)
+        shared_memory.SharedMemory(name=self.name).close()  # left for its creator to unlink
+
+    def test_default_name_is_per_deployment(self):
+        first = shm_ticks.default_shm_name()
+        with override_settings(BASE_DIR="/srv/other-deployment"):
+            second = shm_ticks.default_shm_name()
+        self.assertNotEqual(first, second)
+        self.assertTrue(first.startswith("tradeiq_ticks_"))
+
+    def test_other_process_reads_without_redis(self):
+        self.writer.publish("frxEURUSD", 1.1, ttl_seconds=60)
+        ctx = multiprocessing.get_context("fork")
+        queue = ctx.Queue()
+        child = ctx.Process(target=_read_in_child, args=(self.name, queue))
+        child.start()
+        child.join(timeout=10)
+        self.assertEqual(queue.get(timeout=1), 1.1)
+
+
+class CachedPriceTest(SimpleTestCase):
+    def setUp(self):
+        name = f"tradeiq_test_{uuid.uuid4().hex[:8]}"
+        env = patch.dict("os.environ", {"TICK_SHM_NAME": name})
+        env.start()
+        self.addCleanup(env.stop)
+        self.addCleanup(shm_ticks.reset_table)
+        shm_ticks.reset_table()
+        shm_ticks.start_publisher()
+
+    @patch("market.cache.get_redis_client")
+    def test_get_cached_price_prefers_shared_memory(self, mock_redis):
+        shm_ticks.publish_price("EUR/USD", 1.0845, ttl_seconds=5)
+        self.assertEqual(get_cached_price("EUR/USD"), 1.0845)
+        mock_redis.assert_not_called()
+
+        mock_redis.return_value.get.return_value = "1.2"
+        self.assertEqual(get_cached_price("GBP/USD"), 1.2)  # miss falls through to Redis
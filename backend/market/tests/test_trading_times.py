@@ -0,0 +1,78 @@
+from datetime import date, datetime, timezone
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from market.tools import _is_market_closed, _market_reopens_at
+from market.trading_times import TradingCalendar, set_trading_calendar
+
+
+def _payload(symbol_times):
+    return {
+        "markets": [{
+            "name": "Forex",
+            "submarkets": [{
+                "name": "Major Pairs",
+                "symbols": [
+                    {"symbol": symbol, "times": {"open": opens, "close": closes}}
+                    for symbol, (opens, closes) in symbol_times.items()
+                ],
+            }],
+        }],
+    }
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class TradingCalendarTest(SimpleTestCase):
+    def setUp(self):
+        # Fri 16 Oct: early close 20:00; weekend shut; Mon 19 Oct: full day.
+        self.calendar = TradingCalendar.from_payloads({
+            date(2026, 10, 15): _payload({"frxEURUSD": (["00:00:00"], ["23:59:59"])}),
+            date(2026, 10, 16): _payload({"frxEURUSD": (["00:00:00"], ["20:00:00"])}),
+            date(2026, 10, 17): _payload({"frxEURUSD": (["--"], ["--"])}),
+            date(2026, 10, 18): _payload({"frxEURUSD": (["--"], ["--"])}),
+            date(2026, 10, 19): _payload({"frxEURUSD": (["00:00:00"], ["23:59:59"])}),
+        })
+
+    def test_adjacent_days_merge_into_one_session(self):
+        self.assertTrue(self.calendar.is_open("frxEURUSD", _utc(2026, 10, 15, 23, 59, 59, 500000)))
+        self.assertEqual(
+            self.calendar.next_close("frxEURUSD", _utc(2026, 10, 15, 12)),
+            _utc(2026, 10, 16, 20),
+        )
+
+    def test_early_close_and_next_open(self):
+        friday_late = _utc(2026, 10, 16, 21)
+        self.assertFalse(self.calendar.is_open("frxEURUSD", friday_late))
+        self.assertEqual(self.calendar.next_open("frxEURUSD", friday_late), _utc(2026, 10, 19))
+
+    def test_open_symbol_next_open_is_now(self):
+        at = _utc(2026, 10, 19, 9)
+        self.assertEqual(self.calendar.next_open("frxEURUSD", at), at)
+
+    def test_unknown_symbol_or_outside_horizon_is_none(self):
+        self.assertIsNone(self.calendar.is_open("R_100", _utc(2026, 10, 19, 9)))
+        self.assertIsNone(self.calendar.is_open("frxEURUSD", _utc(2026, 10, 25, 9)))
+
+
+class MarketClosedGuardTest(SimpleTestCase):
+    def tearDown(self):
+        set_trading_calendar(TradingCalendar())
+
+    def test_calendar_overrides_weekend_rule(self):
+        set_trading_calendar(TradingCalendar.from_payloads({
+            date(2026, 10, 16): _payload({"frxEURUSD": (["00:00:00"], ["20:00:00"])}),
+        }))
+        # Friday 21:00 is open under the weekend rule, closed per the calendar.
+        self.assertTrue(_is_market_closed("EUR/USD", _utc(2026, 10, 16, 21)))
+
+    @patch("market.trading_times.refresh_trading_calendar")
+    def test_falls_back_to_weekend_rule_without_calendar(self, _refresh):
+        set_trading_calendar(TradingCalendar())
+        saturday = _utc(2026, 10, 17, 12)
+        self.assertTrue(_is_market_closed("EUR/USD", saturday))
+        self.assertFalse(_is_market_closed("R_100", saturday))
+        self.assertEqual(_market_reopens_at("EUR/USD", saturday), _utc(2026, 10, 18, 22))
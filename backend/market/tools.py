@@ -5,6 +5,8 @@ Functions for Market Analyst Agent
 from typing import Dict, Any, List, Optional
 from agents.llm_client import get_llm_client
 from agents.prompts import SYSTEM_PROMPT_MARKET
+from tradeiq.rate_limit import acquire, acquire_async
+from .lexicon import LexiconSentiment, headline_impact, score_articles, score_text
 from .models import MarketInsight
 import json
 import logging
@@ -12,17 +14,19 @@ import os
 import math
 import requests
 import asyncio
+import contextvars
 import threading
+import time
 from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 logger = logging.getLogger(__name__)
 
 
-def _is_forex_market_closed() -> bool:
+def _is_forex_market_closed(now: Optional[datetime] = None) -> bool:
     """Check if forex markets are currently closed (weekend).
     Forex closes Friday ~22:00 UTC, reopens Sunday ~22:00 UTC."""
-    now = datetime.now(tz=timezone.utc)
+    now = now or datetime.now(tz=timezone.utc)
     weekday = now.weekday()  # 0=Monday, 6=Sunday
     hour = now.hour
     if weekday == 5:  # Saturday — always closed
@@ -34,12 +38,60 @@ def _is_forex_market_closed() -> bool:
     return False
 
 
+def _forex_market_reopens_at(now: Optional[datetime] = None) -> datetime:
+    """Next Sunday 22:00 UTC reopen (``now`` itself when the market is open)."""
+    now = now or datetime.now(tz=timezone.utc)
+    if not _is_forex_market_closed(now):
+        return now
+    days_ahead = 6 - now.weekday()  # Fri -> 2, Sat -> 1, Sun -> 0
+    return (now + timedelta(days=days_ahead)).replace(
+        hour=22, minute=0, second=0, microsecond=0
+    )
+
+
 def _is_forex_instrument(instrument: str) -> bool:
     """Check if an instrument is a forex/commodity that closes on weekends."""
     deriv_symbol = _get_deriv_symbol(instrument)
     return deriv_symbol.startswith("frx")
 
 
+def _is_market_closed(instrument: str, now: Optional[datetime] = None) -> bool:
+    """Check if *instrument* is outside its trading session.
+
+    Uses the cached Deriv trading-times calendar (holidays and early closes
+    included); falls back to the forex weekend rule for symbols or dates
+    the calendar does not cover.
+    """
+    from .trading_times import get_trading_calendar
+
+    is_open = get_trading_calendar().is_open(_get_deriv_symbol(instrument), now)
+    if is_open is not None:
+        return not is_open
+    return _is_forex_instrument(instrument) and _is_forex_market_closed(now)
+
+
+def _market_reopens_at(instrument: str, now: Optional[datetime] = None) -> datetime:
+    """When *instrument* next opens (``now`` itself when it is open)."""
+    from .trading_times import get_trading_calendar
+
+    now = now or datetime.now(tz=timezone.utc)
+    reopens_at = get_trading_calendar().next_open(_get_deriv_symbol(instrument), now)
+    if reopens_at is not None:
+        return reopens_at
+    if _is_forex_instrument(instrument):
+        return _forex_market_reopens_at(now)
+    return now
+
+
+def _market_closed_message(instrument: str) -> str:
+    """Human-readable "market closed" note with the next open time."""
+    reopens_at = _market_reopens_at(instrument)
+    return (
+        f"{instrument} — market is closed. "
+        f"Live trading resumes {reopens_at.strftime('%A %H:%M')} UTC."
+    )
+
+
 # Gracefully handle missing Redis — cache is optional
 try:
     from .cache import get_cached_price, set_cached_price
@@ -147,6 +199,7 @@ async def _fetch_deriv_price_async(instrument: str) -> Dict[str, Any]:
     ws_url = f"wss://ws.derivws.com/websockets/v3?app_id={app_id}"
 
     try:
+        await acquire_async("deriv")
         async with websockets.connect(ws_url, close_timeout=5) as ws:
             await ws.send(json.dumps({
                 "ticks": deriv_symbol,
@@ -189,10 +242,14 @@ async def _fetch_deriv_price_async(instrument: str) -> Dict[str, Any]:
         }
 
 
-def _run_async_in_new_thread(coro):
-    """Run an async coroutine in a new thread with its own event loop."""
+def _run_async_in_new_thread(coro, timeout: float = 12):
+    """Run an async coroutine in a new thread with its own event loop.
+
+    The caller's context (e.g. upstream request priority) is carried over.
+    """
     result = [None]
     exception = [None]
+    context = contextvars.copy_context()
 
     def run():
         loop = asyncio.new_event_loop()
@@ -204,9 +261,9 @@ def _run_async_in_new_thread(coro):
         finally:
             loop.close()
 
-    thread = threading.Thread(target=run)
+    thread = threading.Thread(target=context.run, args=(run,))
     thread.start()
-    thread.join(timeout=12)
+    thread.join(timeout=timeout)
 
     if exception[0]:
         raise exception[0]
@@ -273,8 +330,8 @@ def fetch_price_data(instrument: str) -> Dict[str, Any]:
     Returns:
         Dict with price, change, etc.
     """
-    # Weekend guard: forex/commodity markets are closed Fri 22:00 – Sun 22:00 UTC
-    if _is_forex_instrument(instrument) and _is_forex_market_closed():
+    # Market-hours guard (trading-times calendar, weekend rule as fallback)
+    if _is_market_closed(instrument):
         # Even if Deriv is closed, try the free API for indicative rates
         pair = _parse_currency_pair(instrument)
         if pair:
@@ -282,7 +339,7 @@ def fetch_price_data(instrument: str) -> Dict[str, Any]:
             if fallback.get("price") is not None:
                 fallback["market_closed"] = True
                 fallback["note"] = (
-                    "Forex market is closed on weekends. "
+                    "Market is closed. "
                     "This is an indicative mid-market rate from the last session."
                 )
                 return fallback
@@ -290,8 +347,8 @@ def fetch_price_data(instrument: str) -> Dict[str, Any]:
             "instrument": instrument,
             "price": None,
             "error": (
-                f"{instrument} — Forex market is closed on weekends. "
-                "Displaying last session data. Live trading resumes Sunday 22:00 UTC."
+                f"{_market_closed_message(instrument)} "
+                "Displaying last session data."
             ),
             "market_closed": True,
             "timestamp": datetime.now(tz=timezone.utc).isoformat(),
@@ -376,6 +433,7 @@ async def _fetch_deriv_history_async(
     }
 
     try:
+        await acquire_async("deriv")
         async with websockets.connect(ws_url, close_timeout=5) as ws:
             await ws.send(json.dumps(request_payload))
             response = await asyncio.wait_for(ws.recv(), timeout=10)
@@ -425,18 +483,15 @@ def fetch_price_history(
     count: int = 120,
 ) -> Dict[str, Any]:
     """Fetch historical candles for charting and technical analysis."""
-    # Weekend guard for forex/commodity instruments
-    if _is_forex_instrument(instrument) and _is_forex_market_closed():
+    # Market-hours guard (trading-times calendar, weekend rule as fallback)
+    if _is_market_closed(instrument):
         return {
             "instrument": instrument,
             "timeframe": timeframe,
             "candles": [],
             "change": 0.0,
             "change_percent": 0.0,
-            "error": (
-                f"{instrument} — Forex market is closed on weekends. "
-                "Live data resumes Sunday 22:00 UTC."
-            ),
+            "error": _market_closed_message(instrument),
             "market_closed": True,
             "source": "deriv",
         }
@@ -620,6 +675,7 @@ def _search_newsapi(query: str, limit: int) -> List[Dict[str, Any]]:
         return []
 
     try:
+        acquire("newsapi", api_key)
         response = requests.get(
             "https://newsapi.org/v2/everything",
             params={
@@ -663,6 +719,7 @@ def _fetch_finnhub_headlines(limit: int = 10) -> List[Dict[str, Any]]:
 
     for category in categories:
         try:
+            acquire("finnhub", api_key)
             response = requests.get(
                 "https://finnhub.io/api/v1/news",
                 params={"category": category, "token": api_key},
@@ -701,7 +758,25 @@ def _fetch_finnhub_headlines(limit: int = 10) -> List[Dict[str, Any]]:
             seen_urls.add(url)
             deduped.append(article)
     deduped.sort(key=lambda x: x.get("publishedAt", ""), reverse=True)
-    return deduped[:limit]
+    return _rank_headlines(deduped, limit)
+
+
+def _rank_headlines(articles: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+    """Keep the *limit* most market-moving articles by lexicon impact.
+
+    Ties keep their incoming (newest-first) order; each kept article gets its
+    signed ``sentiment_score``.
+    """
+    scored = []
+    for article in articles:
+        score, _ = score_text(f"{article.get('title') or ''} {article.get('description') or ''}")
+        scored.append((abs(score), score, article))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    ranked = []
+    for _, score, article in scored[:limit]:
+        article["sentiment_score"] = round(score, 3)
+        ranked.append(article)
+    return ranked
 
 
 # Terms used by fetch_top_headlines and generate_insights_from_news to filter
@@ -744,6 +819,7 @@ def fetch_top_headlines(limit: int = 10) -> List[Dict[str, Any]]:
                 if sources_param:
                     params["sources"] = sources_param
 
+                acquire("newsapi", api_key)
                 response = requests.get(
                     "https://newsapi.org/v2/everything",
                     params=params,
@@ -768,10 +844,8 @@ def fetch_top_headlines(limit: int = 10) -> List[Dict[str, Any]]:
                             "publishedAt": a.get("publishedAt", ""),
                             "source": a.get("source", {}).get("name", ""),
                         })
-                        if len(filtered) >= limit:
-                            break
                 if filtered:
-                    return filtered
+                    return _rank_headlines(filtered, limit)
             except Exception as e:
                 logger.debug(f"NewsAPI trading headlines failed: {e}")
 
@@ -795,6 +869,7 @@ def _search_finnhub_news(query: str, limit: int) -> List[Dict[str, Any]]:
         return []
 
     try:
+        acquire("finnhub", api_key)
         response = requests.get(
             "https://finnhub.io/api/v1/news",
             params={
@@ -878,15 +953,31 @@ def search_news(query: str, limit: int = 5) -> List[Dict[str, Any]]:
 def analyze_technicals(instrument: str, timeframe: str = "1h") -> Dict[str, Any]:
     """
     Analyze technical indicators for an instrument using real Deriv candle data.
+    Indicators use the latest 120 candles; support/resistance come from
+    clustered swing pivots over the full cached history (see market/levels.py).
     """
-    history = fetch_price_history(instrument=instrument, timeframe=timeframe, count=120)
-    candles = history.get("candles", []) or []
+    from .candles import get_candles
+    from .levels import LEVEL_HISTORY_BARS, MAX_LEVELS, get_levels, nearest_levels
+
+    if _is_market_closed(instrument):
+        return {
+            "instrument": instrument,
+            "timeframe": timeframe,
+            "indicators": {},
+            "summary": _market_closed_message(instrument),
+            "market_closed": True,
+            "source": "deriv",
+        }
+
+    granularity = TIMEFRAME_TO_GRANULARITY.get(timeframe, 3600)
+    series = get_candles(_get_deriv_symbol(instrument), granularity, count=LEVEL_HISTORY_BARS)
+    candles = series.tail(120).to_dicts() if series is not None else []
     if len(candles) < 20:
         return {
             "instrument": instrument,
             "timeframe": timeframe,
             "indicators": {},
-            "summary": history.get("error") or "Insufficient candle history for technical analysis.",
+            "summary": "Insufficient candle history for technical analysis.",
             "source": "deriv",
         }
 
@@ -941,13 +1032,17 @@ def analyze_technicals(instrument: str, timeframe: str = "1h") -> Dict[str, Any]
     else:
         trend = "neutral"
 
+    levels = get_levels(series)
+    support_level, resistance_level = nearest_levels(levels, current_price)
     recent_window = candles[-20:]
-    support = min(float(c["low"]) for c in recent_window)
-    resistance = max(float(c["high"]) for c in recent_window)
+    support = support_level.price if support_level else min(float(c["low"]) for c in recent_window)
+    resistance = resistance_level.price if resistance_level else max(float(c["high"]) for c in recent_window)
+    support_touches = f", {support_level.touches} touches" if support_level else ""
+    resistance_touches = f", {resistance_level.touches} touches" if resistance_level else ""
 
     summary = (
         f"{instrument} on {timeframe}: trend is {trend} with RSI14 at {rsi14:.1f}. "
-        f"Nearest support/resistance from recent candles: {support:.4f} / {resistance:.4f}. "
+        f"Nearest clustered support/resistance: {support:.4f} / {resistance:.4f}. "
         f"Observed volatility is {volatility}."
     )
 
@@ -1013,12 +1108,12 @@ def analyze_technicals(instrument: str, timeframe: str = "1h") -> Dict[str, Any]
 
     if dist_to_resistance < 15:
         insights.append(
-            f"Price is near resistance ({resistance:.4f}), only {dist_to_resistance:.0f}% of the recent range away. "
+            f"Price is near resistance ({resistance:.4f}{resistance_touches}), only {dist_to_resistance:.0f}% of the recent range away. "
             "Watch for rejection or breakout above this level."
         )
     elif dist_to_support < 15:
         insights.append(
-            f"Price is near support ({support:.4f}), only {dist_to_support:.0f}% of the recent range above it. "
+            f"Price is near support ({support:.4f}{support_touches}), only {dist_to_support:.0f}% of the recent range above it. "
             "Watch for bounce or breakdown below this level."
         )
     else:
@@ -1053,6 +1148,7 @@ def analyze_technicals(instrument: str, timeframe: str = "1h") -> Dict[str, Any]
         "key_levels": {
             "support": round(support, 6),
             "resistance": round(resistance, 6),
+            "levels": [lvl.to_dict(current_price) for lvl in levels[:MAX_LEVELS]],
         },
         "indicators": {
             "sma20": round(sma20, 6),
@@ -1065,18 +1161,27 @@ def analyze_technicals(instrument: str, timeframe: str = "1h") -> Dict[str, Any]
     }
 
 
+# Lexicon confidence at or above which get_sentiment skips the LLM.
+LEXICON_CONFIDENCE_THRESHOLD = 0.35
+
+
 def get_sentiment(
     instrument: str,
     price_change_pct: float = 0.0,
     rsi_14: Optional[float] = None,
     trend: Optional[str] = None,
     atr_ratio: Optional[float] = None,
+    news: Optional[List[Dict[str, Any]]] = None,
+    include_key_points: bool = False,
 ) -> Dict[str, Any]:
     """
     Get market sentiment for an instrument.
 
-    Combines news-based LLM analysis with price-action context and
-    optional momentum data (RSI, trend, ATR ratio) when available.
+    Headlines are first scored with the offline finance lexicon
+    (``market.lexicon``); the LLM is only called when the lexicon's
+    confidence is below ``LEXICON_CONFIDENCE_THRESHOLD`` or the caller asks
+    for LLM key points. Price-action and momentum context (RSI, trend, ATR
+    ratio) feed the LLM prompt when it runs.
     Never returns score=0.0 — at minimum derives sentiment from
     the observed price movement so users always see meaningful data.
 
@@ -1086,12 +1191,14 @@ def get_sentiment(
         rsi_14: Optional RSI(14) value for momentum context
         trend: Optional trend direction ("bullish"/"bearish"/"neutral")
         atr_ratio: Optional ATR ratio (how unusual the move is)
+        news: Articles the caller already fetched; skips the news search
+        include_key_points: Always ask the LLM, for its key points
 
     Returns:
         Sentiment analysis results
     """
-    # Use DeepSeek to analyze sentiment from news
-    news = search_news(instrument, limit=10)
+    if news is None:
+        news = search_news(instrument, limit=10)
 
     # Also try broader search if instrument-specific search is empty
     if not news:
@@ -1108,6 +1215,10 @@ def get_sentiment(
         # No news at all — derive sentiment purely from price action
         return _sentiment_from_price_action(instrument, price_change_pct)
 
+    lexicon = score_articles(news)
+    if not include_key_points and lexicon.confidence >= LEXICON_CONFIDENCE_THRESHOLD:
+        return _sentiment_from_lexicon(instrument, lexicon, news, price_change_pct)
+
     news_summary = "\n".join([
         f"- {article['title']}: {article.get('description', '')[:100]}"
         for article in news[:5]
@@ -1169,22 +1280,51 @@ Return a JSON object with:
         return sentiment_data
     except Exception as e:
         logger.warning("Sentiment LLM error for %s: %s", instrument, e)
+        if lexicon.hits:
+            return _sentiment_from_lexicon(instrument, lexicon, news, price_change_pct)
         # Fallback: derive from price action + attribute news sources
         result = _sentiment_from_price_action(instrument, price_change_pct)
         result["sources"] = [n["source"] for n in news[:5]]
         return result
 
 
+def _sentiment_from_lexicon(
+    instrument: str,
+    lexicon: LexiconSentiment,
+    news: List[Dict[str, Any]],
+    change_pct: float,
+) -> Dict[str, Any]:
+    """Sentiment payload from the offline lexicon score (no LLM call)."""
+    score = lexicon.score
+    sentiment = lexicon.label
+    if score == 0.0:
+        # Headlines balance out: lean on the price move, as get_sentiment promises
+        score = _price_action_score(change_pct)
+        sentiment = "bullish" if score > 0 else "bearish"
+    strongest = sorted(news, key=headline_impact, reverse=True)[:3]
+    return {
+        "instrument": instrument,
+        "sentiment": sentiment,
+        "score": score,
+        "key_points": [article.get("title", "") for article in strongest if article.get("title")],
+        "confidence": lexicon.confidence,
+        "sources": [n["source"] for n in news[:5]],
+        "method": "lexicon",
+    }
+
+
+def _price_action_score(change_pct: float) -> float:
+    """Score in [-1, 1] from a price move; never exactly 0 (a flat move leans +0.05)."""
+    score = round(max(-1.0, min(1.0, change_pct / 5.0)), 2)
+    if score == 0.0:
+        score = -0.05 if change_pct < 0 else 0.05
+    return score
+
+
 def _sentiment_from_price_action(instrument: str, change_pct: float) -> Dict[str, Any]:
     """Derive a basic sentiment from price movement when LLM/news fails."""
-    if change_pct > 0.3:
-        sentiment, score = "bullish", round(min(1.0, change_pct / 5.0), 2)
-    elif change_pct < -0.3:
-        sentiment, score = "bearish", round(max(-1.0, change_pct / 5.0), 2)
-    else:
-        # Even "neutral" gets a slight lean so score is never exactly 0
-        score = round(change_pct / 5.0, 2) if change_pct != 0 else 0.05
-        sentiment = "bullish" if score > 0 else "bearish" if score < 0 else "neutral"
+    score = _price_action_score(change_pct)
+    sentiment = "bullish" if score > 0 else "bearish"
     return {
         "instrument": instrument,
         "sentiment": sentiment,
@@ -1207,10 +1347,13 @@ def explain_market_move(instrument: str, move_description: str) -> Dict[str, Any
     Returns:
         Explanation with sources
     """
-    # Gather data
-    price_data = fetch_price_data(instrument)
-    news = search_news(instrument, limit=5)
-    sentiment = get_sentiment(instrument)
+    # Gather data (price and news concurrently; sentiment reuses the news)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        price_future = executor.submit(fetch_price_data, instrument)
+        news_future = executor.submit(search_news, instrument, 5)
+        price_data = price_future.result()
+        news = news_future.result()
+    sentiment = get_sentiment(instrument, news=news)
 
     # Build context
     price_context = f"Current price: {price_data.get('price', 'N/A')}" if price_data.get('price') else "Price data unavailable"
@@ -1271,6 +1414,195 @@ Generate a clear, factual explanation (2-3 sentences max)."""
         }
 
 
+def _gather_move_evidence(mover: Dict[str, Any]) -> Dict[str, Any]:
+    """Price, news and technicals for one mover (runs in a worker thread)."""
+    instrument = mover["instrument"]
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        price_future = executor.submit(fetch_price_data, instrument)
+        news_future = executor.submit(search_news, instrument, 5)
+        technicals_future = executor.submit(analyze_technicals, instrument, "1h")
+        evidence = {"price": {}, "news": [], "technicals": {}}
+        for key, future in (("price", price_future), ("news", news_future), ("technicals", technicals_future)):
+            try:
+                evidence[key] = future.result() or evidence[key]
+            except Exception as exc:
+                logger.warning("Evidence %s failed for %s: %s", key, instrument, exc)
+    return evidence
+
+
+def normalize_movers(movers: Any) -> List[Dict[str, Any]]:
+    """
+    Validated copies of explain_market_moves' *movers*.
+
+    Entries that are neither an instrument string nor a dict with a string
+    "instrument" are skipped; a "change_pct" that is not a finite number
+    (e.g. "abc") is dropped, and numeric strings become floats.
+    """
+    normalized: List[Dict[str, Any]] = []
+    for mover in movers if isinstance(movers, (list, tuple)) else []:
+        if isinstance(mover, str):
+            item = {"instrument": mover}
+        elif isinstance(mover, dict):
+            item = dict(mover)
+        else:
+            continue
+        if not item.get("instrument") or not isinstance(item["instrument"], str):
+            continue
+        change_pct = item.pop("change_pct", None)
+        if change_pct is not None and not isinstance(change_pct, bool):
+            try:
+                change_pct = float(change_pct)
+            except (TypeError, ValueError):
+                change_pct = None
+            if change_pct is not None and math.isfinite(change_pct):
+                item["change_pct"] = change_pct
+        if not isinstance(item.get("move_description"), str) or not item["move_description"]:
+            item["move_description"] = (
+                f"{item['instrument']} moved {item['change_pct']:+.2f}%" if "change_pct" in item
+                else f"{item['instrument']} recent move"
+            )
+        normalized.append(item)
+    return normalized
+
+
+def explain_market_moves(movers: List[Any]) -> Dict[str, Any]:
+    """
+    Explain several market moves with one LLM call.
+
+    Evidence (price, news, technicals) for every mover is gathered
+    concurrently, articles shared between movers are sent once, and the LLM
+    returns all explanations in a single structured JSON response.
+
+    Args:
+        movers: Instruments, or dicts with "instrument" and optional
+            "move_description" / "change_pct"
+
+    Returns:
+        {"explanations": [...], "articles": [...], "generated_at": ...}
+    """
+    normalized = normalize_movers(movers)
+    if not normalized:
+        return {"explanations": [], "articles": [], "generated_at": datetime.now().isoformat()}
+
+    with ThreadPoolExecutor(max_workers=min(6, len(normalized))) as executor:
+        evidence = list(executor.map(_gather_move_evidence, normalized))
+
+    # Dedupe articles across movers; movers reference them by id
+    articles: List[Dict[str, Any]] = []
+    article_ids: Dict[str, str] = {}
+    mover_refs: List[List[str]] = []
+    for ev in evidence:
+        refs = []
+        for article in ev["news"]:
+            key = (article.get("url") or "").strip() or (article.get("title") or "").strip().lower()
+            if not key:
+                continue
+            if key not in article_ids:
+                article_ids[key] = f"A{len(articles) + 1}"
+                articles.append({"id": article_ids[key], **article})
+            refs.append(article_ids[key])
+        mover_refs.append(refs)
+
+    article_lines = "\n".join(
+        f"[{a['id']}] {a.get('title', '')} ({a.get('source', '?')}): {(a.get('description') or '')[:150]}"
+        for a in articles
+    ) or "No recent news found."
+    mover_lines = []
+    for mover, ev, refs in zip(normalized, evidence, mover_refs):
+        tech = ev["technicals"]
+        indicators = tech.get("indicators") or {}
+        mover_lines.append(
+            f"- {mover['instrument']}: {mover['move_description']}. "
+            f"Price {ev['price'].get('price', 'N/A')}; trend {tech.get('trend', 'n/a')}, "
+            f"RSI14 {indicators.get('rsi14', 'n/a')}, volatility {tech.get('volatility', 'n/a')}. "
+            f"Related articles: {', '.join(refs) or 'none'}"
+        )
+
+    prompt = f"""Explain why each of these market moves happened.
+
+Moves:
+{chr(10).join(mover_lines)}
+
+Articles (shared across moves):
+{article_lines}
+
+RULES:
+- Explain what HAS happened, not what WILL happen
+- Reference specific article ids and data points; use past tense
+- 2-3 sentences per move
+
+Return ONLY a JSON object:
+{{"explanations": [{{"instrument": "...", "explanation": "...", "sentiment": "bullish" | "bearish" | "neutral", "sentiment_score": -1.0 to 1.0, "article_ids": ["A1"]}}]}}"""
+
+    by_id = {a["id"]: a for a in articles}
+    parsed: Dict[str, Dict[str, Any]] = {}
+    error = None
+    try:
+        llm = get_llm_client()
+        response_text = llm.simple_chat(
+            system_prompt=SYSTEM_PROMPT_MARKET,
+            user_message=prompt,
+            temperature=0.4,
+            max_tokens=250 * len(normalized) + 200,
+        ).strip()
+        if response_text.startswith("```json"):
+            response_text = response_text.split("```json")[1].split("```")[0].strip()
+        elif response_text.startswith("```"):
+            response_text = response_text.split("```")[1].split("```")[0].strip()
+        for item in json.loads(response_text).get("explanations", []):
+            if isinstance(item, dict) and item.get("instrument"):
+                parsed[item["instrument"]] = item
+    except Exception as e:
+        logger.warning("Batched market explanation error: %s", e)
+        error = str(e)
+
+    explanations = []
+    for mover, ev, refs in zip(normalized, evidence, mover_refs):
+        instrument = mover["instrument"]
+        price = ev["price"].get("price")
+        item = parsed.get(instrument)
+        change_pct = float(mover.get("change_pct") or 0.0)
+        if item:
+            # The reply is validated per mover; one bad field must not fail the batch
+            try:
+                score = float(item.get("sentiment_score", 0.0) or 0.0)
+                if not math.isfinite(score):
+                    raise ValueError(f"non-finite sentiment_score {score}")
+                sentiment = {"sentiment": str(item.get("sentiment") or "neutral"), "score": score}
+            except (TypeError, ValueError):
+                sentiment = _sentiment_from_price_action(instrument, change_pct)
+            explanation = str(item.get("explanation", "")).strip()
+            cited_ids = item.get("article_ids")
+            if not isinstance(cited_ids, list):
+                cited_ids = []
+            cited = [a for a in cited_ids if isinstance(a, str) and a in by_id] or refs
+        else:
+            sentiment = _sentiment_from_price_action(instrument, change_pct)
+            explanation = (
+                f"Latest move context for {instrument}: "
+                f"{f'Current price: {price}' if price else 'Price data unavailable'}. "
+                "AI-generated explanation is temporarily unavailable."
+            )
+            cited = refs
+        explanations.append({
+            "instrument": instrument,
+            "move": mover["move_description"],
+            "explanation": explanation,
+            "price": price,
+            "sentiment": sentiment,
+            "sources": {"news": [by_id[a].get("url", "") for a in cited[:3]]},
+        })
+
+    result = {
+        "explanations": explanations,
+        "articles": articles,
+        "generated_at": datetime.now().isoformat(),
+    }
+    if error:
+        result["error"] = error
+    return result
+
+
 def generate_market_brief(instruments: List[str] = None) -> Dict[str, Any]:
     """
     Generate a comprehensive market brief covering multiple instruments.
@@ -1391,17 +1723,30 @@ def fetch_economic_calendar() -> Dict[str, Any]:
     """
     Fetch economic calendar from Finnhub.
     Returns upcoming and recent economic events (Non-Farm Payrolls, CPI, etc.).
+    Cached for 15 minutes (errors for 2 minutes) — see market/provider_cache.py.
     """
+    from .provider_cache import cached_call
+
     api_key = os.environ.get("FINNHUB_API_KEY", "")
     if not api_key:
         return {"events": [], "error": "FINNHUB_API_KEY not configured"}
 
-    from datetime import timedelta
+    today = datetime.now(tz=timezone.utc).strftime("%Y-%m-%d")
+    return cached_call(
+        "finnhub_calendar",
+        today,
+        lambda: _fetch_economic_calendar_upstream(api_key),
+        is_error=lambda result: bool(result.get("error")),
+    )
+
+
+def _fetch_economic_calendar_upstream(api_key: str) -> Dict[str, Any]:
     today = datetime.now(tz=timezone.utc)
     from_date = (today - timedelta(days=1)).strftime("%Y-%m-%d")
     to_date = (today + timedelta(days=7)).strftime("%Y-%m-%d")
 
     try:
+        acquire("finnhub", api_key)
         response = requests.get(
             "https://finnhub.io/api/v1/calendar/economic",
             params={"from": from_date, "to": to_date, "token": api_key},
@@ -1445,7 +1790,7 @@ def fetch_economic_calendar() -> Dict[str, Any]:
 def fetch_finnhub_quote(instrument: str) -> Dict[str, Any]:
     """
     Fetch real-time quote from Finnhub as fallback for Deriv.
-    Maps instruments to Finnhub OANDA format.
+    Maps instruments to Finnhub OANDA format. Cached for 5 seconds.
     """
     api_key = os.environ.get("FINNHUB_API_KEY", "")
     if not api_key:
@@ -1462,7 +1807,18 @@ def fetch_finnhub_quote(instrument: str) -> Dict[str, Any]:
     if not symbol:
         return {}
 
+    from .provider_cache import cached_call
+
+    return cached_call(
+        "finnhub_quote",
+        symbol,
+        lambda: _fetch_finnhub_quote_upstream(instrument, symbol, api_key),
+    )
+
+
+def _fetch_finnhub_quote_upstream(instrument: str, symbol: str, api_key: str) -> Dict[str, Any]:
     try:
+        acquire("finnhub", api_key)
         response = requests.get(
             "https://finnhub.io/api/v1/quote",
             params={"symbol": symbol, "token": api_key},
@@ -1488,40 +1844,55 @@ def fetch_finnhub_quote(instrument: str) -> Dict[str, Any]:
 
 def fetch_pattern_recognition(instrument: str, resolution: str = "60") -> Dict[str, Any]:
     """
-    Fetch technical pattern recognition from Finnhub.
-    Detects head-and-shoulders, triangles, double tops/bottoms, etc.
-    """
-    api_key = os.environ.get("FINNHUB_API_KEY", "")
-    if not api_key:
-        return {"patterns": [], "error": "FINNHUB_API_KEY not configured"}
+    Detect candlestick and chart patterns locally from cached Deriv candles.
+    Engulfing, doji, hammer/shooting star, pin bars, double tops/bottoms and
+    swing pivots — works for any Deriv symbol, synthetics included.
 
-    finnhub_map = {
-        "EUR/USD": "OANDA:EUR_USD", "GBP/USD": "OANDA:GBP_USD",
-        "USD/JPY": "OANDA:USD_JPY", "AUD/USD": "OANDA:AUD_USD",
-        "GOLD": "OANDA:XAU_USD", "XAU/USD": "OANDA:XAU_USD",
-    }
-    symbol = finnhub_map.get(instrument)
-    if not symbol:
-        return {"patterns": [], "note": f"No Finnhub mapping for {instrument}"}
+    Args:
+        instrument: Trading instrument
+        resolution: Candle size in minutes ("1", "5", "15", "30", "60") or "D"
+    """
+    from .candles import get_candles
+    from .patterns import detect_patterns
+    from .provider_cache import cached_call
 
-    try:
-        response = requests.get(
-            "https://finnhub.io/api/v1/scan/pattern",
-            params={"symbol": symbol, "resolution": resolution, "token": api_key},
-            timeout=8,
-        )
-        if response.status_code != 200:
-            return {"patterns": []}
-        data = response.json()
-        patterns = data.get("points", [])
+    granularity = 86400 if str(resolution).upper() in ("D", "1D") else None
+    if granularity is None:
+        try:
+            granularity = int(resolution) * 60
+        except (TypeError, ValueError):
+            granularity = 3600
+    if granularity not in TIMEFRAME_TO_GRANULARITY.values():
+        granularity = 3600
+
+    series = get_candles(_get_deriv_symbol(instrument), granularity, count=200)
+    if series is None or len(series) < 3:
         return {
             "instrument": instrument,
-            "patterns": patterns[:5],
-            "count": len(patterns),
-            "source": "finnhub",
+            "patterns": [],
+            "count": 0,
+            "error": "No candle history available",
+            "source": "local",
         }
-    except Exception as e:
-        return {"patterns": [], "error": str(e)}
+
+    # Patterns only change when a candle closes: key on the last candle and
+    # expire at its close.
+    last_epoch = int(series.epoch[-1])
+    detected = cached_call(
+        "patterns",
+        (series.symbol, granularity, last_epoch, len(series)),
+        lambda: detect_patterns(series),
+        ttl=max(1.0, last_epoch + granularity - time.time()),
+        is_error=lambda _: False,
+    )
+    return {
+        "instrument": instrument,
+        "granularity": granularity,
+        "patterns": detected["patterns"][:10],
+        "count": len(detected["patterns"]),
+        "pivots": detected["pivots"],
+        "source": "local",
+    }
 
 
 # ─── Deriv Active Symbols ────────────────────────────────────────────
@@ -1560,31 +1931,64 @@ def fetch_active_symbols() -> List[Dict[str, Any]]:
 # ─── News-based insight generation ──────────────────────────────────
 
 
-def cleanup_old_insights(keep_count: int = 20) -> int:
-    """Remove old insights, keeping only the most recent *keep_count*."""
+INSIGHTS_KEEP_PER_INSTRUMENT = 5
+
+
+def cleanup_old_insights(keep_per_instrument: int = INSIGHTS_KEEP_PER_INSTRUMENT) -> int:
+    """Keep the newest *keep_per_instrument* insights per instrument.
+
+    One DELETE: each row is compared (keyset-style, via the
+    ``(instrument, generated_at)`` index) against the generated_at of the
+    K-th newest row for its instrument.
+    """
+    from django.db.models import OuterRef, Subquery
+
     try:
-        total = MarketInsight.objects.count()
-        if total <= keep_count:
-            return 0
-        keep_ids = list(
-            MarketInsight.objects.order_by("-generated_at")
-            .values_list("id", flat=True)[:keep_count]
+        cutoff = (
+            MarketInsight.objects.filter(instrument=OuterRef("instrument"))
+            .order_by("-generated_at")
+            .values("generated_at")[keep_per_instrument - 1:keep_per_instrument]
         )
-        deleted, _ = MarketInsight.objects.exclude(id__in=keep_ids).delete()
-        logger.info(f"Cleaned up {deleted} old insights, kept {keep_count}")
+        deleted, _ = MarketInsight.objects.filter(generated_at__lt=Subquery(cutoff)).delete()
+        if deleted:
+            logger.info(
+                "Cleaned up %d old insights, kept %d per instrument", deleted, keep_per_instrument
+            )
         return deleted
     except Exception as e:
         logger.error(f"Failed to cleanup old insights: {e}")
         return 0
 
 
+def _save_insights(rows: List[MarketInsight]) -> List[Dict[str, Any]]:
+    """Insert *rows* in one ``bulk_create`` and serialize them."""
+    if not rows:
+        return []
+    try:
+        MarketInsight.objects.bulk_create(rows)
+    except Exception as exc:
+        logger.warning(f"Failed to save insights: {exc}")
+        return []
+    return [
+        {
+            "id": str(obj.id),
+            "instrument": obj.instrument,
+            "insight_type": obj.insight_type,
+            "content": obj.content,
+            "sentiment_score": obj.sentiment_score,
+            "generated_at": obj.generated_at.isoformat(),
+        }
+        for obj in rows
+    ]
+
+
 def generate_insights_from_news(limit: int = 8, max_insights: int = 5) -> List[Dict[str, Any]]:
     """
     Fetch recent headlines, run them through the LLM to produce trading
     insights, and persist the results to ``MarketInsight``.
     """
     try:
-        cleanup_old_insights(keep_count=15)
+        cleanup_old_insights()
 
         headlines = fetch_top_headlines(limit=limit)
         if not headlines:
@@ -1648,60 +2052,45 @@ def generate_insights_from_news(limit: int = 8, max_insights: int = 5) -> List[D
                 for h in headlines[:3]
             ]
 
+            rows = []
             for insight in insights_data[:max_insights]:
                 try:
-                    obj = MarketInsight.objects.create(
+                    rows.append(MarketInsight(
                         instrument=insight.get("instrument", "GENERAL"),
                         insight_type=insight.get("insight_type", "news"),
                         content=insight.get("content", ""),
                         sentiment_score=float(insight.get("sentiment_score", 0.0)),
                         sources={"news_articles": top_sources},
-                    )
-                    saved.append({
-                        "id": str(obj.id),
-                        "instrument": obj.instrument,
-                        "insight_type": obj.insight_type,
-                        "content": obj.content,
-                        "sentiment_score": obj.sentiment_score,
-                        "generated_at": obj.generated_at.isoformat(),
-                    })
+                    ))
                 except Exception as exc:
-                    logger.warning(f"Failed to save insight: {exc}")
+                    logger.warning(f"Failed to build insight: {exc}")
+            saved = _save_insights(rows)
 
         except Exception as exc:
             logger.error(f"LLM insight generation failed, falling back: {exc}")
             # Fallback: create basic insights directly from headlines
+            rows = []
             for article in headlines[:max_insights]:
-                try:
-                    text = f"{article.get('title', '')} {article.get('description', '')}".lower()
-                    instrument = "GENERAL"
-                    for kw, sym in [
-                        ("btc", "BTC/USD"), ("bitcoin", "BTC/USD"),
-                        ("eth", "ETH/USD"), ("ethereum", "ETH/USD"),
-                        ("eur", "EUR/USD"), ("euro", "EUR/USD"),
-                        ("gold", "GOLD"), ("xau", "GOLD"),
-                    ]:
-                        if kw in text:
-                            instrument = sym
-                            break
-                    obj = MarketInsight.objects.create(
-                        instrument=instrument,
-                        insight_type="news",
-                        content=f"{article.get('title', 'Market Update')}: "
-                                f"{(article.get('description') or '')[:150]}",
-                        sentiment_score=0.0,
-                        sources={"news_source": article.get("source", ""), "url": article.get("url", "")},
-                    )
-                    saved.append({
-                        "id": str(obj.id),
-                        "instrument": obj.instrument,
-                        "insight_type": obj.insight_type,
-                        "content": obj.content,
-                        "sentiment_score": obj.sentiment_score,
-                        "generated_at": obj.generated_at.isoformat(),
-                    })
-                except Exception as exc:
-                    logger.warning(f"Failed to save fallback insight: {exc}")
+                text = f"{article.get('title', '')} {article.get('description', '')}".lower()
+                instrument = "GENERAL"
+                for kw, sym in [
+                    ("btc", "BTC/USD"), ("bitcoin", "BTC/USD"),
+                    ("eth", "ETH/USD"), ("ethereum", "ETH/USD"),
+                    ("eur", "EUR/USD"), ("euro", "EUR/USD"),
+                    ("gold", "GOLD"), ("xau", "GOLD"),
+                ]:
+                    if kw in text:
+                        instrument = sym
+                        break
+                rows.append(MarketInsight(
+                    instrument=instrument,
+                    insight_type="news",
+                    content=f"{article.get('title', 'Market Update')}: "
+                            f"{(article.get('description') or '')[:150]}",
+                    sentiment_score=0.0,
+                    sources={"news_source": article.get("source", ""), "url": article.get("url", "")},
+                ))
+            saved = _save_insights(rows)
 
         logger.info(f"Generated {len(saved)} insights from {len(headlines)} articles")
         return saved
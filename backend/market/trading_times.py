@@ -0,0 +1,243 @@
+"""
+Trading-times calendar — answers "is this market open?" without network calls.
+
+Deriv's ``trading_times`` call returns, for one date, the open/close sessions
+of every symbol (holidays and early closes included). Once a day we pull
+today plus ``CALENDAR_DAYS_AHEAD`` days over a single WebSocket connection
+and flatten them into a sorted interval index per symbol:
+
+    opens[i] <= t < closes[i]  →  open
+
+so ``is_open`` and ``next_open`` are a single ``bisect`` (O(log n)).
+
+Symbols the calendar has never seen return ``None`` so callers can fall back
+to their own heuristics (see ``market.tools._is_market_closed``).
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_right
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from tradeiq.rate_limit import PRIORITY_BACKGROUND, acquire_async, request_priority
+
+logger = logging.getLogger("tradeiq.trading_times")
+
+CALENDAR_REFRESH_SECONDS = 24 * 3600
+CALENDAR_RETRY_SECONDS = 600  # back-off after a failed refresh
+CALENDAR_DAYS_AHEAD = 7
+# Sessions separated by at most this gap are merged (e.g. 23:59:59 → 00:00:00).
+SESSION_MERGE_GAP_SECONDS = 1.0
+
+
+def _session_epochs(day: date, open_str: str, close_str: str) -> Optional[Tuple[float, float]]:
+    """Convert one ``HH:MM:SS`` open/close pair on *day* to UTC epochs."""
+    if not open_str or not close_str or "--" in (open_str, close_str):
+        return None
+    try:
+        oh, om, os_ = (int(x) for x in open_str.split(":"))
+        ch, cm, cs = (int(x) for x in close_str.split(":"))
+    except ValueError:
+        return None
+    midnight = datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()
+    start = midnight + oh * 3600 + om * 60 + os_
+    end = midnight + ch * 3600 + cm * 60 + cs
+    if end <= start:  # overnight session closes the next day
+        end += 86400
+    return start, end
+
+
+class TradingCalendar:
+    """Per-symbol sorted session index built from ``trading_times`` payloads."""
+
+    def __init__(self):
+        self._opens: Dict[str, List[float]] = {}
+        self._closes: Dict[str, List[float]] = {}
+        self.loaded_at: Optional[float] = None
+        self.horizon_end: Optional[float] = None
+
+    @classmethod
+    def from_payloads(cls, payloads: Dict[date, Dict[str, Any]]) -> "TradingCalendar":
+        """Build a calendar from ``{date: trading_times response body}``."""
+        sessions: Dict[str, List[Tuple[float, float]]] = {}
+        for day, payload in payloads.items():
+            for market in payload.get("markets", []) or []:
+                for submarket in market.get("submarkets", []) or []:
+                    for sym in submarket.get("symbols", []) or []:
+                        symbol = sym.get("symbol")
+                        if not symbol:
+                            continue
+                        times = sym.get("times", {}) or {}
+                        opens = times.get("open", []) or []
+                        closes = times.get("close", []) or []
+                        bucket = sessions.setdefault(symbol, [])
+                        for open_str, close_str in zip(opens, closes):
+                            session = _session_epochs(day, open_str, close_str)
+                            if session:
+                                bucket.append(session)
+
+        calendar = cls()
+        for symbol, spans in sessions.items():
+            spans.sort()
+            opens: List[float] = []
+            closes: List[float] = []
+            for start, end in spans:
+                if closes and start - closes[-1] <= SESSION_MERGE_GAP_SECONDS:
+                    closes[-1] = max(closes[-1], end)
+                else:
+                    opens.append(start)
+                    closes.append(end)
+            calendar._opens[symbol] = opens
+            calendar._closes[symbol] = closes
+
+        if payloads:
+            last_day = max(payloads)
+            calendar.horizon_end = datetime(
+                last_day.year, last_day.month, last_day.day, tzinfo=timezone.utc
+            ).timestamp() + 86400
+        calendar.loaded_at = time.time()
+        return calendar
+
+    def knows(self, symbol: str) -> bool:
+        return symbol in self._opens
+
+    def _covers(self, ts: float) -> bool:
+        return self.horizon_end is not None and ts < self.horizon_end
+
+    def is_open(self, symbol: str, at: Optional[datetime] = None) -> Optional[bool]:
+        """True/False if the calendar covers *symbol* at *at*, else None."""
+        ts = (at or datetime.now(tz=timezone.utc)).timestamp()
+        opens = self._opens.get(symbol)
+        if opens is None or not self._covers(ts):
+            return None
+        idx = bisect_right(opens, ts) - 1
+        return idx >= 0 and ts < self._closes[symbol][idx]
+
+    def next_open(self, symbol: str, at: Optional[datetime] = None) -> Optional[datetime]:
+        """When *symbol* next opens (``at`` itself if open now).
+
+        None when the symbol is unknown or no session falls inside the
+        calendar horizon.
+        """
+        at = at or datetime.now(tz=timezone.utc)
+        ts = at.timestamp()
+        opens = self._opens.get(symbol)
+        if opens is None or not self._covers(ts):
+            return None
+        idx = bisect_right(opens, ts) - 1
+        if idx >= 0 and ts < self._closes[symbol][idx]:
+            return at
+        if idx + 1 < len(opens):
+            return datetime.fromtimestamp(opens[idx + 1], tz=timezone.utc)
+        return None
+
+    def next_close(self, symbol: str, at: Optional[datetime] = None) -> Optional[datetime]:
+        """When the current session of *symbol* closes (None if closed/unknown)."""
+        ts = (at or datetime.now(tz=timezone.utc)).timestamp()
+        opens = self._opens.get(symbol)
+        if opens is None or not self._covers(ts):
+            return None
+        idx = bisect_right(opens, ts) - 1
+        if idx >= 0 and ts < self._closes[symbol][idx]:
+            return datetime.fromtimestamp(self._closes[symbol][idx], tz=timezone.utc)
+        return None
+
+    @property
+    def symbol_count(self) -> int:
+        return len(self._opens)
+
+
+# ─── Fetching & singleton ────────────────────────────────────────────
+
+
+async def _fetch_trading_times_async(days: List[date]) -> Dict[date, Dict[str, Any]]:
+    """Fetch ``trading_times`` for each date over one WebSocket connection."""
+    import websockets
+
+    app_id = os.environ.get("DERIV_APP_ID", "125489")
+    ws_url = f"wss://ws.derivws.com/websockets/v3?app_id={app_id}"
+    payloads: Dict[date, Dict[str, Any]] = {}
+    async with websockets.connect(ws_url, close_timeout=5) as ws:
+        for day in days:
+            await acquire_async("deriv")
+            await ws.send(json.dumps({"trading_times": day.isoformat()}))
+            data = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
+            if "error" in data:
+                raise RuntimeError(data["error"].get("message", "trading_times failed"))
+            payloads[day] = data.get("trading_times", {}) or {}
+    return payloads
+
+
+def fetch_trading_calendar(days_ahead: int = CALENDAR_DAYS_AHEAD) -> TradingCalendar:
+    """Fetch and build a fresh calendar covering today + *days_ahead* days."""
+    from market.tools import _run_async_in_new_thread
+
+    today = datetime.now(tz=timezone.utc).date()
+    days = [today + timedelta(days=i) for i in range(days_ahead + 1)]
+    payloads = _run_async_in_new_thread(_fetch_trading_times_async(days))
+    if not payloads:
+        raise RuntimeError("trading_times returned no data")
+    return TradingCalendar.from_payloads(payloads)
+
+
+_calendar = TradingCalendar()
+_calendar_lock = threading.Lock()
+_refresh_in_flight = False
+_last_refresh_attempt: Optional[float] = None
+
+
+def _refresh_worker():
+    global _calendar, _refresh_in_flight
+    try:
+        with request_priority(PRIORITY_BACKGROUND):
+            calendar = fetch_trading_calendar()
+        with _calendar_lock:
+            _calendar = calendar
+        logger.info("Trading calendar loaded for %d symbols", calendar.symbol_count)
+    except Exception as exc:
+        logger.warning("Trading calendar refresh failed: %s", exc)
+    finally:
+        _refresh_in_flight = False
+
+
+def refresh_trading_calendar(blocking: bool = False) -> None:
+    """Start a calendar refresh (in the background unless *blocking*)."""
+    global _refresh_in_flight, _last_refresh_attempt
+    with _calendar_lock:
+        if _refresh_in_flight:
+            return
+        _refresh_in_flight = True
+        _last_refresh_attempt = time.time()
+    if blocking:
+        _refresh_worker()
+    else:
+        threading.Thread(target=_refresh_worker, daemon=True, name="trading-calendar").start()
+
+
+def get_trading_calendar() -> TradingCalendar:
+    """Return the cached calendar, kicking off a daily background refresh.
+
+    Never blocks on the network: while the first load is in flight the
+    returned calendar is empty and callers fall back to their heuristics.
+    """
+    now = time.time()
+    calendar = _calendar
+    stale = calendar.loaded_at is None or now - calendar.loaded_at >= CALENDAR_REFRESH_SECONDS
+    recently_tried = (
+        _last_refresh_attempt is not None
+        and now - _last_refresh_attempt < CALENDAR_RETRY_SECONDS
+    )
+    if stale and not recently_tried:
+        refresh_trading_calendar()
+    return calendar
+
+
+def set_trading_calendar(calendar: TradingCalendar) -> None:
+    """Install a pre-built calendar (used by tests and replay tooling)."""
+    global _calendar
+    with _calendar_lock:
+        _calendar = calendar
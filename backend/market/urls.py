@@ -12,6 +12,9 @@ from .views import (
     TopHeadlinesView,
     ActiveSymbolsView,
     PatternRecognitionView,
+    MarketScreenerView,
+    ExplainMovesView,
+    ProviderStatsView,
 )
 
 router = DefaultRouter()
@@ -24,9 +27,12 @@ urlpatterns = [
     path("price/", LivePriceView.as_view(), name="market-price"),
     path("history/", PriceHistoryView.as_view(), name="market-history"),
     path("technicals/", MarketTechnicalsView.as_view(), name="market-technicals"),
+    path("explain/", ExplainMovesView.as_view(), name="market-explain"),
     path("sentiment/", MarketSentimentView.as_view(), name="market-sentiment"),
     path("calendar/", EconomicCalendarView.as_view(), name="market-calendar"),
     path("headlines/", TopHeadlinesView.as_view(), name="market-headlines"),
     path("instruments/", ActiveSymbolsView.as_view(), name="market-instruments"),
     path("patterns/", PatternRecognitionView.as_view(), name="market-patterns"),
+    path("screener/", MarketScreenerView.as_view(), name="market-screener"),
+    path("provider-stats/", ProviderStatsView.as_view(), name="market-provider-stats"),
 ]
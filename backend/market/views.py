@@ -16,8 +16,6 @@ from .tools import (
     generate_insights_from_news,
 )
 from agents.router import route_market_query
-from django.utils import timezone as dj_tz
-from datetime import timedelta
 
 logger = logging.getLogger(__name__)
 
@@ -26,15 +24,7 @@ class MarketInsightViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = MarketInsight.objects.all()
     serializer_class = MarketInsightSerializer
 
-    def list(self, request, *args, **kwargs):
-        """Auto-generate fresh insights when none exist or older than 2 hours."""
-        two_hours_ago = dj_tz.now() - timedelta(hours=2)
-        if MarketInsight.objects.filter(generated_at__gte=two_hours_ago).count() == 0:
-            try:
-                generate_insights_from_news(limit=8, max_insights=5)
-            except Exception as e:
-                logger.warning("Failed to auto-generate insights: %s", e)
-        return super().list(request, *args, **kwargs)
+    # Insights are produced by market/insights_worker.py; listing is a pure read.
 
     @action(detail=False, methods=["post"], permission_classes=[AllowAny])
     def refresh(self, request):
@@ -162,10 +152,33 @@ class MarketTechnicalsView(APIView):
         return Response(analyze_technicals(instrument=instrument, timeframe=timeframe))
 
 
+class ExplainMovesView(APIView):
+    """
+    POST /api/market/explain/
+    {"movers": [{"instrument": "EUR/USD", "change_pct": -1.2}, "BTC/USD"]}
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        from .tools import explain_market_moves, normalize_movers
+
+        movers = request.data.get("movers") or []
+        if not isinstance(movers, list) or not movers:
+            return Response({"error": "movers must be a non-empty list"}, status=400)
+        movers = normalize_movers(movers[:10])
+        if not movers:
+            return Response({"error": "movers must be instruments or objects with an instrument"}, status=400)
+        try:
+            return Response(explain_market_moves(movers))
+        except Exception as e:
+            logger.exception("ExplainMovesView error")
+            return Response({"error": str(e)}, status=500)
+
+
 class MarketSentimentView(APIView):
     """
     POST /api/market/sentiment/
-    {"instrument": "EUR/USD"}
+    {"instrument": "EUR/USD", "include_key_points": false}
     """
     permission_classes = [AllowAny]
 
@@ -173,8 +186,9 @@ class MarketSentimentView(APIView):
         instrument = request.data.get("instrument", "")
         if not instrument:
             return Response({"error": "instrument is required"}, status=400)
+        include_key_points = str(request.data.get("include_key_points", "")).lower() in ("1", "true", "yes")
         try:
-            return Response(get_sentiment(instrument))
+            return Response(get_sentiment(instrument, include_key_points=include_key_points))
         except Exception as e:
             logger.exception("MarketSentimentView error for %s", instrument)
             return Response({"error": str(e), "instrument": instrument}, status=500)
@@ -213,7 +227,7 @@ class ActiveSymbolsView(APIView):
 
 
 class PatternRecognitionView(APIView):
-    """POST /api/market/patterns/ — Finnhub technical pattern recognition."""
+    """POST /api/market/patterns/ — Local candlestick & chart pattern recognition."""
     permission_classes = [AllowAny]
 
     def post(self, request):
@@ -223,3 +237,44 @@ class PatternRecognitionView(APIView):
             return Response({"error": "instrument is required"}, status=400)
         resolution = request.data.get("resolution", "60")
         return Response(fetch_pattern_recognition(instrument, resolution))
+
+
+class MarketScreenerView(APIView):
+    """
+    POST /api/market/screener/
+    {"filters": ["rsi14 < 30", "price > sma50"], "timeframe": "1h",
+     "market": "forex", "sort_by": "atr_ratio", "order": "desc", "limit": 50}
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        from .screener import run_screener
+
+        filters = request.data.get("filters", [])
+        if isinstance(filters, (str, dict)):
+            filters = [filters]
+        try:
+            return Response(run_screener(
+                filters=filters,
+                timeframe=request.data.get("timeframe", "1h"),
+                market=request.data.get("market") or None,
+                symbols=request.data.get("symbols") or None,
+                sort_by=request.data.get("sort_by", "change_pct"),
+                descending=str(request.data.get("order", "desc")).lower() != "asc",
+                limit=request.data.get("limit", 50),
+            ))
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=400)
+        except Exception as e:
+            logger.exception("MarketScreenerView error")
+            return Response({"error": str(e)}, status=500)
+
+
+class ProviderStatsView(APIView):
+    """GET /api/market/provider-stats/ — upstream cache hits/misses, calls saved and remaining request budget."""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        from tradeiq.rate_limit import rate_limit_stats
+        from .provider_cache import provider_cache_stats
+        return Response({"providers": provider_cache_stats(), "rate_limits": rate_limit_stats()})
@@ -0,0 +1,99 @@
+"""
+test_rate_limit.py - Unit tests for the upstream token-bucket limiter.
+
+Run with:
+    python manage.py test tests.test_rate_limit
+"""
+import asyncio
+import os
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from tradeiq import rate_limit
+from tradeiq.rate_limit import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    RateLimitExceeded,
+    TokenBucket,
+    acquire,
+    acquire_async,
+    rate_limit_stats,
+    request_priority,
+    reset_rate_limits,
+)
+
+
+class TokenBucketTest(SimpleTestCase):
+    def test_interactive_drains_burst_then_waits_for_refill(self):
+        bucket = TokenBucket(rate=2.0, capacity=3)
+        now = bucket.updated
+        self.assertEqual([bucket.take(PRIORITY_INTERACTIVE, now) for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(bucket.take(PRIORITY_INTERACTIVE, now), 0.5)
+        self.assertEqual(bucket.take(PRIORITY_INTERACTIVE, now + 0.5), 0.0)
+
+    def test_background_leaves_reserve_and_yields_to_waiters(self):
+        bucket = TokenBucket(rate=1.0, capacity=10, reserve_fraction=0.2)
+        now = bucket.updated
+        granted = 0
+        while bucket.take(PRIORITY_BACKGROUND, now) == 0.0:
+            granted += 1
+        self.assertEqual(granted, 8)
+        self.assertEqual(bucket.take(PRIORITY_INTERACTIVE, now), 0.0)
+
+        bucket.tokens, bucket.interactive_waiting = 5.0, 4
+        self.assertGreater(bucket.take(PRIORITY_BACKGROUND, now), 0.0)
+
+
+class AcquireTest(SimpleTestCase):
+    def setUp(self):
+        reset_rate_limits()
+        self.addCleanup(reset_rate_limits)
+
+    def test_budgets_are_per_provider_and_token(self):
+        with patch.dict(rate_limit.PROVIDER_LIMITS, {"finnhub": (0.001, 1)}):
+            acquire("finnhub", "key-a")
+            acquire("finnhub", "key-b")
+            with self.assertRaises(RateLimitExceeded):
+                acquire("finnhub", "key-a", max_wait=0.1)
+
+        stats = rate_limit_stats()["finnhub"]
+        self.assertEqual(len(stats), 2)
+        self.assertEqual(sum(s["rejected"] for s in stats.values()), 1)
+        self.assertNotIn("key-a", stats)  # tokens are hashed
+
+    def test_async_waits_instead_of_failing(self):
+        with patch.dict(rate_limit.PROVIDER_LIMITS, {"deriv": (50.0, 1)}):
+            async def burst():
+                await asyncio.gather(*(acquire_async("deriv") for _ in range(3)))
+            asyncio.run(burst())
+
+        public = rate_limit_stats()["deriv"]["public"]
+        self.assertEqual(public["granted"], 3)
+        self.assertEqual(public["waited"], 2)
+
+    @patch.dict(os.environ, {"RATE_LIMIT_NEWSAPI": "3,7"})
+    def test_env_override(self):
+        acquire("newsapi", "k")
+        self.assertEqual(rate_limit_stats()["newsapi"][rate_limit._token_id("k")]["capacity"], 7.0)
+
+    def test_non_positive_rate_override_is_ignored(self):
+        for override in ("0,5", "-1,5", "nan,5", "2,0"):
+            with patch.dict(os.environ, {"RATE_LIMIT_FINNHUB": override}):
+                self.assertEqual(rate_limit._provider_limit("finnhub"), rate_limit.PROVIDER_LIMITS["finnhub"])
+
+    def test_zero_rate_bucket_is_exhausted_not_a_crash(self):
+        with patch.dict(rate_limit.PROVIDER_LIMITS, {"finnhub": (0.0, 1)}):
+            acquire("finnhub", "k")
+            with self.assertRaises(RateLimitExceeded):
+                acquire("finnhub", "k")
+
+    def test_priority_follows_into_async_helper_threads(self):
+        from market.tools import _run_async_in_new_thread
+
+        async def read_priority():
+            return rate_limit.current_priority()
+
+        with request_priority(PRIORITY_BACKGROUND):
+            self.assertEqual(_run_async_in_new_thread(read_priority()), PRIORITY_BACKGROUND)
+        self.assertEqual(_run_async_in_new_thread(read_priority()), PRIORITY_INTERACTIVE)
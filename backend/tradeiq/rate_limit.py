@@ -0,0 +1,222 @@
+"""
+Upstream rate limiting for Deriv, Finnhub and NewsAPI.
+
+Every outbound request takes a token from a bucket keyed by
+``(provider, API token)``, so one noisy user token cannot spend another's
+budget and bursts stay under the provider's limits instead of getting
+throttled (and falling back to demo data).
+
+Priority classes: interactive work (chat, API requests) may drain a bucket
+completely, while background work (market monitor, insight worker, calendar
+refresh) leaves ``BACKGROUND_RESERVE_FRACTION`` of the burst untouched and
+yields to interactive callers already waiting. Priority is carried in a
+context variable; set it with ``request_priority(PRIORITY_BACKGROUND)``.
+
+Callers that run out of budget wait (``time.sleep`` / ``asyncio.sleep``)
+until a token frees up, for at most ``max_wait`` seconds; beyond that
+``RateLimitExceeded`` is raised. ``rate_limit_stats()`` reports remaining
+budget per bucket (also on ``GET /api/market/provider-stats/``).
+
+Limits can be overridden per provider with ``RATE_LIMIT_<PROVIDER>`` set to
+``"<tokens per second>,<burst>"``, e.g. ``RATE_LIMIT_NEWSAPI="0.01,20"``.
+The rate must be positive and the burst at least 1; other values are
+ignored with a warning.
+"""
+import asyncio
+import contextvars
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger("tradeiq.rate_limit")
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+# provider -> (tokens per second, burst capacity), applied per API token
+PROVIDER_LIMITS: Dict[str, Tuple[float, float]] = {
+    "deriv": (5.0, 25),
+    "finnhub": (1.0, 30),           # free tier: 60 calls/minute
+    "newsapi": (100 / 86400, 50),   # developer plan: 100 requests/day
+}
+DEFAULT_LIMIT = (2.0, 10)
+BACKGROUND_RESERVE_FRACTION = 0.2
+DEFAULT_MAX_WAIT_SECONDS = 10.0
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "upstream_request_priority", default=PRIORITY_INTERACTIVE
+)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a token would not be available within ``max_wait``."""
+
+    def __init__(self, provider: str, retry_after: float):
+        self.provider = provider
+        self.retry_after = retry_after
+        super().__init__(f"{provider} request budget exhausted; retry in {retry_after:.1f}s")
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """Run the enclosed upstream calls at *priority*."""
+    reset = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(reset)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+class TokenBucket:
+    """Thread-safe token bucket with a reserve that background callers leave alone."""
+
+    def __init__(self, rate: float, capacity: float, reserve_fraction: float = BACKGROUND_RESERVE_FRACTION):
+        self.rate = rate
+        self.capacity = capacity
+        self.reserve = min(capacity * reserve_fraction, max(0.0, capacity - 1))
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.interactive_waiting = 0
+        self.granted = 0
+        self.waited = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, priority: int, now: Optional[float] = None) -> float:
+        """Take a token and return 0.0, or return seconds until one may be available."""
+        with self._lock:
+            self._refill(time.monotonic() if now is None else now)
+            floor = 1.0
+            if priority >= PRIORITY_BACKGROUND:
+                floor += self.reserve + self.interactive_waiting
+            if self.tokens >= floor:
+                self.tokens -= 1.0
+                return 0.0
+            if self.rate <= 0:
+                return math.inf  # never refills
+            return (floor - self.tokens) / self.rate
+
+    def remaining(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self.tokens
+
+    def _set_waiting(self, priority: int, delta: int) -> None:
+        if priority < PRIORITY_BACKGROUND:
+            with self._lock:
+                self.interactive_waiting += delta
+
+    def _record(self, waited: float, rejected: bool = False) -> None:
+        with self._lock:
+            if rejected:
+                self.rejected += 1
+                return
+            self.granted += 1
+            if waited:
+                self.waited += 1
+                self.wait_seconds += waited
+
+
+_buckets: Dict[Tuple[str, str], TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def _token_id(token: Optional[str]) -> str:
+    if not token:
+        return "public"
+    return hashlib.sha256(token.encode()).hexdigest()[:12]
+
+
+def _provider_limit(provider: str) -> Tuple[float, float]:
+    override = os.environ.get(f"RATE_LIMIT_{provider.upper()}", "")
+    if override:
+        try:
+            rate, burst = (float(part) for part in override.split(","))
+            if not (0 < rate < math.inf and 1 <= burst < math.inf):
+                raise ValueError("rate must be positive and burst at least 1")
+            return rate, burst
+        except ValueError:
+            logger.warning("Ignoring malformed RATE_LIMIT_%s=%r", provider.upper(), override)
+    return PROVIDER_LIMITS.get(provider, DEFAULT_LIMIT)
+
+
+def get_bucket(provider: str, token: Optional[str] = None) -> TokenBucket:
+    key = (provider, _token_id(token))
+    with _buckets_lock:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            bucket = _buckets[key] = TokenBucket(*_provider_limit(provider))
+        return bucket
+
+
+def _delays(provider: str, bucket: TokenBucket, max_wait: float):
+    """Yield sleep durations until *bucket* grants a token; raise past *max_wait*."""
+    priority = current_priority()
+    waited = 0.0
+    delay = bucket.take(priority)
+    if delay:
+        bucket._set_waiting(priority, 1)
+        try:
+            while delay:
+                if waited + delay > max_wait:
+                    bucket._record(waited, rejected=True)
+                    raise RateLimitExceeded(provider, delay)
+                yield delay
+                waited += delay
+                delay = bucket.take(priority)
+        finally:
+            bucket._set_waiting(priority, -1)
+    bucket._record(waited)
+
+
+def acquire(provider: str, token: Optional[str] = None, max_wait: float = DEFAULT_MAX_WAIT_SECONDS) -> None:
+    """Block until a request to *provider* fits the budget for *token*."""
+    for delay in _delays(provider, get_bucket(provider, token), max_wait):
+        time.sleep(delay)
+
+
+async def acquire_async(
+    provider: str,
+    token: Optional[str] = None,
+    max_wait: float = DEFAULT_MAX_WAIT_SECONDS,
+) -> None:
+    """Async ``acquire``: waits on the event loop instead of blocking it."""
+    for delay in _delays(provider, get_bucket(provider, token), max_wait):
+        await asyncio.sleep(delay)
+
+
+def rate_limit_stats() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Remaining budget and counters per provider and token id."""
+    with _buckets_lock:
+        items = list(_buckets.items())
+    stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for (provider, token_id), bucket in items:
+        stats.setdefault(provider, {})[token_id] = {
+            "remaining": round(bucket.remaining(), 2),
+            "capacity": bucket.capacity,
+            "refill_per_second": bucket.rate,
+            "granted": bucket.granted,
+            "waited": bucket.waited,
+            "rejected": bucket.rejected,
+            "wait_seconds": round(bucket.wait_seconds, 3),
+        }
+    return stats
+
+
+def reset_rate_limits() -> None:
+    with _buckets_lock:
+        _buckets.clear()
@@ -127,6 +127,9 @@ MEDIA_ROOT = BASE_DIR / "media"
 os.makedirs(MEDIA_ROOT / "charts", exist_ok=True)
 os.makedirs(MEDIA_ROOT / "ai_images", exist_ok=True)
 
+# On-disk candle history (market.candle_store); empty disables it
+CANDLE_STORE_DIR = os.environ.get("CANDLE_STORE_DIR", str(BASE_DIR / "data" / "candles"))
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # DRF
@@ -215,6 +218,24 @@ else:
         },
     }
 
+# Cache – shared Redis when available, so cached behavioral state and
+# trading statistics agree across the web, trade sync and trade ingest
+# processes; the in-memory fallback is per process (development only)
+if _redis_url:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": _redis_url,
+            "KEY_PREFIX": "tradeiq",
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+    }
+
 # ── Structured Logging ──────────────────────────────────────────────
 LOGGING = {
     "version": 1,